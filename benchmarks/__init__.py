@@ -0,0 +1 @@
+# Benchmark suite for the peter CLI tool
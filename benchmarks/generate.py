@@ -0,0 +1,101 @@
+# Synthetic peter.md generator for benchmarks
+import argparse
+import random
+from datetime import date, timedelta
+
+QUESTIONS = [
+    ("What are your top 3 priorities for today?", 3),
+    ("What potential obstacles might you face?", 2),
+    ("What progress have you made on your priorities?", 3),
+    ("What adjustments do you need to make?", 2),
+    ("What did you accomplish today?", 1),
+    ("What are you looking forward to tomorrow?", 1),
+]
+
+WORDS = (
+    "review draft finish report deploy service fix flaky test write docs plan "
+    "sprint call client refactor parser update dependencies profile startup "
+    "benchmark cache index migrate database prepare slides sync with team"
+).split()
+
+def _answer(rng: random.Random, long_answer_ratio: float) -> str:
+    if rng.random() < long_answer_ratio:
+        length = rng.randint(60, 120)
+    else:
+        length = rng.randint(2, 8)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+def generate_peter_md(output_file: str, todos: int, todos_per_day: int = 6,
+                      completed_ratio: float = 0.6, long_answer_ratio: float = 0.05,
+                      seed: int = 0) -> int:
+    """
+    Write a realistic peter.md with the given number of todos.
+    
+    Dates count forward one day per section from a start date chosen so the
+    last section lands on today. Entries mix the ``Completed`` forms written
+    by different peter versions: none, ``False`` and ``True``.
+    
+    Args:
+        output_file (str): Path of the markdown file to write
+        todos (int): Number of todo entries to generate
+        todos_per_day (int): Entries per date section
+        completed_ratio (float): Share of entries marked completed
+        long_answer_ratio (float): Share of entries with long answers
+        seed (int): Random seed, so runs are reproducible
+    
+    Returns:
+        int: Size of the written file in bytes
+    """
+    rng = random.Random(seed)
+    days = max(1, -(-todos // todos_per_day))
+    day = date.today() - timedelta(days=days - 1)
+    
+    written = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write("# Daily Todos\n\n")
+        while written < todos:
+            block = [f"## {day.isoformat()}\n\n"]
+            for _ in range(min(todos_per_day, todos - written)):
+                question, priority = rng.choice(QUESTIONS)
+                block.append(f"- **Question**: {question}\n")
+                block.append(f"  - **Answer**: {_answer(rng, long_answer_ratio)}\n")
+                block.append(f"  - **Priority**: {rng.randint(1, priority)}\n")
+                roll = rng.random()
+                if roll < completed_ratio:
+                    block.append("  - **Completed**: True\n")
+                elif roll < completed_ratio + (1 - completed_ratio) / 2:
+                    block.append("  - **Completed**: False\n")
+                block.append("\n")
+                written += 1
+            f.write("".join(block))
+            day += timedelta(days=1)
+        return f.tell()
+
+def generate_config(config_file: str):
+    """
+    Write a .peter config matching the generated questions.
+    
+    Args:
+        config_file (str): Path of the config file to write
+    """
+    with open(config_file, 'w', encoding='utf-8') as f:
+        f.write("# Daily Todo Questions\n\n")
+        for question, priority in QUESTIONS:
+            f.write(f"- {question} [priority:{priority}]\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic peter.md")
+    parser.add_argument("output", help="markdown file to write")
+    parser.add_argument("--todos", type=int, default=10_000)
+    parser.add_argument("--todos-per-day", type=int, default=6)
+    parser.add_argument("--completed-ratio", type=float, default=0.6)
+    parser.add_argument("--long-answer-ratio", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    size = generate_peter_md(args.output, args.todos, args.todos_per_day,
+                             args.completed_ratio, args.long_answer_ratio, args.seed)
+    print(f"📝 Wrote {args.todos} todos ({size} bytes) to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+# Benchmark runner for the parser, writers and CLI commands
+#
+# Usage:
+#   python -m benchmarks.run --sizes 1000 100000 --output bench.json
+#   python -m benchmarks.run --baseline bench.json
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+from click.testing import CliRunner
+from peter.cli import cli
+from peter.config import load_config
+from peter.index import index_path_for
+from peter.models import Answer
+from peter.parallel import parse_parallel
+from peter.picker import TodoFilter
+from peter.store import TodoStore
+from peter.todo_manager import (parse_todos_from_markdown, list_open_todos,
+                                save_todos_to_markdown, save_todos_to_markdown_with_status)
+from .generate import generate_peter_md, generate_config, QUESTIONS
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+# Worker processes for the parallel parse case
+PARALLEL_WORKERS = max(2, min(4, os.cpu_count() or 1))
+
+class Case:
+    """A single benchmark: a setup step that is not timed and a timed body."""
+    
+    def __init__(self, name: str, body: Callable[[Any], int], setup: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.body = body
+        self.setup = setup or (lambda: None)
+
+def _quiet(fn: Callable[[], Any]) -> Any:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn()
+
+def _invoke(workdir: str, args: List[str], input: Optional[str] = None) -> int:
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        result = CliRunner().invoke(cli, args, input=input)
+    finally:
+        os.chdir(cwd)
+    if result.exception is not None:
+        raise result.exception
+    return result.output.count("\n")
+
+def build_cases(workdir: str, size: int) -> List[Case]:
+    """
+    Build the benchmark cases for one generated history.
+    
+    Args:
+        workdir (str): Directory holding peter.md and .peter
+        size (int): Number of todos in peter.md
+    
+    Returns:
+        List[Case]: Cases in the order they should run
+    """
+    history = os.path.join(workdir, "peter.md")
+    config = os.path.join(workdir, ".peter")
+    scratch = os.path.join(workdir, "scratch.md")
+    answers = [Answer(question, "benchmark answer", priority) for question, priority in QUESTIONS]
+    
+    def fresh_copy():
+        shutil.copyfile(history, scratch)
+        return scratch
+    
+    def drop_index():
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(index_path_for(history))
+    
+    def warm_index():
+        _invoke(workdir, ["list"])
+    
+    def copy_with_todos():
+        return fresh_copy(), parse_todos_from_markdown(scratch)
+    
+    def backup_and_warm():
+        # Keep the original so every repetition closes the same open todo
+        shutil.copyfile(history, history + ".orig")
+        warm_index()
+    
+    parsed = parse_todos_from_markdown(history)
+    store = TodoStore.from_todos(parsed)
+    
+    def bench_load_config(_):
+        return len(load_config(config))
+    
+    def bench_parse(_):
+        return len(parse_todos_from_markdown(history))
+    
+    def bench_parse_parallel(_):
+        # Called directly, so the size threshold does not fall back to serial
+        return len(parse_parallel(history, PARALLEL_WORKERS))
+    
+    def bench_list_open(_):
+        list_open_todos(parsed)
+        return len(parsed)
+    
+    def bench_list_open_store(_):
+        list_open_todos(store)
+        return len(store)
+    
+    open_rows = list_open_todos(store)
+    
+    def bench_picker_filter(_):
+        # One keystroke at a time, as typed into the `peter close` picker
+        todo_filter = TodoFilter(open_rows)
+        query = "fix report"
+        for end in range(1, len(query) + 1):
+            todo_filter.matches(query[:end])
+        return len(open_rows)
+    
+    def bench_append(path):
+        _quiet(lambda: save_todos_to_markdown(answers, "2099-01-01", path))
+        return len(answers)
+    
+    def bench_rewrite(state):
+        path, todos = state
+        _quiet(lambda: save_todos_to_markdown_with_status(todos, path))
+        return len(todos)
+    
+    def bench_command(*args):
+        def body(_):
+            _invoke(workdir, list(args))
+            return size
+        return body
+    
+    def bench_close(_):
+        try:
+            _invoke(workdir, ["close"], input="1\ny\n")
+        finally:
+            os.replace(history + ".orig", history)
+        return size
+    
+    return [
+        Case("load_config", bench_load_config),
+        Case("parse_todos_from_markdown", bench_parse),
+        Case("parse_todos_from_markdown (parallel)", bench_parse_parallel),
+        Case("list_open_todos", bench_list_open),
+        Case("list_open_todos (TodoStore)", bench_list_open_store),
+        Case("close picker filter", bench_picker_filter),
+        Case("save_todos_to_markdown", bench_append, fresh_copy),
+        Case("save_todos_to_markdown_with_status", bench_rewrite, copy_with_todos),
+        Case("cli list (cold)", bench_command("list"), drop_index),
+        Case("cli list (warm)", bench_command("list"), warm_index),
+        Case("cli status (warm)", bench_command("status"), warm_index),
+        Case("cli close", bench_close, backup_and_warm),
+    ]
+
+def measure(case: Case, repeat: int) -> Dict[str, Any]:
+    """
+    Time a case and record its peak memory.
+    
+    The wall time is the best of ``repeat`` runs without tracing; peak memory
+    comes from one extra run under tracemalloc, which would skew timings.
+    
+    Args:
+        case (Case): Benchmark case
+        repeat (int): Number of timed runs
+    
+    Returns:
+        Dict[str, Any]: Seconds, items processed, throughput and peak bytes
+    """
+    best = None
+    items = 0
+    for _ in range(repeat):
+        state = case.setup()
+        start = time.perf_counter()
+        items = case.body(state)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    
+    state = case.setup()
+    tracemalloc.start()
+    try:
+        case.body(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    return {
+        "seconds": best,
+        "items": items,
+        "items_per_second": items / best if best else None,
+        "peak_bytes": peak,
+    }
+
+def run_benchmarks(sizes: List[int], repeat: int = 3) -> Dict[str, Any]:
+    """
+    Run every case against generated histories of the given sizes.
+    
+    Args:
+        sizes (List[int]): Numbers of todos to generate
+        repeat (int): Number of timed runs per case
+    
+    Returns:
+        Dict[str, Any]: Environment description and per-case results
+    """
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="peter-bench-") as workdir:
+            file_size = generate_peter_md(os.path.join(workdir, "peter.md"), size)
+            generate_config(os.path.join(workdir, ".peter"))
+            for case in build_cases(workdir, size):
+                result = measure(case, repeat)
+                result.update({"name": case.name, "size": size, "file_bytes": file_size})
+                results.append(result)
+                print(f"{case.name:<40} {size:>9} todos  {result['seconds'] * 1000:10.2f} ms  "
+                      f"{result['peak_bytes'] / 1024:10.0f} KiB peak", file=sys.stderr)
+    
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """
+    Compare two benchmark reports case by case.
+    
+    Args:
+        current (Dict[str, Any]): Report of this run
+        baseline (Dict[str, Any]): Earlier report to compare against
+    
+    Returns:
+        List[str]: One line per case present in both reports
+    """
+    previous = {(r["name"], r["size"]): r for r in baseline.get("results", [])}
+    lines = []
+    for result in current["results"]:
+        old = previous.get((result["name"], result["size"]))
+        if old is None or not old["seconds"]:
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        lines.append(f"{result['name']:<40} {result['size']:>9} todos  {ratio:6.2f}x time  "
+                     f"{result['peak_bytes'] - old['peak_bytes']:+12d} B peak")
+    return lines
+
+def crossover(report: Dict[str, Any]) -> List[str]:
+    """
+    Compare the serial and parallel parse at every size.
+    
+    Args:
+        report (Dict[str, Any]): Report from ``run_benchmarks``
+    
+    Returns:
+        List[str]: One line per size with the parallel speedup, followed by
+        the smallest size at which the parallel parse wins, if any
+    """
+    serial = {r["size"]: r for r in report["results"] if r["name"] == "parse_todos_from_markdown"}
+    parallel = {r["size"]: r for r in report["results"] if r["name"] == "parse_todos_from_markdown (parallel)"}
+    lines = []
+    winner = None
+    for size in sorted(serial.keys() & parallel.keys()):
+        speedup = serial[size]["seconds"] / parallel[size]["seconds"] if parallel[size]["seconds"] else 0.0
+        lines.append(f"parallel parse ({PARALLEL_WORKERS} workers) {size:>9} todos "
+                     f"{serial[size]['file_bytes']:>12} bytes  {speedup:6.2f}x")
+        if speedup > 1 and winner is None:
+            winner = serial[size]
+    if winner is not None:
+        lines.append(f"crossover: parallel parse wins from {winner['size']} todos ({winner['file_bytes']} bytes)")
+    else:
+        lines.append("crossover: parallel parse never won at these sizes")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the peter parser, writers and commands")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="numbers of todos to generate (e.g. 1000 1000000)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args()
+    
+    report = run_benchmarks(args.sizes, args.repeat)
+    for line in crossover(report):
+        print(line, file=sys.stderr)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        for line in compare(report, baseline):
+            print(line, file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,5 @@
 # Peter - CLI Todo Manager
+import time
+
+# When the package started loading, so `peter --profile` can report import time
+IMPORT_STARTED = time.perf_counter()
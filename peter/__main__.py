@@ -1,8 +1,15 @@
 # Entry point for the peter CLI tool
 import sys
-from .cli import cli
+from .client import send_command
 
 def main():
+    # Hand the command to a running `peter serve` if there is one, before
+    # paying for the click and parser imports
+    exit_code = send_command(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+    
+    from .cli import cli
     cli()
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+# Answers files for non-interactive `peter run --answers`
+#
+# An answers file is JSON or YAML holding answers to the .peter questions,
+# either as a mapping from question to one answer or a list of answers:
+#
+#   What did you accomplish today?: [Shipped the parser, Reviewed PRs]
+#
+# or as a list of entries that may also override the priority:
+#
+#   - question: What did you accomplish today?
+#     answer: Shipped the parser
+#     priority: 1
+import json
+import os
+from typing import Any, Dict, List, Optional, TextIO
+from .models import Answer, Question
+from .trace import traced
+
+def parse_answers_text(text: str, fmt: Optional[str] = None) -> Any:
+    """
+    Decode an answers document.
+    
+    Args:
+        text (str): File contents
+        fmt (Optional[str]): "json" or "yaml"; None tries JSON, then YAML
+    
+    Returns:
+        Any: The decoded document
+    """
+    if fmt != "yaml":
+        try:
+            return json.loads(text)
+        except ValueError as e:
+            if fmt == "json":
+                raise ValueError(f"Invalid JSON answers: {e}")
+    try:
+        import yaml
+    except ImportError:
+        raise ValueError("YAML answers need PyYAML (pip install pyyaml); JSON works without it")
+    try:
+        return yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid YAML answers: {e}")
+
+def _entries(document: Any) -> List[Dict[str, Any]]:
+    """Bring both document shapes into one list of entries."""
+    if isinstance(document, dict):
+        return [{"question": question, "answer": answer} for question, answer in document.items()]
+    if isinstance(document, list):
+        for position, entry in enumerate(document, 1):
+            if not isinstance(entry, dict) or "question" not in entry or "answer" not in entry:
+                raise ValueError(f"Entry {position} needs a question and an answer")
+        return document
+    raise ValueError("Answers must be a mapping of question to answer, or a list of entries")
+
+def answers_from_document(document: Any, questions: List[Question]) -> List[Answer]:
+    """
+    Validate answers against the configured questions.
+    
+    Every question must appear in ``questions``, as returned by
+    ``load_config``; priorities default to the configured ones. Empty answers
+    and "nothing" are skipped, as in the interactive prompts.
+    
+    Args:
+        document (Any): Decoded answers document
+        questions (List[Question]): Questions from the .peter file
+    
+    Returns:
+        List[Answer]: Answers in document order
+    """
+    configured = {question.question: question.priority for question in questions}
+    answers = []
+    unknown = []
+    for entry in _entries(document):
+        question = str(entry["question"]).strip()
+        if question not in configured:
+            unknown.append(question)
+            continue
+        priority = entry.get("priority", configured[question])
+        if isinstance(priority, bool) or not isinstance(priority, int) or priority < 1:
+            raise ValueError(f"Invalid priority {priority!r} for '{question}'")
+        values = entry["answer"] if isinstance(entry["answer"], list) else [entry["answer"]]
+        for value in values:
+            if value is None:
+                continue
+            if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+                raise ValueError(f"Answer to '{question}' must be text, got {value!r}")
+            # Entries are one line each in markdown
+            answer = " ".join(str(value).split())
+            if answer and answer.lower() != "nothing":
+                answers.append(Answer(question, answer, priority))
+    if unknown:
+        raise ValueError(f"Not in .peter: {', '.join(repr(question) for question in unknown)}")
+    return answers
+
+@traced("load_answers")
+def load_answers(f: TextIO, questions: List[Question], name: str = "-") -> List[Answer]:
+    """
+    Read and validate an answers file.
+    
+    Args:
+        f (TextIO): Open answers file or stdin
+        questions (List[Question]): Questions from the .peter file
+        name (str): File name, whose extension picks the format
+    
+    Returns:
+        List[Answer]: Answers to append
+    """
+    extension = os.path.splitext(name)[1].lower()
+    fmt = {".json": "json", ".yaml": "yaml", ".yml": "yaml"}.get(extension)
+    return answers_from_document(parse_answers_text(f.read(), fmt), questions)
@@ -0,0 +1,221 @@
+# Compaction of completed history into an archive file
+import gzip
+import json
+import os
+from datetime import date as _date
+from typing import Dict, Iterator, List, Optional, Tuple
+from .locking import file_lock, atomic_replace
+from .models import Todo
+from .store import date_ordinal
+from .todo_manager import iter_todos, iter_todos_from_lines, ParserState, QUESTION_PREFIX, ANSWER_PREFIX, COMPLETED_PREFIX
+
+ARCHIVE_FILE = "peter.archive.md"
+GZIP_ARCHIVE_FILE = "peter.archive.md.gz"
+
+def archive_table_path(archive_file: str) -> str:
+    """
+    Return the path of the per-section offset table of a gzip archive.
+    
+    Args:
+        archive_file (str): Path to the gzip archive
+    
+    Returns:
+        str: Path of the JSON offset table next to it
+    """
+    return archive_file + ".idx.json"
+
+def _entry_done(lines: List[bytes]) -> bool:
+    """Check whether an entry block is completed or has no real answer."""
+    answer = "nothing"
+    completed = False
+    for raw_line in lines:
+        line = raw_line.decode('utf-8').strip()
+        if line.startswith(ANSWER_PREFIX):
+            answer = line[len(ANSWER_PREFIX):].strip()
+        elif line.startswith(COMPLETED_PREFIX):
+            completed = line[len(COMPLETED_PREFIX):].strip().lower() == "true"
+    return completed or answer.lower() == "nothing"
+
+def _iter_sections(f) -> Iterator[Tuple[Optional[str], List[bytes], List[List[bytes]]]]:
+    """
+    Split a markdown file into date sections, one section at a time.
+    
+    Yields:
+        Tuple: (date or None for the preamble, lines before the first entry,
+        entry blocks as lists of lines)
+    """
+    date = None
+    head = []
+    entries = []
+    for raw_line in f:
+        line = raw_line.decode('utf-8').strip()
+        if line.startswith("## "):
+            yield date, head, entries
+            date = line[3:].strip()
+            head = [raw_line]
+            entries = []
+        elif line.startswith(QUESTION_PREFIX):
+            entries.append([raw_line])
+        elif entries:
+            entries[-1].append(raw_line)
+        else:
+            head.append(raw_line)
+    yield date, head, entries
+
+def _with_newline(lines: List[bytes]) -> bytes:
+    data = b"".join(lines)
+    if data and not data.endswith(b"\n"):
+        data += b"\n"
+    return data
+
+class _ArchiveWriter:
+    """Append archived sections to a plain or gzip-compressed archive."""
+    
+    def __init__(self, archive_file: str, compress: bool):
+        self.archive_file = archive_file
+        self.compress = compress
+        self.table = []
+        if compress and os.path.exists(archive_table_path(archive_file)):
+            with open(archive_table_path(archive_file), 'r', encoding='utf-8') as f:
+                self.table = json.load(f)
+        new_file = not os.path.exists(archive_file)
+        self.f = open(archive_file, 'ab')
+        self.start = self.f.tell()
+        if new_file and not compress:
+            self.f.write(b"# Archived Todos\n\n")
+    
+    def write_section(self, date: str, data: bytes, todos: int):
+        if self.compress:
+            # One gzip member per section, so a reader can seek straight to it
+            member = gzip.compress(data)
+            self.table.append({"date": date, "offset": self.f.tell(), "length": len(member), "todos": todos})
+            self.f.write(member)
+        else:
+            self.f.write(data)
+    
+    def abort(self):
+        """Drop everything written by this writer."""
+        self.f.truncate(self.start)
+        self.f.close()
+    
+    def close(self):
+        """Sync the archive, and its table, to disk."""
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.f.close()
+        if self.compress:
+            with atomic_replace(archive_table_path(self.archive_file)) as f:
+                json.dump(self.table, f)
+
+def compact_history(source: str = "peter.md", archive_file: Optional[str] = None,
+                    days: Optional[int] = None, compress: bool = False,
+                    today: Optional[_date] = None) -> Dict[str, int]:
+    """
+    Move completed history out of a markdown file into an archive.
+    
+    The file is processed one date section at a time, so memory use is
+    bounded by the largest section. Sections whose entries are all completed
+    move to the archive. With ``days``, completed entries of sections older
+    than that also move, while their open entries stay behind. The compacted
+    file replaces the original atomically, under the write lock.
+    
+    Args:
+        source (str): Markdown file to compact
+        archive_file (Optional[str]): Archive to append to; defaults to
+            peter.archive.md, or peter.archive.md.gz when compressing
+        days (Optional[int]): Also archive completed entries older than this
+        compress (bool): Write gzip members with a per-section offset table
+        today (Optional[date]): Reference date for ``days``, for testing
+    
+    Returns:
+        Dict[str, int]: Numbers of archived sections and todos
+    """
+    if archive_file is None:
+        archive_file = GZIP_ARCHIVE_FILE if compress else ARCHIVE_FILE
+    cutoff = None
+    if days is not None:
+        cutoff = (today or _date.today()).toordinal() - days
+    
+    stats = {"sections": 0, "todos": 0}
+    if not os.path.exists(source):
+        return stats
+    
+    # Hold the write lock so no append lands in the file being replaced
+    with file_lock(source):
+        writer = _ArchiveWriter(archive_file, compress)
+        try:
+            with open(source, 'rb') as f, atomic_replace(source, 'wb') as hot:
+                for date, head, entries in _iter_sections(f):
+                    if date is None:
+                        hot.write(b"".join(head + [line for entry in entries for line in entry]))
+                        continue
+                    
+                    done = [_entry_done(entry) for entry in entries]
+                    if entries and all(done):
+                        archived = entries
+                        kept = None
+                    elif cutoff is not None and 0 < date_ordinal(date) < cutoff and any(done):
+                        archived = [entry for entry, is_done in zip(entries, done) if is_done]
+                        kept = [entry for entry, is_done in zip(entries, done) if not is_done]
+                    else:
+                        archived = []
+                        kept = entries
+                    
+                    if archived:
+                        data = _with_newline(head) + b"".join(_with_newline(entry) for entry in archived)
+                        writer.write_section(date, data, len(archived))
+                        stats["sections"] += 1
+                        stats["todos"] += len(archived)
+                    if kept is not None:
+                        hot.write(b"".join(head + [line for entry in kept for line in entry]))
+                
+                # The archive is on disk before the synced, smaller source is
+                # swapped in, so an interruption can duplicate entries but
+                # never lose them
+                writer.close()
+        except BaseException:
+            if not writer.f.closed:
+                writer.abort()
+            raise
+    
+    return stats
+
+def iter_archive_todos(archive_file: str, since: Optional[str] = None) -> Iterator[Todo]:
+    """
+    Stream archived todos.
+    
+    A gzip archive is read through its offset table, decompressing one
+    section at a time and skipping sections dated before ``since``.
+    
+    Args:
+        archive_file (str): Plain or gzip archive
+        since (Optional[str]): Only read sections on or after this date
+    
+    Yields:
+        Todo: Archived todos in archive order
+    """
+    if not os.path.exists(archive_file):
+        return
+    
+    if not archive_file.endswith(".gz"):
+        for todo in iter_todos(archive_file):
+            if since is None or todo.date >= since:
+                yield todo
+        return
+    
+    with open(archive_table_path(archive_file), 'r', encoding='utf-8') as f:
+        table = json.load(f)
+    # One parser state across the members, so a date archived in several
+    # sections keeps counting its occurrences
+    state = ParserState()
+    with open(archive_file, 'rb') as f:
+        for section in table:
+            if since is not None and section["date"] < since:
+                continue
+            f.seek(section["offset"])
+            data = gzip.decompress(f.read(section["length"]))
+            yield from iter_todos_from_lines(data.splitlines(keepends=True), 0, state)
+
+def archive_files() -> List[str]:
+    """Return the archives present in the working directory."""
+    return [path for path in (ARCHIVE_FILE, GZIP_ARCHIVE_FILE) if os.path.exists(path)]
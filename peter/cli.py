@@ -1,32 +1,76 @@
 # Main CLI interface using prompt-toolkit
+# prompt_toolkit is only imported by the interactive code paths, so read-only
+# commands such as `peter list` start without loading it.
+import builtins
+import heapq
+import itertools
 import os
 import sys
 from datetime import datetime
 import click
-from prompt_toolkit import prompt
-from prompt_toolkit.formatted_text import HTML
-from prompt_toolkit.styles import Style
-from prompt_toolkit.shortcuts import radiolist_dialog, checkboxlist_dialog
-from prompt_toolkit.widgets import Dialog, Button, Box, CheckboxList
-from prompt_toolkit.layout import Layout, HSplit, VSplit, FormattedTextControl
-from prompt_toolkit.key_binding import KeyBindings
-from prompt_toolkit.application import Application
-from prompt_toolkit.formatted_text import FormattedText
 from .config import load_config, create_default_config
-from .todo_manager import process_todos, parse_todos_from_markdown, list_open_todos, mark_todo_completed, save_todos_to_markdown_with_status
-from .models import Question, Todo
+from .todo_manager import (process_todos, save_todos_to_markdown, list_open_todos, iter_open_todos, index_todos,
+                           close_todos_in_place, top_todos, TOP_ORDERS, iter_todos, DEDUP_MODES)
+from .index import load_todos
+from .locking import file_lock
+from . import trace
+from .models import Question, Answer, Todo
+
+# Same as export.EXPORT_FORMATS, spelled out so defining the option does not load the exporters
+EXPORT_CHOICES = ("jsonl", "csv", "sqlite")
+
+def _history_files(open_only=False):
+    """
+    Return the markdown files holding the todo history.
+    
+    Args:
+        open_only (bool): With the sharded layout, skip shards without open todos
+        
+    Returns:
+        List[str]: The active shards, or just peter.md
+    """
+    from .shards import is_sharded, active_shard_paths
+    
+    if is_sharded():
+        return active_shard_paths(open_only=open_only)
+    return ["peter.md"]
+
+def _file_for_date(date):
+    """Return the file new todos for a date are appended to: its month's shard when sharded."""
+    from .shards import is_sharded, shard_path_for
+    
+    return shard_path_for(date) if is_sharded() else "peter.md"
 
 @click.group()
-def cli():
+@click.option("--profile", is_flag=True, help=f"Time each phase (import, config, parse, filter, render, write) and print a summary to stderr. Also enabled by {trace.TRACE_ENV}=MODE[:FILE].")
+@click.option("--profile-format", type=click.Choice(builtins.list(trace.MODES)), default=None, help="Report as a summary table, JSON, a Chrome trace, or a cProfile dump. Implies --profile.")
+@click.option("--profile-output", default=None, metavar="FILE", help="File for the JSON, Chrome trace or cProfile report. Implies --profile.")
+@click.pass_context
+def cli(ctx, profile, profile_format, profile_output):
     """Peter - CLI Todo Manager"""
-    pass
+    if profile or profile_format or profile_output:
+        spec = (profile_format or "summary") + (f":{profile_output}" if profile_output else "")
+    else:
+        spec = os.environ.get(trace.TRACE_ENV, "")
+    try:
+        tracer = trace.start(spec)
+    except ValueError as e:
+        raise click.UsageError(f"{trace.TRACE_ENV}: {e}")
+    if tracer is not None:
+        # Resources close before callbacks run, so the command span ends first
+        ctx.call_on_close(trace.finish)
+        ctx.with_resource(trace.span(f"command:{ctx.invoked_subcommand}"))
 
 @cli.command()
-def run():
+@click.option("--answers", "answers_file", default=None, metavar="FILE", help="Read answers from a JSON or YAML file (- for stdin) instead of prompting.")
+@click.option("--dedup", type=click.Choice(DEDUP_MODES), default=None, envvar="PETER_DEDUP", help="Warn about answers that are already open (flag), or fold them into the open TODO (fold). Also set by PETER_DEDUP.")
+def run(answers_file, dedup):
     """Run the todo manager (default behavior)"""
     try:
         # Check if .peter config exists, create default if not
         config_file = ".peter"
+        if answers_file is not None and not os.path.exists(config_file):
+            raise ValueError("No .peter config found to validate the answers against.")
         if not os.path.exists(config_file):
             print("No .peter config found. Creating default configuration...")
             create_default_config(config_file)
@@ -38,8 +82,21 @@ def run():
         if not questions:
             raise ValueError("No questions found in .peter file. Please add questions and try again.")
         
-        # Process todos
-        process_todos(questions)
+        # Process todos, appending to the current month's shard when sharded
+        today = datetime.now().strftime("%Y-%m-%d")
+        output_file = _file_for_date(today)
+        if answers_file is not None:
+            # Batch mode: validate everything first, then append in one write
+            from .answers import load_answers
+            with click.open_file(answers_file, 'r', encoding='utf-8') as f:
+                answers = load_answers(f, questions, answers_file)
+            if not answers:
+                print("📝 No answers to save.")
+                return 0
+            save_todos_to_markdown(answers, today, output_file, dedup=dedup,
+                                   history_files=_history_files(open_only=True) if dedup else None)
+            return 0
+        process_todos(questions, output_file, _history_files(), dedup=dedup)
         
         return 0
         
@@ -50,27 +107,166 @@ def run():
         print(f"Error: {e}")
         raise
 
+def _configured_questions():
+    """Return the questions of .peter, as kept loaded by `peter serve` when running in it."""
+    obj = click.get_current_context().obj
+    if obj is not None and "config" in obj:
+        return obj["config"]
+    return load_config(".peter") if os.path.exists(".peter") else []
+
+@cli.command()
+@click.argument("question")
+@click.argument("answer")
+@click.option("--priority", type=int, default=None, help="Priority of the TODO (defaults to the question's priority in .peter, else 3).")
+@click.option("--dedup", type=click.Choice(DEDUP_MODES), default=None, envvar="PETER_DEDUP", help="Warn about answers that are already open (flag), or fold them into the open TODO (fold). Also set by PETER_DEDUP.")
+def add(question, answer, priority, dedup):
+    """Add a single answered TODO for today"""
+    try:
+        if priority is None:
+            priority = 3
+            for configured in _configured_questions():
+                if configured.question == question:
+                    priority = configured.priority
+                    break
+        
+        today = datetime.now().strftime("%Y-%m-%d")
+        output_file = _file_for_date(today)
+        save_todos_to_markdown([Answer(question, answer, priority)], today, output_file, dedup=dedup,
+                               history_files=_history_files(open_only=True) if dedup else None)
+        return 0
+        
+    except Exception as e:
+        print(f"Error: {e}")
+        raise
+
+def _iter_open_history():
+    """Stream the open todos of every history file without materializing them."""
+    stores = (load_todos(path) for path in _history_files(open_only=True))
+    return itertools.chain.from_iterable(iter_open_todos(store) for store in stores)
+
+def _recursive_entries(root, open_only):
+    """
+    Merge the histories of every project under root, best first.
+    
+    Args:
+        root (str): Directory to search for peter.md files
+        open_only (bool): Only open todos
+        
+    Returns:
+        Iterator[Tuple[str, TodoRow]]: (project path, todo) pairs
+    """
+    # Only needed here, keep the process pool out of the other commands
+    from .projects import load_histories, iter_ranked
+    
+    return iter_ranked(load_histories(root), open_only)
+
+RECURSIVE_HELP = "Aggregate every peter.md under ROOT (default: current directory), ordered by priority."
+
+def _filter_options(fn):
+    """Add the --since/--until/--priority filters shared by `list` and `status`."""
+    fn = click.option("--priority", type=int, default=None, help="Only todos with this priority.")(fn)
+    fn = click.option("--until", default=None, help="Only todos dated on or before this date (YYYY-MM-DD).")(fn)
+    fn = click.option("--since", default=None, help="Only todos dated on or after this date (YYYY-MM-DD).")(fn)
+    return fn
+
+def _query_history(since, until, priority, open_only):
+    """
+    Stream the todos of every history file that pass the filters.
+    
+    The filters are pushed down to the per-section summaries, so sections
+    that cannot match are never read.
+    
+    Returns:
+        Iterator[Todo]: Matching todos in file order
+    """
+    from .sections import query_todos
+    
+    files = _history_files(open_only=open_only)
+    return itertools.chain.from_iterable(query_todos(path, since, until, priority, open_only) for path in files)
+
 @cli.command()
-def list():
+@click.option("--limit", type=int, default=None, help="Only show the N most important open TODOs (as `peter next -n N`).")
+@click.option("--recursive", "root", is_flag=False, flag_value=".", default=None, metavar="[ROOT]", help=RECURSIVE_HELP)
+@_filter_options
+def list(limit, root, since, until, priority):
     """List all open TODOs"""
     try:
-        todos = parse_todos_from_markdown("peter.md")
-        open_todos = list_open_todos(todos)
+        from .sections import date_bounds, todo_matches
+        
+        try:
+            low, high = date_bounds(since, until)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+        filtered = since is not None or until is not None or priority is not None
+        
+        count = 0
+        if root is not None:
+            entries = _recursive_entries(root, open_only=True)
+            if filtered:
+                entries = ((project, todo) for project, todo in entries if todo_matches(todo, low, high, priority))
+            if limit is not None:
+                entries = itertools.islice(entries, max(limit, 0))
+        else:
+            if filtered:
+                todos = _query_history(since, until, priority, open_only=True)
+                if limit is not None:
+                    todos = top_todos(todos, limit)
+            elif limit is not None:
+                todos = top_todos(_iter_open_history(), limit)
+            else:
+                stores = (load_todos(path) for path in _history_files(open_only=True))
+                todos = itertools.chain.from_iterable(list_open_todos(store) for store in stores)
+            entries = ((None, todo) for todo in todos)
+        for project, todo in entries:
+            count += 1
+            if count == 1:
+                print("\n📋 Open TODOs:")
+                print("=" * 50)
+            print(f"{count}. {todo.question}")
+            if project is not None:
+                print(f"   Project: {project}")
+            print(f"   Answer: {todo.answer}")
+            print(f"   Priority: {todo.priority}")
+            print(f"   Date: {todo.date}")
+            if todo.last_seen:
+                print(f"   Seen: {todo.first_seen or todo.date} to {todo.last_seen}")
+            print(f"   ID: {todo.id}")
+            print()
         
-        # Filter out todos with empty answers ("nothing")
-        filtered_todos = [todo for todo in open_todos if todo.answer.lower() != "nothing"]
+        if not count:
+            print("✅ No open TODOs found.")
+        return 0
         
-        if not filtered_todos:
+    except click.ClickException:
+        raise
+    except Exception as e:
+        print(f"Error: {e}")
+        raise
+
+@cli.command()
+@click.option("-n", "count", type=int, default=5, show_default=True, help="Number of TODOs to show.")
+@click.option("--order", type=click.Choice(TOP_ORDERS), default="priority", show_default=True,
+              help="Rank by priority, by age, or by a score of priority and days open.")
+@click.option("--age-weight", type=float, default=0.1, show_default=True,
+              help="Priority levels a TODO gains per day open, for --order score.")
+def next(count, order, age_weight):
+    """Show the next few open TODOs to work on"""
+    try:
+        todos = top_todos(_iter_open_history(), count, order, age_weight)
+        if not todos:
             print("✅ No open TODOs found.")
             return 0
         
-        print("\n📋 Open TODOs:")
+        print(f"\n🎯 Next {len(todos)} TODO(s):")
         print("=" * 50)
-        for i, todo in enumerate(filtered_todos, 1):
+        for i, todo in enumerate(todos, 1):
             print(f"{i}. {todo.question}")
             print(f"   Answer: {todo.answer}")
             print(f"   Priority: {todo.priority}")
             print(f"   Date: {todo.date}")
+            if todo.last_seen:
+                print(f"   Seen: {todo.first_seen or todo.date} to {todo.last_seen}")
+            print(f"   ID: {todo.id}")
             print()
         return 0
         
@@ -79,48 +275,160 @@ def list():
         raise
 
 @cli.command()
-def status():
+@click.option("--all", "include_archive", is_flag=True, help="Include todos moved to the archive by `peter compact`.")
+@click.option("--recursive", "root", is_flag=False, flag_value=".", default=None, metavar="[ROOT]", help=RECURSIVE_HELP)
+@_filter_options
+@click.option("--open", "open_only", is_flag=True, help="Only open todos.")
+def status(include_archive, root, since, until, priority, open_only):
     """Show status of all TODOs"""
     try:
-        todos = parse_todos_from_markdown("peter.md")
+        from .sections import date_bounds, todo_matches
         
-        # Filter out todos with empty answers ("nothing") from display
-        filtered_todos = [todo for todo in todos if todo.answer.lower() != "nothing"]
+        if root is not None and include_archive:
+            raise click.UsageError("--all cannot be combined with --recursive")
+        try:
+            low, high = date_bounds(since, until)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+        filtered = since is not None or until is not None or priority is not None or open_only
         
-        if not filtered_todos:
-            print("📝 No TODOs found.")
-            return 0
-        
-        print("\n📊 All TODOs:")
-        print("=" * 50)
-        for i, todo in enumerate(filtered_todos, 1):
+        count = 0
+        if root is not None:
+            entries = _recursive_entries(root, open_only=open_only)
+            if filtered:
+                entries = ((project, todo) for project, todo in entries if todo_matches(todo, low, high, priority))
+        else:
+            if filtered:
+                todos = _query_history(since, until, priority, open_only)
+            else:
+                todos = itertools.chain.from_iterable(load_todos(path) for path in _history_files())
+            if include_archive:
+                from .archive import iter_archive_todos, archive_files
+                archived = itertools.chain.from_iterable(iter_archive_todos(path) for path in archive_files())
+                if filtered:
+                    archived = (todo for todo in archived if todo_matches(todo, low, high, priority, open_only))
+                todos = itertools.chain(archived, todos)
+            entries = ((None, todo) for todo in todos)
+        for project, todo in entries:
+            # Filter out todos with empty answers ("nothing") from display
+            if todo.answer.lower() == "nothing":
+                continue
+            count += 1
+            if count == 1:
+                print("\n📊 All TODOs:")
+                print("=" * 50)
             status = "✅ Completed" if todo.completed else "⏳ Open"
-            print(f"{i}. [{status}] {todo.question}")
+            print(f"{count}. [{status}] {todo.question}")
+            if project is not None:
+                print(f"   Project: {project}")
             print(f"   Answer: {todo.answer}")
             print(f"   Priority: {todo.priority}")
             print(f"   Date: {todo.date}")
+            if todo.last_seen:
+                print(f"   Seen: {todo.first_seen or todo.date} to {todo.last_seen}")
+            print(f"   ID: {todo.id}")
             print()
+        
+        if not count:
+            print("📝 No TODOs found.")
         return 0
         
+    except click.ClickException:
+        raise
     except Exception as e:
         print(f"Error: {e}")
         raise
 
+def _select_todos_by_id(todos, ids):
+    """
+    Resolve TODO IDs given on the command line.
+    
+    Args:
+        todos (List[Todo]): All todos in peter.md
+        ids (Tuple[str]): IDs as shown by `peter list`
+        
+    Returns:
+        List[Todo]: Open todos to close, in the order given
+    """
+    index = index_todos(todos)
+    selected_todos = []
+    seen = set()
+    for todo_id in ids:
+        if todo_id not in index:
+            raise click.ClickException(f"Unknown TODO ID: {todo_id}")
+        todo = index[todo_id]
+        if todo is None:
+            raise click.ClickException(f"Ambiguous TODO ID: {todo_id}. Use `peter close` without IDs to pick it from the menu.")
+        if todo.completed:
+            print(f"ℹ️  {todo_id} is already completed: {todo.question}")
+            continue
+        if todo_id not in seen:
+            seen.add(todo_id)
+            selected_todos.append(todo)
+    return selected_todos
+
+def _close_selected(selected_todos, sources):
+    """
+    Mark the selected todos as completed and report them.
+    
+    Args:
+        selected_todos (List[TodoRow]): Rows to close
+        sources (List[Tuple[str, TodoStore]]): File each store was loaded from
+    """
+    for path, store in sources:
+        todos = [todo for todo in selected_todos if todo.store is store]
+        if todos:
+            # Look the todos up again under the write lock, in case another
+            # peter moved them since they were listed
+            with file_lock(path):
+                current = index_todos(load_todos(path))
+                close_todos_in_place([current.get(todo.id) or todo for todo in todos], path)
+    print(f"✅ {len(selected_todos)} TODO(s) marked as completed:")
+    for todo in selected_todos:
+        print(f"   - {todo.question}")
+
 @cli.command()
-def close():
-    """Close a TODO item"""
+@click.argument("ids", nargs=-1)
+@click.option("--limit", type=int, default=None, help="Only offer the N most important open TODOs in the menu.")
+def close(ids, limit):
+    """Close TODO items, interactively or by ID"""
     try:
-        todos = parse_todos_from_markdown("peter.md")
-        open_todos = list_open_todos(todos)
+        sources = [(path, load_todos(path)) for path in _history_files(open_only=not ids)]
+        
+        # Non-interactive: close the given IDs without the numbered menu
+        if ids:
+            todos = itertools.chain.from_iterable(store for _, store in sources)
+            selected_todos = _select_todos_by_id(todos, ids)
+            if selected_todos:
+                _close_selected(selected_todos, sources)
+            return 0
+        
+        # Sort todos by priority (1 highest) and then by date (older first),
+        # merging the already sorted rows of each file, or keep just the best
+        # few when a limit is given
+        if limit is not None:
+            open_todos = top_todos(itertools.chain.from_iterable(iter_open_todos(store) for _, store in sources), limit)
+        else:
+            open_todos = builtins.list(heapq.merge(
+                *[[store[row] for row in store.sorted_rows(store.open_rows())] for _, store in sources],
+                key=lambda x: (x.priority, x.date)))
         
         if not open_todos:
             print("✅ No open TODOs to close.")
             return 0
         
-        # Sort todos by priority (1 highest) and then by date (older first)
-        open_todos.sort(key=lambda x: (x.priority, x.date))
+        # On a terminal, pick from a full-screen list that only draws the rows in view
+        if sys.stdin.isatty() and sys.stdout.isatty():
+            from .picker import pick_todos
+            
+            selected_todos = pick_todos(open_todos)
+            if not selected_todos:
+                print("No selection made. Operation cancelled.")
+                return 0
+            _close_selected(selected_todos, sources)
+            return 0
         
-        # Create a simple text-based menu for selecting TODOs
+        # Otherwise fall back to a simple text-based menu for selecting TODOs
         print("\n📋 Select TODOs to Close:")
         print("=" * 50)
         
@@ -129,6 +437,7 @@ def close():
             print(f"{i}. {todo.question}")
             print(f"   Priority: {todo.priority}")
             print(f"   Date: {todo.date}")
+            print(f"   ID: {todo.id}")
             print()
         
         print("Instructions:")
@@ -198,20 +507,240 @@ def close():
                 return 0
         
         # Mark all selected todos as completed
-        for selected_todo in selected_todos:
-            # Find index in full todos list
-            full_index = todos.index(selected_todo)
-            mark_todo_completed(todos, full_index)
-        save_todos_to_markdown_with_status(todos, "peter.md")
-        print(f"✅ {len(selected_todos)} TODO(s) marked as completed:")
-        for todo in selected_todos:
-            print(f"   - {todo.question}")
+        _close_selected(selected_todos, sources)
         
         return 0
         
     except KeyboardInterrupt:
         print("\n\nOperation cancelled by user.")
         raise
+    except click.ClickException:
+        raise
+    except Exception as e:
+        print(f"Error: {e}")
+        raise
+
+@cli.command()
+@click.argument("terms", nargs=-1)
+@click.option("--priority", type=int, default=None, help="Only todos with this priority.")
+@click.option("--since", default=None, help="Only todos dated on or after this date (YYYY-MM-DD).")
+@click.option("--until", default=None, help="Only todos dated on or before this date (YYYY-MM-DD).")
+@click.option("--open", "state", flag_value="open", default=None, help="Only open todos.")
+@click.option("--closed", "state", flag_value="closed", help="Only completed todos.")
+def search(terms, priority, since, until, state):
+    """Search TODOs by words in their question or answer"""
+    try:
+        from .search import search_todos
+        
+        count = 0
+        for path in _history_files():
+            for todo in search_todos(path, terms, priority, since, until, state):
+                count += 1
+                if count == 1:
+                    print("\n🔎 Matching TODOs:")
+                    print("=" * 50)
+                status = "✅ Completed" if todo.completed else "⏳ Open"
+                print(f"{count}. [{status}] {todo.question}")
+                print(f"   Answer: {todo.answer}")
+                print(f"   Priority: {todo.priority}")
+                print(f"   Date: {todo.date}")
+                print(f"   ID: {todo.id}")
+                print()
+        
+        if not count:
+            print("🔎 No matching TODOs found.")
+        return 0
+        
+    except Exception as e:
+        print(f"Error: {e}")
+        raise
+
+@cli.command()
+@click.option("--since", default=None, help="Only todos dated on or after this date (YYYY-MM-DD).")
+@click.option("--until", default=None, help="Only todos dated on or before this date (YYYY-MM-DD).")
+@click.option("--by", "period", type=click.Choice(["day", "week"]), default="week", show_default=True, help="Period of the todos-per-period table.")
+@click.option("--top", type=int, default=5, show_default=True, help="Number of most frequent questions to show.")
+@click.option("--all", "include_archive", is_flag=True, help="Include todos moved to the archive by `peter compact`.")
+def stats(since, until, period, top, include_archive):
+    """Show completion rates, open todo ages and the most frequent questions"""
+    try:
+        from .stats import compute_stats
+        from .store import TodoStore
+        
+        stores = [load_todos(path) for path in _history_files()]
+        if include_archive:
+            from .archive import iter_archive_todos, archive_files
+            stores.extend(TodoStore.from_todos(iter_archive_todos(path)) for path in archive_files())
+        result = compute_stats(stores, since, until, top)
+        
+        if not result["total"]:
+            print("📝 No TODOs found.")
+            return 0
+        print("\n📈 TODO statistics:")
+        print("=" * 50)
+        print(f"Completed: {result['completed']}/{result['total']} ({result['completed'] / result['total']:.0%})")
+        print("\nBy priority:")
+        for priority, total, completed in result["by_priority"]:
+            print(f"   Priority {priority}: {completed}/{total} completed ({completed / total:.0%})")
+        print("\nOpen TODO age:")
+        for label, count in result["open_ages"]:
+            print(f"   {label}: {count}")
+        if result["oldest_open_days"] is not None:
+            print(f"   Oldest open: {result['oldest_open_days']} day(s)")
+        print(f"\nTODOs per {period}:")
+        for start, count in result["per_day" if period == "day" else "per_week"]:
+            print(f"   {'week of ' if period == 'week' else ''}{start}: {count}")
+        print("\nMost frequent questions:")
+        for question, count in result["top_questions"]:
+            print(f"   {count}x {question}")
+        return 0
+        
+    except Exception as e:
+        print(f"Error: {e}")
+        raise
+
+@cli.command()
+@click.option("--fold", is_flag=True, help="Keep the oldest of each group, noting when it was first and last seen, and drop the rest.")
+def dedup(fold):
+    """Find open TODOs that repeat an earlier open TODO"""
+    try:
+        from .dedup import find_duplicates, fold_duplicates
+        
+        paths = _history_files(open_only=True)
+        groups = find_duplicates([(path, load_todos(path)) for path in paths])
+        if not groups:
+            print("✅ No duplicate open TODOs found.")
+            return 0
+        
+        print("🔁 Duplicate open TODOs:")
+        print("=" * 50)
+        for i, group in enumerate(groups, 1):
+            _, todo = group.kept
+            print(f"{i}. {todo.question}")
+            print(f"   Answer: {todo.answer}")
+            print(f"   Open {len(group.entries)} times, first seen {group.first_seen}, last seen {group.last_seen}")
+            print(f"   IDs: {', '.join(todo.id for _, todo in group.entries)}")
+            print()
+        
+        if not fold:
+            print("Run `peter dedup --fold` to keep the oldest of each and drop the rest.")
+            return 0
+        # The duplicates are found again under the write locks before anything is dropped
+        groups = fold_duplicates(paths)
+        dropped = sum(len(group.entries) - 1 for group in groups)
+        print(f"✅ Folded {dropped} duplicate(s) into {len(groups)} TODO(s)")
+        return 0
+        
+    except Exception as e:
+        print(f"Error: {e}")
+        raise
+
+@cli.command()
+@click.option("--days", type=int, default=None, help="Also archive completed todos older than this many days.")
+@click.option("--gzip", "compress", is_flag=True, help="Write a gzip archive with a per-section offset table.")
+def compact(days, compress):
+    """Move completed history into an archive file"""
+    try:
+        from .archive import ARCHIVE_FILE, GZIP_ARCHIVE_FILE, compact_history
+        
+        archive_file = GZIP_ARCHIVE_FILE if compress else ARCHIVE_FILE
+        total = {"sections": 0, "todos": 0}
+        for path in _history_files():
+            stats = compact_history(path, archive_file, days, compress)
+            total["sections"] += stats["sections"]
+            total["todos"] += stats["todos"]
+        
+        if not total["todos"]:
+            print("✅ Nothing to compact.")
+        else:
+            print(f"📦 Archived {total['todos']} TODO(s) from {total['sections']} section(s) to {archive_file}")
+        return 0
+        
+    except Exception as e:
+        print(f"Error: {e}")
+        raise
+
+@cli.command()
+@click.option("--format", "fmt", type=click.Choice(EXPORT_CHOICES), default="jsonl", show_default=True, help="Output format.")
+@click.option("--output", "-o", default="-", help="File to write, - for stdout (jsonl and csv only).")
+@click.option("--all", "include_archive", is_flag=True, help="Include todos moved to the archive by `peter compact`.")
+def export(fmt, output, include_archive):
+    """Export TODOs as JSON lines, CSV or SQLite"""
+    try:
+        from .export import export_todos
+        
+        def history():
+            if include_archive:
+                from .archive import iter_archive_todos, archive_files
+                for path in archive_files():
+                    yield from iter_archive_todos(path)
+            for path in _history_files():
+                with file_lock(path, exclusive=False):
+                    yield from iter_todos(path)
+        
+        count = export_todos(history(), fmt, output)
+        if output != "-":
+            print(f"📤 Exported {count} TODO(s) to {output}")
+        return 0
+        
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        raise
+
+@cli.command("import")
+@click.argument("source", default="-")
+def import_(source):
+    """Append TODOs from a JSON lines file (- for stdin)"""
+    try:
+        from .export import import_todos, iter_jsonl
+        from .shards import is_sharded, shard_path_for
+        
+        path_for_date = shard_path_for if is_sharded() else None
+        with click.open_file(source, 'r', encoding='utf-8') as f:
+            stats = import_todos(iter_jsonl(f), "peter.md", path_for_date)
+        
+        if not stats["todos"]:
+            print("📝 No TODOs to import.")
+        else:
+            print(f"📥 Imported {stats['todos']} TODO(s) in {stats['sections']} date section(s)")
+        return 0
+        
+    except Exception as e:
+        print(f"Error: {e}")
+        raise
+
+@cli.command()
+@click.option("--poll-interval", type=float, default=1.0, show_default=True, help="Seconds between checks of peter.md and .peter for changes.")
+def serve(poll_interval):
+    """Keep todos in memory and answer list/status/close/add/stats over a socket"""
+    try:
+        from .daemon import run_daemon
+        
+        run_daemon(".", poll_interval)
+        return 0
+        
+    except Exception as e:
+        print(f"Error: {e}")
+        raise
+
+@cli.command()
+def migrate():
+    """Split peter.md into monthly shards"""
+    try:
+        from .shards import SHARD_DIR, is_sharded, migrate_to_shards
+        
+        if is_sharded():
+            print(f"ℹ️  History is already sharded in {SHARD_DIR}/")
+            return 0
+        if not os.path.exists("peter.md"):
+            raise ValueError("No peter.md found to migrate.")
+        
+        manifest = migrate_to_shards("peter.md", SHARD_DIR)
+        for name, record in sorted(manifest["shards"].items()):
+            print(f"   {name}: {record['open']} open, {record['closed']} closed")
+        print("✅ peter.md was kept as peter.md.migrated")
+        return 0
+        
     except Exception as e:
         print(f"Error: {e}")
         raise
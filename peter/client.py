@@ -0,0 +1,118 @@
+# Thin client for a running `peter serve` daemon
+# Only the standard library is imported here, so forwarding a command costs
+# little more than interpreter startup; click and the parser are never loaded.
+import json
+import os
+import socket
+import sys
+from typing import List, Optional
+
+SOCKET_FILE = ".peter.sock"
+
+# Commands the daemon can answer without a terminal
+DAEMON_COMMANDS = ("list", "next", "status", "close", "add", "stats")
+
+# Options of `peter close` that take a value, which is not a todo ID
+CLOSE_VALUE_OPTIONS = ("--limit",)
+
+# How long to wait for the daemon to answer a forwarded command
+REPLY_TIMEOUT = 30.0
+
+def socket_path(directory: str = ".") -> str:
+    """
+    Return the daemon socket path for a working directory.
+    
+    Args:
+        directory (str): Directory holding peter.md and .peter
+    
+    Returns:
+        str: Path of the ``.peter.sock`` Unix socket
+    """
+    return os.path.join(directory, SOCKET_FILE)
+
+def can_forward(argv: List[str]) -> bool:
+    """
+    Check whether a command line can be answered by the daemon.
+    
+    ``peter close`` without IDs prompts on the terminal, so only its
+    non-interactive form is forwarded.
+    
+    Args:
+        argv (List[str]): Arguments after the program name
+    
+    Returns:
+        bool: True if the daemon can run this command
+    """
+    if not argv or argv[0] not in DAEMON_COMMANDS:
+        return False
+    if argv[0] == "close":
+        return "--help" not in argv and bool(_close_ids(argv[1:]))
+    return True
+
+def _close_ids(args: List[str]) -> List[str]:
+    """Return the todo IDs among the arguments of `peter close`, skipping option values."""
+    ids = []
+    args = iter(args)
+    for arg in args:
+        if arg in CLOSE_VALUE_OPTIONS:
+            next(args, None)
+        elif not arg.startswith("-"):
+            ids.append(arg)
+    return ids
+
+def send_command(argv: List[str], directory: str = ".") -> Optional[int]:
+    """
+    Run a command through the daemon if one is listening.
+    
+    The command's output is written to stdout and its errors to stderr.
+    Set ``PETER_NO_DAEMON=1`` to always run in-process. Commands traced
+    with ``PETER_TRACE`` also run in-process, so they can be measured, as
+    do commands under ``PETER_DEDUP``, which the daemon would not see.
+    
+    Args:
+        argv (List[str]): Arguments after the program name
+        directory (str): Directory holding peter.md and .peter
+    
+    Returns:
+        Optional[int]: Exit code of the command, or None if no daemon could
+        take it and the caller should run it itself
+    """
+    # A traced command must run in this process to be measured, and the
+    # daemon's environment does not carry this one's PETER_DEDUP
+    if (os.environ.get("PETER_NO_DAEMON") or os.environ.get("PETER_TRACE") or os.environ.get("PETER_DEDUP")
+            or not can_forward(argv)):
+        return None
+    path = socket_path(directory)
+    if not os.path.exists(path):
+        return None
+    
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(path)
+        except OSError:
+            # A socket left behind by a daemon that is no longer running
+            return None
+        
+        # Once the request is sent the daemon may have acted on it, so errors
+        # from here on are reported instead of silently running the command twice
+        sock.settimeout(REPLY_TIMEOUT)
+        request = json.dumps({"argv": argv}) + "\n"
+        sock.sendall(request.encode('utf-8'))
+        with sock.makefile('rb') as reply_file:
+            reply = reply_file.readline()
+    except OSError as e:
+        print(f"Error: lost connection to peter serve: {e}")
+        return 1
+    finally:
+        sock.close()
+    
+    if not reply:
+        print("Error: peter serve closed the connection without answering")
+        return 1
+    response = json.loads(reply)
+    sys.stdout.write(response["output"])
+    sys.stdout.flush()
+    sys.stderr.write(response.get("errors", ""))
+    sys.stderr.flush()
+    return response["exit_code"]
@@ -0,0 +1,258 @@
+# Answer history and autocompletion for the interactive prompts
+#
+# Past answers are read from the history on a worker thread, so the first
+# prompt appears at once; completions and up-arrow history become available
+# as soon as the index is built. Only imported by `peter run`.
+import heapq
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List
+from prompt_toolkit.completion import Completer, Completion
+from prompt_toolkit.history import History, ThreadedHistory
+
+# Characters of each word stored in the trie; longer prefixes are checked
+# against the answers found for their first MAX_KEY_LENGTH characters
+MAX_KEY_LENGTH = 8
+
+# Distinct answers indexed per question, most recent first
+MAX_ANSWERS_PER_QUESTION = 1000
+
+# Completions offered at most
+MAX_COMPLETIONS = 20
+
+class AnswerTrie:
+    """
+    Prefix trie over the answers given to one question.
+    
+    Every word of an answer starts a key, so typing "parser" finds "Ship
+    the parser". Answers are ranked by how often they were given and then
+    by how recently.
+    """
+    
+    __slots__ = ("root", "answers", "stats")
+    
+    def __init__(self):
+        # Node: [children by character, ids of answers with a key through this node]
+        self.root = [{}, set()]
+        self.answers = []
+        # Answer -> [id, times given, most recent position]
+        self.stats = {}
+    
+    def add(self, answer: str, position: int, count: int = 1):
+        """
+        Record a past answer.
+        
+        Args:
+            answer (str): Answer text
+            position (int): Increasing position in the history, newer is larger
+            count (int): Times the answer was given
+        """
+        entry = self.stats.get(answer)
+        if entry is not None:
+            entry[1] += count
+            entry[2] = max(entry[2], position)
+            return
+        answer_id = len(self.answers)
+        self.answers.append(answer)
+        self.stats[answer] = [answer_id, count, position]
+        
+        lowered = answer.lower()
+        starts = [0] + [i + 1 for i, char in enumerate(lowered) if char.isspace() and i + 1 < len(lowered)]
+        for start in starts:
+            node = self.root
+            for char in lowered[start:start + MAX_KEY_LENGTH]:
+                child = node[0].get(char)
+                if child is None:
+                    child = node[0][char] = [{}, set()]
+                child[1].add(answer_id)
+                node = child
+    
+    def _rank(self, answers: Iterable[str], limit: int) -> List[str]:
+        stats = self.stats
+        return heapq.nsmallest(limit, answers, key=lambda answer: (-stats[answer][1], -stats[answer][2]))
+    
+    def complete(self, text: str, limit: int = MAX_COMPLETIONS) -> List[str]:
+        """
+        Find past answers matching typed text.
+        
+        Word prefixes are looked up in the trie; when nothing matches, the
+        answers containing the typed characters in order are offered instead.
+        
+        Args:
+            text (str): Text typed so far
+            limit (int): Most answers to return
+        
+        Returns:
+            List[str]: Matching answers, best first
+        """
+        lowered = text.lower().strip()
+        if not lowered:
+            return self._rank(self.answers, limit)
+        
+        node = self.root
+        for char in lowered[:MAX_KEY_LENGTH]:
+            node = node[0].get(char)
+            if node is None:
+                break
+        if node is not None:
+            matches = (self.answers[answer_id] for answer_id in node[1])
+            if len(lowered) > MAX_KEY_LENGTH:
+                matches = (answer for answer in matches if _at_word_start(lowered, answer.lower()))
+            return self._rank(matches, limit)
+        return self._rank((answer for answer in self.answers if _is_subsequence(lowered, answer.lower())), limit)
+
+def _at_word_start(needle: str, haystack: str) -> bool:
+    start = haystack.find(needle)
+    while start >= 0:
+        if start == 0 or haystack[start - 1].isspace():
+            return True
+        start = haystack.find(needle, start + 1)
+    return False
+
+def _is_subsequence(needle: str, haystack: str) -> bool:
+    remaining = iter(haystack)
+    return all(char in remaining for char in needle if not char.isspace())
+
+class AnswerIndex:
+    """
+    Past answers per question, built on a worker thread.
+    
+    Args:
+        file_paths (List[str]): Markdown history files, oldest first
+    """
+    
+    def __init__(self, file_paths: List[str]):
+        self.file_paths = file_paths
+        self.tries = {}
+        # Distinct answers, most recent first, for the prompt history
+        self.recent = []
+        self.ready = threading.Event()
+        self._thread = threading.Thread(target=self._build, name="peter-answer-index", daemon=True)
+        self._thread.start()
+    
+    def _build(self):
+        from .index import load_todos
+        try:
+            stores = [load_todos(path) for path in self.file_paths]
+            offsets = [0]
+            for store in stores[:-1]:
+                offsets.append(offsets[-1] + len(store))
+            
+            # Walk the interned code columns newest first, keeping the most
+            # recent distinct answers per question without building rows
+            chosen = {}
+            counts = {}
+            for store, offset in zip(reversed(stores), reversed(offsets)):
+                question_codes = store.question_codes
+                answer_codes = store.answer_codes
+                empty = store.empty_answers
+                questions = store._questions.values
+                answers = store._answers.values
+                full = 0
+                picked = {}
+                for row in range(len(store) - 1, -1, -1):
+                    answer_code = answer_codes[row]
+                    if answer_code in empty:
+                        continue
+                    question = questions[question_codes[row]]
+                    newest = chosen.get(question)
+                    if newest is None:
+                        newest = chosen[question] = {}
+                    if len(newest) >= MAX_ANSWERS_PER_QUESTION:
+                        continue
+                    answer = answers[answer_code]
+                    if answer not in newest:
+                        newest[answer] = offset + row
+                        picked[question_codes[row], answer_code] = (question, answer)
+                        if len(newest) == MAX_ANSWERS_PER_QUESTION:
+                            full += 1
+                            if full == len(questions):
+                                break
+                # How often each picked answer was given, counted in C
+                for pair, count in Counter(filter(picked.__contains__, zip(question_codes, answer_codes))).items():
+                    question, answer = picked[pair]
+                    counts[question, answer] = counts.get((question, answer), 0) + count
+            
+            tries = {}
+            recent = []
+            for question, newest in chosen.items():
+                trie = tries[question] = AnswerTrie()
+                for answer, position in newest.items():
+                    trie.add(answer, position, counts.get((question, answer), 1))
+                recent.extend((position, answer) for answer, position in newest.items())
+            self.tries = tries
+            recent.sort(reverse=True)
+            self.recent = list(dict.fromkeys(answer for _, answer in recent))
+        except Exception:
+            # Completion is a convenience; a history that cannot be read just offers nothing
+            pass
+        finally:
+            self.ready.set()
+    
+    def complete(self, question: str, text: str) -> List[str]:
+        """
+        Return past answers to a question that match typed text.
+        
+        Returns nothing until the index is built, so prompts never wait on it.
+        """
+        if not self.ready.is_set():
+            return []
+        trie = self.tries.get(question)
+        return trie.complete(text) if trie is not None else []
+    
+    def completer(self, question: str) -> "AnswerCompleter":
+        return AnswerCompleter(self, question)
+
+class AnswerCompleter(Completer):
+    """prompt_toolkit completer offering past answers to one question."""
+    
+    def __init__(self, index: AnswerIndex, question: str):
+        self.index = index
+        self.question = question
+    
+    def get_completions(self, document, complete_event) -> Iterator[Completion]:
+        text = document.text_before_cursor
+        for answer in self.index.complete(self.question, text):
+            if answer != text:
+                yield Completion(answer, start_position=-len(text))
+
+class _PastAnswers(History):
+    """History source yielding past answers once the index is built."""
+    
+    def __init__(self, index: AnswerIndex):
+        super().__init__()
+        self.index = index
+    
+    def load_history_strings(self) -> Iterator[str]:
+        # Runs on ThreadedHistory's loader thread, so waiting is fine
+        self.index.ready.wait()
+        yield from self.index.recent
+    
+    def store_string(self, string: str):
+        # peter.md is the persistent store
+        pass
+
+class AnswerHistory(ThreadedHistory):
+    """
+    Prompt history of past answers, loaded in the background.
+    
+    Only input given inside ``recording()`` is added, so priorities and
+    yes/no replies typed into the same session stay out of it.
+    """
+    
+    def __init__(self, index: AnswerIndex):
+        super().__init__(_PastAnswers(index))
+        self._recording = False
+    
+    @contextmanager
+    def recording(self) -> Iterator[None]:
+        self._recording = True
+        try:
+            yield
+        finally:
+            self._recording = False
+    
+    def append_string(self, string: str):
+        if self._recording:
+            super().append_string(string)
@@ -3,7 +3,9 @@ import os
 import re
 from typing import List, Dict, Any
 from .models import Question
+from .trace import traced
 
+@traced("load_config", reads=lambda config_file: config_file, count="questions")
 def load_config(config_file: str) -> List[Question]:
     """
     Load questions with priorities from .peter config file.
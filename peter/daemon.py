@@ -0,0 +1,205 @@
+# Long-lived `peter serve` daemon answering commands over a Unix socket
+#
+# The daemon keeps parsed todos resident in memory (see index.keep_resident)
+# and runs each forwarded command line through the regular click commands, so
+# output and behavior match in-process execution exactly. Requests are handled
+# one at a time on the event loop, which also serializes writes to peter.md.
+import asyncio
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+from typing import List, Optional, Tuple
+import click
+from .client import socket_path
+from .config import load_config
+from .index import keep_resident, load_todos
+
+# Seconds between checks of peter.md and .peter for changes
+POLL_INTERVAL = 1.0
+
+CONFIG_FILE = ".peter"
+
+class PeterDaemon:
+    """
+    Serve peter commands for one working directory.
+    
+    Args:
+        directory (str): Directory holding peter.md and .peter
+        poll_interval (float): Seconds between change checks
+    """
+    
+    def __init__(self, directory: str = ".", poll_interval: float = POLL_INTERVAL):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.path = socket_path(directory)
+        self.server = None
+        self.stats = {}
+        # Questions from .peter, handed to commands instead of rereading the file
+        self.config = []
+    
+    def execute(self, argv: List[str]) -> Tuple[int, str, str]:
+        """
+        Run one command line as the CLI would and capture its output.
+        
+        The config is checked for changes first, so a command never sees
+        questions older than .peter.
+        
+        Args:
+            argv (List[str]): Arguments after the program name
+        
+        Returns:
+            Tuple[int, str, str]: Exit code and everything the command
+            printed to stdout and to stderr
+        """
+        from .cli import cli
+        
+        self.refresh([CONFIG_FILE])
+        output = io.StringIO()
+        errors = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(errors):
+            try:
+                exit_code = cli.main(args=argv, prog_name="peter", standalone_mode=False,
+                                     obj={"config": self.config})
+                if not isinstance(exit_code, int):
+                    exit_code = 0
+            except click.ClickException as e:
+                e.show(file=errors)
+                exit_code = e.exit_code
+            except click.Abort:
+                print("Aborted!", file=errors)
+                exit_code = 1
+            except Exception:
+                # The command already printed its error
+                exit_code = 1
+        return exit_code, output.getvalue(), errors.getvalue()
+    
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer a single request from the thin client."""
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            try:
+                argv = json.loads(line)["argv"]
+                exit_code, output, errors = self.execute([str(arg) for arg in argv])
+            except (ValueError, KeyError, TypeError) as e:
+                exit_code, output, errors = 2, "", f"Error: malformed request: {e}\n"
+            reply = json.dumps({"exit_code": exit_code, "output": output, "errors": errors}) + "\n"
+            writer.write(reply.encode('utf-8'))
+            await writer.drain()
+        finally:
+            writer.close()
+    
+    def watched_files(self) -> List[str]:
+        """Return the files whose changes the daemon reloads."""
+        from .cli import _history_files
+        
+        return _history_files() + [CONFIG_FILE]
+    
+    def refresh(self, paths: Optional[List[str]] = None) -> List[str]:
+        """
+        Reload every watched file whose size or mtime changed.
+        
+        Args:
+            paths (Optional[List[str]]): Files to check, all watched files by default
+        
+        Returns:
+            List[str]: Files that were reloaded
+        """
+        changed = []
+        for path in self.watched_files() if paths is None else paths:
+            try:
+                st = os.stat(path)
+                stat = (st.st_size, st.st_mtime_ns)
+            except FileNotFoundError:
+                stat = None
+            if self.stats.get(path) == stat:
+                continue
+            self.stats[path] = stat
+            changed.append(path)
+            if stat is None:
+                if path == CONFIG_FILE:
+                    self.config = []
+                continue
+            try:
+                if path == CONFIG_FILE:
+                    self.config = load_config(path)
+                else:
+                    load_todos(path)
+            except Exception as e:
+                print(f"⚠️  Could not reload {path}: {e}")
+        return changed
+    
+    async def watch(self):
+        """Reload changed files in the background, off the request path."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            for path in self.refresh():
+                print(f"🔄 Reloaded {path}")
+    
+    async def serve(self):
+        """Listen on the socket until cancelled."""
+        keep_resident()
+        with contextlib.chdir(self.directory):
+            self.refresh()
+            self.server = await asyncio.start_unix_server(self.handle, path=os.path.basename(self.path))
+            watcher = asyncio.create_task(self.watch())
+            try:
+                async with self.server:
+                    await self.server.serve_forever()
+            finally:
+                watcher.cancel()
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(os.path.basename(self.path))
+
+def daemon_running(directory: str = ".") -> bool:
+    """
+    Check whether a daemon is already listening for a directory.
+    
+    Args:
+        directory (str): Directory holding peter.md and .peter
+    
+    Returns:
+        bool: True if the socket accepts connections
+    """
+    path = socket_path(directory)
+    if not os.path.exists(path):
+        return False
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+def run_daemon(directory: str = ".", poll_interval: float = POLL_INTERVAL):
+    """
+    Run the daemon in the foreground until interrupted.
+    
+    A socket left behind by a daemon that died is removed first.
+    
+    Args:
+        directory (str): Directory holding peter.md and .peter
+        poll_interval (float): Seconds between change checks
+    """
+    if daemon_running(directory):
+        raise ValueError(f"peter serve is already running in {os.path.abspath(directory)}")
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(socket_path(directory))
+    
+    # Stop cleanly, removing the socket, on SIGTERM as well as Ctrl+C
+    signal.signal(signal.SIGTERM, _stop)
+    daemon = PeterDaemon(directory, poll_interval)
+    print(f"🛰️  Serving peter on {daemon.path} (Ctrl+C to stop)")
+    try:
+        asyncio.run(daemon.serve())
+    except KeyboardInterrupt:
+        print("\n👋 peter serve stopped")
@@ -0,0 +1,387 @@
+# Duplicate detection and folding for repeated open todos
+#
+# The same .peter questions are asked every day, so an open answer such as
+# "finish report" can pile up under many dates. Open todos are keyed by a
+# digest of their normalized question and answer, and a single pass with a
+# set of digests finds the repeats in linear time. Folding keeps the oldest
+# entry, records on it when the todo was first and last seen, and drops the
+# others from the history.
+import contextlib
+import hashlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .index import load_todos
+from .locking import file_lock, atomic_replace
+from .models import Answer, Todo
+from .store import TodoStore
+from .todo_manager import (iter_open_todos, _field_edit, _apply_edits, QUESTION_PREFIX, ANSWER_PREFIX,
+                           FIRST_SEEN_PREFIX, LAST_SEEN_PREFIX, DEDUP_MODES)
+from .trace import traced
+
+def normalize(text: str) -> str:
+    """Lowercase text and collapse its whitespace, so trivial edits still match."""
+    return " ".join(text.lower().split())
+
+def todo_digest(question: str, answer: str) -> bytes:
+    """
+    Key a todo by its normalized question and answer.
+    
+    Args:
+        question (str): Question text
+        answer (str): Answer text
+    
+    Returns:
+        bytes: Eight byte blake2b digest
+    """
+    key = f"{normalize(question)}\0{normalize(answer)}"
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+
+def open_digests(todos: Iterable[Todo]) -> Tuple[List, List[bytes]]:
+    """
+    Digest the open todos of a source.
+    
+    A TodoStore is read from its columns, hashing every distinct question
+    and answer pair once, and no row views are built.
+    
+    Args:
+        todos (Iterable[Todo]): Todos in history order
+    
+    Returns:
+        Tuple[List, List[bytes]]: Open todos, or row numbers for a
+        TodoStore, and their digests
+    """
+    if not isinstance(todos, TodoStore):
+        opened = list(iter_open_todos(todos))
+        return opened, [todo_digest(todo.question, todo.answer) for todo in opened]
+    questions = todos._questions.values
+    answers = todos._answers.values
+    question_codes = todos.question_codes
+    answer_codes = todos.answer_codes
+    rows = todos.open_rows()
+    by_pair = {}
+    digests = []
+    for row in rows:
+        pair = (question_codes[row], answer_codes[row])
+        digest = by_pair.get(pair)
+        if digest is None:
+            digest = by_pair[pair] = todo_digest(questions[pair[0]], answers[pair[1]])
+        digests.append(digest)
+    return rows, digests
+
+class DuplicateGroup:
+    """Open todos with the same normalized question and answer, in history order."""
+    
+    __slots__ = ("entries",)
+    
+    def __init__(self):
+        # (source, todo) pairs; the first one is kept when folding
+        self.entries = []
+    
+    @property
+    def kept(self) -> Tuple[str, Todo]:
+        return self.entries[0]
+    
+    # Dates already recorded on an entry by an earlier fold count too
+    @property
+    def first_seen(self) -> str:
+        return min(todo.first_seen or todo.date for _, todo in self.entries)
+    
+    @property
+    def last_seen(self) -> str:
+        return max(todo.last_seen or todo.date for _, todo in self.entries)
+
+@traced("find_duplicates", count=None)
+def find_duplicates(sources: List[Tuple[str, Iterable[Todo]]]) -> List[DuplicateGroup]:
+    """
+    Find open todos that repeat an earlier open todo.
+    
+    The first pass only keeps a set of digests; the second collects the
+    todos whose digest was seen more than once. Both are linear.
+    
+    Args:
+        sources (List[Tuple[str, Iterable[Todo]]]): (file, todos) pairs,
+            oldest first; the todos are read twice, so pass stores or lists
+    
+    Returns:
+        List[DuplicateGroup]: Groups of two or more, by first appearance
+    """
+    digested = []
+    seen = set()
+    repeated = set()
+    for source, todos in sources:
+        opened, digests = open_digests(todos)
+        digested.append((source, todos, opened, digests))
+        for digest in digests:
+            if digest in seen:
+                repeated.add(digest)
+            else:
+                seen.add(digest)
+    del seen
+    
+    groups = {}
+    for source, todos, opened, digests in digested:
+        is_store = isinstance(todos, TodoStore)
+        for item, digest in zip(opened, digests):
+            if digest in repeated:
+                group = groups.get(digest)
+                if group is None:
+                    group = groups[digest] = DuplicateGroup()
+                group.entries.append((source, todos[item] if is_store else item))
+    return list(groups.values())
+
+def _annotate(block: List[bytes], first_seen: str, last_seen: str) -> List[bytes]:
+    """Set the first and last seen fields of one entry block."""
+    lines = []
+    fields_end = 1
+    for raw_line in block:
+        line = raw_line.decode('utf-8').strip()
+        if line.startswith(FIRST_SEEN_PREFIX):
+            first_seen = min(first_seen, line[len(FIRST_SEEN_PREFIX):].strip())
+            continue
+        if line.startswith(LAST_SEEN_PREFIX):
+            last_seen = max(last_seen, line[len(LAST_SEEN_PREFIX):].strip())
+            continue
+        lines.append(raw_line)
+        if line.startswith("- **"):
+            fields_end = len(lines)
+    if not lines[fields_end - 1].endswith(b"\n"):
+        lines[fields_end - 1] += b"\n"
+    seen_lines = [f"  {FIRST_SEEN_PREFIX} {first_seen}\n".encode('utf-8'),
+                  f"  {LAST_SEEN_PREFIX} {last_seen}\n".encode('utf-8')]
+    return lines[:fields_end] + seen_lines + lines[fields_end:]
+
+def _check_entry(todo: Todo, field: str, expected: str, found: str):
+    """Refuse to fold an entry that is not the todo it was found as."""
+    if found != expected:
+        raise ValueError(f"Entry at byte {todo.offset} no longer matches the {field} '{expected}'; "
+                         "nothing was folded, run `peter dedup` again")
+
+def fold_lines(lines: Iterable[bytes], drop: Dict[int, Todo],
+               annotate: Dict[int, Tuple[Todo, str, str]]) -> Iterator[bytes]:
+    """
+    Rewrite a markdown file line by line, dropping and annotating entries.
+    
+    A date section whose entries were all dropped is dropped with them.
+    The question and answer at every offset are checked against the todo
+    expected there, and a mismatch raises before the rewrite completes.
+    
+    Args:
+        lines (Iterable[bytes]): Lines of the file including line endings
+        drop (Dict[int, Todo]): Entries to drop, by offset of their question line
+        annotate (Dict[int, Tuple[Todo, str, str]]): Entries to keep with
+            their (first seen, last seen) dates, by offset of their question line
+    
+    Yields:
+        bytes: Lines of the folded file
+    
+    Raises:
+        ValueError: If an offset does not start the expected todo
+    """
+    question = QUESTION_PREFIX.encode('utf-8')
+    offset = 0
+    # Header lines of the current section, held back until one of its entries is kept
+    header = []
+    header_pending = False
+    section_dropped = False
+    block = None
+    seen = None
+    skipping = False
+    # Todo whose answer line is still to be checked
+    checking = None
+    matched = set()
+    for raw_line in lines:
+        line_offset = offset
+        offset += len(raw_line)
+        line = raw_line.strip()
+        starts_entry = line.startswith(question)
+        if line.startswith(b"## ") or starts_entry:
+            if checking is not None:
+                _check_entry(checking, "answer", checking.answer, "nothing")
+                checking = None
+            if block is not None:
+                yield from _annotate(block, *seen)
+                block = None
+            skipping = False
+        
+        if starts_entry and (line_offset in drop or line_offset in annotate):
+            checking = drop[line_offset] if line_offset in drop else annotate[line_offset][0]
+            matched.add(line_offset)
+            _check_entry(checking, "question", checking.question,
+                         line[len(question):].decode('utf-8').strip())
+        elif checking is not None and line.startswith(ANSWER_PREFIX.encode('utf-8')):
+            _check_entry(checking, "answer", checking.answer, line[len(ANSWER_PREFIX):].decode('utf-8').strip())
+            checking = None
+        
+        if line.startswith(b"## "):
+            if header_pending and not section_dropped:
+                yield from header
+            header = [raw_line]
+            header_pending = True
+            section_dropped = False
+        elif starts_entry and line_offset in drop:
+            skipping = True
+            section_dropped = True
+        elif starts_entry:
+            if header_pending:
+                yield from header
+                header_pending = False
+            if line_offset in annotate:
+                block = [raw_line]
+                seen = annotate[line_offset][1:]
+            else:
+                yield raw_line
+        elif skipping:
+            continue
+        elif block is not None:
+            block.append(raw_line)
+        elif header_pending:
+            header.append(raw_line)
+        else:
+            yield raw_line
+    
+    if checking is not None:
+        _check_entry(checking, "answer", checking.answer, "nothing")
+    missing = (set(drop) | set(annotate)) - matched
+    if missing:
+        raise ValueError(f"No entry starts at byte {min(missing)} any more; nothing was folded, run `peter dedup` again")
+    if block is not None:
+        yield from _annotate(block, *seen)
+    if header_pending and not section_dropped:
+        yield from header
+
+def _lock_all(stack: contextlib.ExitStack, paths: Iterable[str]):
+    """Take the write locks of several files, always in the same order."""
+    for path in sorted(set(paths)):
+        stack.enter_context(file_lock(path))
+
+@traced("fold", count=None)
+def fold_duplicates(paths: List[str]) -> List[DuplicateGroup]:
+    """
+    Keep the oldest duplicate open todo of each group and drop the others.
+    
+    Every file is locked first and its duplicates are found again from what
+    it holds now, so entries moved by another peter since they were listed
+    are folded where they are. The kept entry gets ``First seen`` and
+    ``Last seen`` fields. Each file is rewritten in one streaming pass and
+    swapped in atomically. Its search and skip indexes are dropped and
+    rebuilt on next use.
+    
+    IDs count identical entries under the same date, so dropping an entry
+    moves every later identical entry of its date down one occurrence:
+    a completed copy that followed a dropped one takes over its ID. All
+    other IDs, including those of the kept entries, stay the same.
+    
+    Args:
+        paths (List[str]): History files, oldest first
+    
+    Returns:
+        List[DuplicateGroup]: Groups that were folded
+    """
+    from .search import drop_search_index
+    from .sections import drop_sections
+    
+    with contextlib.ExitStack() as stack:
+        _lock_all(stack, paths)
+        groups = find_duplicates([(path, load_todos(path)) for path in paths])
+        
+        drops = {}
+        annotations = {}
+        for group in groups:
+            source, kept = group.kept
+            annotations.setdefault(source, {})[kept.offset] = (kept, group.first_seen, group.last_seen)
+            for source, todo in group.entries[1:]:
+                drops.setdefault(source, {})[todo.offset] = todo
+        
+        for path in dict.fromkeys(list(annotations) + list(drops)):
+            with open(path, 'rb') as f, atomic_replace(path, 'wb') as out:
+                out.writelines(fold_lines(f, drops.get(path, {}), annotations.get(path, {})))
+            drop_search_index(path)
+            drop_sections(path)
+    return groups
+
+def dedup_answers(answers: List[Answer], date: str, output_file: str, mode: str,
+                  history_files: Optional[List[str]] = None) -> List[Answer]:
+    """
+    Check new answers against the open todos of the history before they are saved.
+    
+    The caller holds the write locks of ``output_file`` and every history
+    file. With ``flag`` every answer is kept and repeats are reported. With
+    ``fold`` an answer that is already open updates the ``Last seen`` field
+    of the oldest open todo, in whichever file it is, instead of being
+    appended, and repeats within ``answers`` are saved once.
+    
+    Args:
+        answers (List[Answer]): Answers about to be appended
+        date (str): Date they are saved under
+        output_file (str): Markdown file they are appended to
+        mode (str): One of ``DEDUP_MODES``
+        history_files (Optional[List[str]]): Files to look for open repeats
+            in, oldest first, e.g. every shard; defaults to ``output_file``
+    
+    Returns:
+        List[Answer]: Answers still to append
+    """
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode '{mode}', expected one of {', '.join(DEDUP_MODES)}")
+    
+    wanted = {todo_digest(answer.question, answer.answer) for answer in answers}
+    # digest -> (file, oldest open todo)
+    existing = {}
+    for path in history_files or [output_file]:
+        store = load_todos(path)
+        for row, digest in zip(*open_digests(store)):
+            if digest in wanted and digest not in existing:
+                existing[digest] = (path, store[row])
+    
+    remaining = []
+    folded = {}
+    batch = set()
+    for answer in answers:
+        digest = todo_digest(answer.question, answer.answer)
+        if digest in existing:
+            _, todo = existing[digest]
+            if mode == "flag":
+                print(f"⚠️  Already open since {todo.date} ({todo.id}): {answer.question} — {answer.answer}")
+                remaining.append(answer)
+            else:
+                folded[digest] = existing[digest]
+            continue
+        if digest in batch:
+            if mode == "flag":
+                print(f"⚠️  Answered twice: {answer.question} — {answer.answer}")
+                remaining.append(answer)
+            continue
+        batch.add(digest)
+        remaining.append(answer)
+    
+    by_file = {}
+    for path, todo in folded.values():
+        by_file.setdefault(path, []).append(todo)
+    for path, todos in by_file.items():
+        _mark_seen(todos, date, path)
+        for todo in todos:
+            print(f"🔁 Folded into {todo.id}, open since {todo.first_seen or todo.date}: {todo.answer}")
+    return remaining
+
+def _mark_seen(todos: List[Todo], date: str, output_file: str):
+    """Record that open todos were answered again on ``date``, patching only their entries."""
+    from .search import file_state, record_completed
+    from . import sections
+    
+    before = file_state(output_file)
+    with open(output_file, 'rb') as f:
+        # New fields of one entry are inserted at the same point; sorting the
+        # edits puts First seen ahead of Last seen. A First seen recorded by an
+        # earlier fold is older than the entry's own date and is kept.
+        edits = []
+        for todo in todos:
+            seen = ((FIRST_SEEN_PREFIX, todo.first_seen or todo.date),
+                    (LAST_SEEN_PREFIX, max(todo.last_seen, date)))
+            for prefix, value in seen:
+                edit = _field_edit(f, todo, prefix, value)
+                if edit is not None:
+                    edits.append(edit)
+        if edits:
+            _apply_edits(f, output_file, edits)
+    # Nothing was completed; this only moves the search index to the new file state
+    record_completed(output_file, [], before)
+    sections.record_edited(output_file, todos, before)
@@ -0,0 +1,313 @@
+# Machine-readable export and bulk import of todos
+#
+# Both directions stream: export consumes todos straight from the parser and
+# import appends one date section at a time, so memory use does not depend
+# on the number of records.
+import contextlib
+import csv
+import json
+import os
+import sys
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, TextIO
+from .locking import file_lock
+from .models import Todo
+from .todo_manager import format_entry
+from .trace import traced
+
+EXPORT_FORMATS = ("jsonl", "csv", "sqlite")
+
+# Columns of every export format, in order
+FIELDS = ("id", "date", "question", "answer", "priority", "completed", "first_seen", "last_seen")
+
+# Section text is flushed to the file once it grows past this many characters
+WRITE_BUFFER = 1 << 20
+
+def todo_record(todo: Todo) -> Dict[str, Any]:
+    """
+    Describe a todo as a plain record.
+    
+    Args:
+        todo (Todo): Todo or TodoRow
+    
+    Returns:
+        Dict[str, Any]: Values keyed by ``FIELDS``
+    """
+    return {"id": todo.id, "date": todo.date, "question": todo.question, "answer": todo.answer,
+            "priority": todo.priority, "completed": todo.completed,
+            "first_seen": todo.first_seen, "last_seen": todo.last_seen}
+
+def export_jsonl(todos: Iterable[Todo], f: TextIO) -> int:
+    """
+    Write one JSON object per line.
+    
+    Args:
+        todos (Iterable[Todo]): Todos to export
+        f (TextIO): Destination
+    
+    Returns:
+        int: Number of todos written
+    """
+    count = 0
+    for todo in todos:
+        f.write(json.dumps(todo_record(todo), ensure_ascii=False))
+        f.write("\n")
+        count += 1
+    return count
+
+def export_csv(todos: Iterable[Todo], f: TextIO) -> int:
+    """
+    Write a CSV file with a header row.
+    
+    Args:
+        todos (Iterable[Todo]): Todos to export
+        f (TextIO): Destination, opened with ``newline=''``
+    
+    Returns:
+        int: Number of todos written
+    """
+    writer = csv.writer(f)
+    writer.writerow(FIELDS)
+    count = 0
+    for todo in todos:
+        writer.writerow((todo.id, todo.date, todo.question, todo.answer, todo.priority, todo.completed,
+                         todo.first_seen, todo.last_seen))
+        count += 1
+    return count
+
+def export_sqlite(todos: Iterable[Todo], db_path: str) -> int:
+    """
+    Write a SQLite database with a single ``todos`` table.
+    
+    The database is built next to the destination and renamed into place,
+    replacing any earlier export.
+    
+    Args:
+        todos (Iterable[Todo]): Todos to export
+        db_path (str): Database file to create
+    
+    Returns:
+        int: Number of todos written
+    """
+    count = 0
+    
+    def rows():
+        nonlocal count
+        for todo in todos:
+            count += 1
+            yield (todo.id, todo.date, todo.question, todo.answer, todo.priority, int(todo.completed),
+                   todo.first_seen, todo.last_seen)
+    
+    # Imported here so the CLI does not load sqlite3 for every command
+    import sqlite3
+    
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(db_path) or ".", prefix=".peter-export-")
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            with conn:
+                conn.execute("""CREATE TABLE todos (
+                    id TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    completed INTEGER NOT NULL,
+                    first_seen TEXT NOT NULL,
+                    last_seen TEXT NOT NULL
+                )""")
+                # executemany pulls from the generator, so rows are never all in memory
+                conn.executemany("INSERT INTO todos VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows())
+                conn.execute("CREATE INDEX todos_date ON todos (date)")
+        finally:
+            conn.close()
+        os.replace(tmp_path, db_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return count
+
+@traced("export", count=None)
+def export_todos(todos: Iterable[Todo], fmt: str, output: str = "-") -> int:
+    """
+    Export todos in one of ``EXPORT_FORMATS``.
+    
+    Args:
+        todos (Iterable[Todo]): Todos to export, e.g. from ``iter_todos``
+        fmt (str): "jsonl", "csv" or "sqlite"
+        output (str): Destination file, or "-" for stdout (text formats only)
+    
+    Returns:
+        int: Number of todos written
+    """
+    if fmt == "sqlite":
+        if output == "-":
+            raise ValueError("SQLite export needs an output file")
+        return export_sqlite(todos, output)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {', '.join(EXPORT_FORMATS)}")
+    
+    write = export_jsonl if fmt == "jsonl" else export_csv
+    if output == "-":
+        return write(todos, sys.stdout)
+    with open(output, 'w', encoding='utf-8', newline='') as f:
+        return write(todos, f)
+
+def iter_jsonl(f: TextIO) -> Iterator[Dict[str, Any]]:
+    """
+    Read JSON objects, one per line, skipping blank lines.
+    
+    Args:
+        f (TextIO): Source
+    
+    Yields:
+        Dict[str, Any]: Decoded records
+    """
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Line {line_number}: invalid JSON: {e}")
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {line_number}: expected a JSON object")
+        yield record
+
+def _single_line(value: Any) -> str:
+    # Entries are one line each in markdown
+    return " ".join(str(value).split())
+
+def record_todo(record: Dict[str, Any]) -> Todo:
+    """
+    Turn an imported record into a Todo.
+    
+    ``question``, ``answer``, ``priority`` and ``date`` are required;
+    ``completed`` defaults to False, ``first_seen`` and ``last_seen`` to
+    empty, and ``id`` is ignored, because IDs are derived from the entry.
+    
+    Args:
+        record (Dict[str, Any]): Record as written by ``peter export``
+    
+    Returns:
+        Todo: Todo to append
+    """
+    missing = [field for field in ("question", "answer", "priority", "date") if field not in record]
+    if missing:
+        raise ValueError(f"Record is missing {', '.join(missing)}: {record}")
+    try:
+        priority = int(record["priority"])
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid priority {record['priority']!r}: {record}")
+    completed = record.get("completed", False)
+    if isinstance(completed, str):
+        completed = completed.strip().lower() == "true"
+    return Todo(_single_line(record["question"]), _single_line(record["answer"]) or "nothing",
+                priority, bool(completed), _single_line(record["date"]),
+                first_seen=_single_line(record.get("first_seen") or ""),
+                last_seen=_single_line(record.get("last_seen") or ""))
+
+class _SectionWriter:
+    """Append date sections to one or more markdown files through their journals, all or nothing."""
+    
+    def __init__(self, stack: contextlib.ExitStack):
+        self.stack = stack
+        # path -> (journal, search file_state before)
+        self.files = {}
+    
+    def _open(self, path: str):
+        entry = self.files.get(path)
+        if entry is None:
+            from .journal import Journal
+            from .search import file_state
+            self.stack.enter_context(file_lock(path))
+            before = file_state(path)
+            journal = self.stack.enter_context(Journal(path))
+            if journal.size == 0:
+                journal.append(b"# Daily Todos\n\n")
+            else:
+                journal.md.seek(journal.size - 1)
+                if journal.md.read(1) != b"\n":
+                    journal.append(b"\n")
+            entry = self.files[path] = (journal, before)
+        return entry[0]
+    
+    def write(self, path: str, text: str):
+        journal = self._open(path)
+        journal.append(text.encode('utf-8'))
+        # One fsync of the journal per batch rather than per section
+        if journal.pending_bytes >= WRITE_BUFFER:
+            journal.commit()
+    
+    def abort(self):
+        """Undo everything written by this import."""
+        for journal, _ in self.files.values():
+            journal.rollback()
+    
+    def commit(self):
+        """Write what is left and bring the search and skip indexes up to date."""
+        from .search import record_append
+        from . import sections
+        for path, (journal, before) in self.files.items():
+            journal.commit()
+            record_append(path, before)
+            sections.record_append(path, before)
+
+@traced("import", count=None)
+def import_todos(records: Iterable[Dict[str, Any]], output_file: str = "peter.md",
+                 path_for_date: Optional[Callable[[str], str]] = None) -> Dict[str, int]:
+    """
+    Append imported records to the markdown history.
+    
+    Consecutive records with the same date become one ``## `` section,
+    written with a few large writes rather than one per line; input sorted
+    by date, as produced by ``peter export``, therefore gets each date
+    written once. Nothing is kept once its section is written. If any
+    record is invalid, the files are restored to their previous size.
+    
+    Args:
+        records (Iterable[Dict[str, Any]]): Records, e.g. from ``iter_jsonl``
+        output_file (str): Markdown file to append to
+        path_for_date (Optional[Callable[[str], str]]): Chooses the file per
+            date instead, e.g. the month shard
+    
+    Returns:
+        Dict[str, int]: Numbers of imported todos and written sections
+    """
+    stats = {"todos": 0, "sections": 0}
+    current_date = None
+    current_path = None
+    buffer = []
+    buffered = 0
+    
+    with contextlib.ExitStack() as stack:
+        writer = _SectionWriter(stack)
+        try:
+            for record in records:
+                todo = record_todo(record)
+                if todo.date != current_date:
+                    if buffer:
+                        writer.write(current_path, "".join(buffer))
+                    current_date = todo.date
+                    current_path = path_for_date(todo.date) if path_for_date else output_file
+                    buffer = [f"## {todo.date}\n\n"]
+                    buffered = 0
+                    stats["sections"] += 1
+                entry = format_entry(todo)
+                buffer.append(entry)
+                buffered += len(entry)
+                stats["todos"] += 1
+                if buffered >= WRITE_BUFFER:
+                    writer.write(current_path, "".join(buffer))
+                    buffer = []
+                    buffered = 0
+            if buffer:
+                writer.write(current_path, "".join(buffer))
+        except BaseException:
+            writer.abort()
+            raise
+        writer.commit()
+    
+    return stats
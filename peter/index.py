@@ -0,0 +1,259 @@
+# Sidecar index cache for parsed peter.md files
+import bisect
+import dataclasses
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+from .locking import file_lock
+from .store import TodoStore
+from .todo_manager import ParserState, iter_todos_from_lines
+from .trace import traced
+
+# Bump whenever the layout of the cached records changes
+INDEX_VERSION = 6
+
+# Read size when hashing the markdown file
+HASH_CHUNK = 1 << 16
+
+# Parsed files kept in memory by a long-lived process such as `peter serve`,
+# keyed by absolute path; None when every call goes through the index file
+_resident: Optional[Dict[str, Tuple[Dict[str, Any], TodoStore]]] = None
+
+def keep_resident():
+    """
+    Keep parsed todos in memory across ``load_todos`` calls in this process.
+    
+    A resident store is trusted while the file's size and mtime are
+    unchanged, so repeated loads neither read the index nor hash the file.
+    """
+    global _resident
+    if _resident is None:
+        _resident = {}
+
+def index_path_for(file_path: str) -> str:
+    """
+    Return the sidecar index path for a markdown file.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    
+    Returns:
+        str: Path of the hidden ``.<name>.idx`` file next to it
+    """
+    directory, name = os.path.split(file_path)
+    return os.path.join(directory, f".{name}.idx")
+
+@traced("digest", reads=lambda file_path: file_path, count=None)
+def file_digest(file_path: str) -> str:
+    """
+    Compute the content hash used to validate the index.
+    
+    Args:
+        file_path (str): Path to the file
+    
+    Returns:
+        str: Hex digest of the file content
+    """
+    with open(file_path, 'rb') as f:
+        return hashlib.file_digest(f, "blake2b").hexdigest()
+
+def _hash_through(h, f, end: Optional[int]):
+    """Feed ``f`` into ``h`` from its position up to ``end`` (or EOF)."""
+    while end is None or f.tell() < end:
+        size = HASH_CHUNK if end is None else min(HASH_CHUNK, end - f.tell())
+        chunk = f.read(size)
+        if not chunk:
+            break
+        h.update(chunk)
+
+def _digests(f, h, start: int, resume_offset: int) -> Tuple[Optional[str], str]:
+    """
+    Continue hashing a file from ``start`` and checkpoint at the resume point.
+    
+    Returns:
+        Tuple[Optional[str], str]: Digest of the bytes before
+        ``resume_offset`` (None if the parse cannot resume) and of the whole file
+    """
+    f.seek(start)
+    prefix_digest = None
+    if resume_offset >= 0:
+        _hash_through(h, f, resume_offset)
+        prefix_digest = h.copy().hexdigest()
+    _hash_through(h, f, None)
+    return prefix_digest, h.hexdigest()
+
+def _header(st: os.stat_result, prefix_digest: Optional[str], digest: str,
+            state: ParserState) -> Dict[str, Any]:
+    """Describe a parsed file and where its parse can be resumed."""
+    return {
+        "version": INDEX_VERSION,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "digest": digest,
+        "resume_offset": state.resume_offset if prefix_digest is not None else -1,
+        "prefix_digest": prefix_digest,
+        "state": state,
+    }
+
+@traced("read_index", reads=index_path_for, count=None)
+def _read_index_file(file_path: str) -> Optional[Tuple[Dict[str, Any], TodoStore]]:
+    """Load the header and todos of an index without validating them."""
+    try:
+        with open(index_path_for(file_path), 'rb') as f:
+            header = pickle.load(f)
+            if not isinstance(header, dict) or header.get("version") != INDEX_VERSION:
+                return None
+            return header, pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError, KeyError):
+        return None
+
+def read_index(file_path: str) -> Optional[TodoStore]:
+    """
+    Load cached todos if the index still matches the markdown file.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    
+    Returns:
+        Optional[TodoStore]: Cached todos, or None if missing or stale
+    """
+    cached = _read_index_file(file_path)
+    if cached is None:
+        return None
+    header, store = cached
+    try:
+        st = os.stat(file_path)
+        # Cheap checks first, the content hash only when they agree
+        if (header.get("size") != st.st_size
+                or header.get("mtime_ns") != st.st_mtime_ns
+                or header.get("digest") != file_digest(file_path)):
+            return None
+    except OSError:
+        return None
+    return store
+
+@traced("write_index", writes=lambda file_path, store, header: index_path_for(file_path), rewrite=True, count=None)
+def write_index(file_path: str, store: TodoStore, header: Dict[str, Any]):
+    """
+    Write the sidecar index for a markdown file.
+    
+    The index is written to a temporary file and renamed into place so a
+    concurrent reader never sees a partial index. Failures are ignored; the
+    cache is an optimization only.
+    
+    Args:
+        file_path (str): Path to the markdown file
+        store (TodoStore): Parsed todos of the file
+        header (Dict[str, Any]): File state the todos were parsed from
+    """
+    try:
+        index_file = index_path_for(file_path)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(index_file) or ".", prefix=".peter-idx-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(store, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, index_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+
+@traced("parse", reads=lambda file_path: file_path, count=None)
+def _parse_full(file_path: str) -> Tuple[TodoStore, Optional[Dict[str, Any]]]:
+    """Parse a whole file, returning its todos and the header to cache them under."""
+    st = os.stat(file_path)
+    state = ParserState()
+    with open(file_path, 'rb') as f:
+        todos = TodoStore.from_todos(iter_todos_from_lines(f, 0, state))
+        prefix_digest, digest = _digests(f, hashlib.blake2b(), 0, state.resume_offset)
+    return todos, _header(st, prefix_digest, digest, state)
+
+@traced("parse_tail", reads=lambda file_path, header, todos: file_path, count=None)
+def _parse_tail(file_path: str, header: Dict[str, Any],
+                todos: TodoStore) -> Optional[Tuple[TodoStore, Dict[str, Any]]]:
+    """
+    Bring cached todos up to date by parsing only what was appended.
+    
+    The bytes before the cached resume point must hash to the digest taken
+    when they were parsed; anything else (truncation, a rewrite, a hand edit
+    or an in-place close) returns None so the caller parses from scratch.
+    """
+    resume_offset = header.get("resume_offset", -1)
+    st = os.stat(file_path)
+    if resume_offset < 0 or st.st_size < resume_offset:
+        return None
+    
+    h = hashlib.blake2b()
+    with open(file_path, 'rb') as f:
+        _hash_through(h, f, resume_offset)
+        if h.hexdigest() != header.get("prefix_digest"):
+            return None
+        
+        # The last cached entry may have grown, so it is parsed again
+        todos.truncate(bisect.bisect_left(todos.offsets, resume_offset))
+        # Copied, since the parse updates the state it is given
+        state = dataclasses.replace(header["state"])
+        f.seek(resume_offset)
+        for todo in iter_todos_from_lines(f, resume_offset, state):
+            todos.append(todo)
+        prefix_digest, digest = _digests(f, h, resume_offset, state.resume_offset)
+    return todos, _header(st, prefix_digest, digest, state)
+
+@traced("load_todos")
+def load_todos(file_path: str) -> TodoStore:
+    """
+    Load todos from the sidecar index, parsing the markdown only when needed.
+    
+    peter only ever appends to its history, so a stale index is usually
+    brought up to date by parsing the appended bytes alone. Any other
+    change, or a missing index, falls back to a full parse. The index is
+    rewritten either way.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    
+    Returns:
+        TodoStore: Todos with their status, in file order
+    """
+    if not os.path.exists(file_path):
+        return TodoStore()
+    
+    # A shared lock keeps writers out while the file is read and hashed
+    with file_lock(file_path, exclusive=False):
+        key = os.path.abspath(file_path)
+        cached = _resident.get(key) if _resident is not None else None
+        resident = cached is not None
+        if not resident:
+            cached = _read_index_file(file_path)
+        if cached is not None:
+            header, todos = cached
+            st = os.stat(file_path)
+            if header.get("size") == st.st_size and header.get("mtime_ns") == st.st_mtime_ns \
+                    and (resident or header.get("digest") == file_digest(file_path)):
+                _remember(key, header, todos)
+                return todos
+            updated = _parse_tail(file_path, header, todos)
+            if updated is not None:
+                todos, header = updated
+                _write_if_unchanged(file_path, todos, header)
+                _remember(key, header, todos)
+                return todos
+        
+        todos, header = _parse_full(file_path)
+        _write_if_unchanged(file_path, todos, header)
+        _remember(key, header, todos)
+        return todos
+
+def _remember(key: str, header: Dict[str, Any], todos: TodoStore):
+    if _resident is not None:
+        _resident[key] = (header, todos)
+
+def _write_if_unchanged(file_path: str, todos: TodoStore, header: Dict[str, Any]):
+    """Cache todos unless the file changed while it was being read."""
+    st = os.stat(file_path)
+    if (st.st_size, st.st_mtime_ns) == (header["size"], header["mtime_ns"]):
+        write_index(file_path, todos, header)
@@ -0,0 +1,324 @@
+# Write-ahead journal for appends and in-place patches of peter.md
+#
+# Rewrites already go through atomic_replace, but an append or an in-place
+# patch cut short by a crash leaves a torn entry behind. Every such write is
+# first recorded in ``.<name>.journal`` next to the file. A batch of records
+# is written with a single fsync, then applied to the markdown file and
+# closed with a commit record. The markdown file itself is only synced at a
+# checkpoint, when the journal outgrows JOURNAL_CHECKPOINT_BYTES and is
+# emptied.
+#
+# Records name the inode and byte offsets they apply to and carry the bytes
+# to write, so replaying one is idempotent. The first lock taken on a file
+# checks the last record against the file's size and mtime; if a batch was
+# left unfinished, the journal is replayed before anyone reads the file.
+import json
+import os
+import sys
+import zlib
+from typing import Iterator, List, Optional, Tuple
+from .locking import file_lock
+
+# Checkpoint once the journal is this large
+JOURNAL_CHECKPOINT_BYTES = 1 << 20
+
+# Every record is followed by a line holding its own offset in hex, so the
+# last record can be found by reading the end of the journal
+TRAILER_BYTES = 17
+
+def journal_path_for(file_path: str) -> str:
+    """
+    Return the journal path for a markdown file.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    
+    Returns:
+        str: Path of the hidden ``.<name>.journal`` file next to it
+    """
+    directory, name = os.path.split(file_path)
+    return os.path.join(directory, f".{name}.journal")
+
+def _text(data: bytes) -> str:
+    # Markdown is UTF-8; surrogateescape keeps any other byte intact through JSON
+    return data.decode('utf-8', 'surrogateescape')
+
+def _bytes(text: str) -> bytes:
+    return text.encode('utf-8', 'surrogateescape')
+
+def _encode(record: dict, offset: int) -> bytes:
+    payload = json.dumps(record, separators=(",", ":")).encode('ascii')
+    return b"%08x %s\n%016x\n" % (zlib.crc32(payload), payload, offset)
+
+def _decode(line: bytes) -> Optional[dict]:
+    """Parse one record line, or return None if it is torn or corrupt."""
+    if len(line) < 10 or not line.endswith(b"\n"):
+        return None
+    payload = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+def _iter_records(f) -> Iterator[dict]:
+    """Read records from the start of a journal, stopping at a torn tail."""
+    offset = 0
+    while True:
+        record = _decode(f.readline())
+        if record is None or f.readline() != b"%016x\n" % offset:
+            return
+        yield record
+        offset = f.tell()
+
+def _last_record(f) -> Optional[dict]:
+    """Read the last record of a non-empty journal, None if the tail is torn."""
+    size = f.seek(0, os.SEEK_END)
+    if size < TRAILER_BYTES:
+        return None
+    f.seek(size - TRAILER_BYTES)
+    try:
+        start = int(f.read(TRAILER_BYTES), 16)
+    except ValueError:
+        return None
+    if not 0 <= start < size - TRAILER_BYTES:
+        return None
+    f.seek(start)
+    return _decode(f.read(size - TRAILER_BYTES - start))
+
+class Journal:
+    """
+    Journaled writes to one markdown file.
+    
+    Queue writes with ``append`` and ``patch`` and make them with
+    ``commit``, which syncs the whole batch to the journal once before
+    touching the file. The caller holds ``file_lock(file_path)``.
+    
+    Args:
+        file_path (str): Markdown file, created if missing
+    """
+    
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.path = journal_path_for(file_path)
+        self.created = not os.path.exists(file_path)
+        self.md = os.fdopen(os.open(file_path, os.O_RDWR | os.O_CREAT, 0o666), 'r+b')
+        stat = os.fstat(self.md.fileno())
+        self.ino = stat.st_ino
+        # Size of the file once the queued appends are made
+        self.size = stat.st_size
+        self.start_size = stat.st_size
+        self.journal = open(self.path, 'ab')
+        self.offset = self.journal.seek(0, os.SEEK_END)
+        self.start_offset = self.offset
+        self.pending_bytes = 0
+        self._records = []
+        self._writes = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        self.md.close()
+        self.journal.close()
+    
+    def append(self, data: bytes):
+        """Queue bytes to append to the file."""
+        self._records.append({"op": "append", "ino": self.ino, "at": self.size, "data": _text(data)})
+        self._writes.append((self.size, data))
+        self.size += len(data)
+        self.pending_bytes += len(data)
+    
+    def patch(self, edits: List[Tuple[int, int, bytes]]):
+        """Queue edits that keep their length, as (start, end, replacement)."""
+        self._records.append({"op": "patch", "ino": self.ino,
+                              "edits": [[start, _text(data)] for start, _, data in edits]})
+        self._writes.extend((start, data) for start, _, data in edits)
+        self.pending_bytes += sum(len(data) for _, _, data in edits)
+    
+    def _write_record(self, record: dict):
+        data = _encode(record, self.offset)
+        self.journal.write(data)
+        self.offset += len(data)
+    
+    def commit(self):
+        """Sync the queued records, make the writes and close the batch."""
+        if not self._writes:
+            return
+        for record in self._records:
+            self._write_record(record)
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        
+        for offset, data in self._writes:
+            self.md.seek(offset)
+            self.md.write(data)
+        self.md.flush()
+        stat = os.fstat(self.md.fileno())
+        self._write_record({"op": "commit", "ino": self.ino, "size": stat.st_size,
+                            "mtime_ns": stat.st_mtime_ns})
+        self.journal.flush()
+        self._records = []
+        self._writes = []
+        self.pending_bytes = 0
+        if self.offset >= JOURNAL_CHECKPOINT_BYTES:
+            self.checkpoint()
+    
+    def checkpoint(self):
+        """Sync the markdown file and empty the journal."""
+        self.md.flush()
+        os.fsync(self.md.fileno())
+        self.journal.truncate(0)
+        os.fsync(self.journal.fileno())
+        self.offset = self.start_offset = 0
+    
+    def rollback(self):
+        """Undo every write made through this journal, e.g. when an import fails."""
+        self._records = []
+        self._writes = []
+        self.pending_bytes = 0
+        if self.created:
+            self.close()
+            os.unlink(self.file_path)
+            os.unlink(self.path)
+            return
+        self.md.truncate(self.start_size)
+        self.md.flush()
+        os.fsync(self.md.fileno())
+        self.journal.truncate(self.start_offset)
+        os.fsync(self.journal.fileno())
+        self.offset = self.start_offset
+
+def journaled_append(file_path: str, data: bytes):
+    """
+    Append bytes to a markdown file through its journal.
+    
+    Args:
+        file_path (str): Markdown file, created if missing; the caller holds its write lock
+        data (bytes): Bytes to append
+    """
+    with Journal(file_path) as journal:
+        journal.append(data)
+        journal.commit()
+
+def journaled_patch(file_path: str, edits: List[Tuple[int, int, bytes]]):
+    """
+    Overwrite byte ranges of a markdown file through its journal.
+    
+    Args:
+        file_path (str): Markdown file; the caller holds its write lock
+        edits (List[Tuple[int, int, bytes]]): (start, end, replacement)
+            edits that keep their length
+    """
+    with Journal(file_path) as journal:
+        journal.patch(edits)
+        journal.commit()
+
+def needs_recovery(file_path: str) -> bool:
+    """
+    Check whether the last journaled batch of a file may be unfinished.
+    
+    Only the end of the journal is read. The file is clean when the last
+    record is a commit matching its inode, size and mtime.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    
+    Returns:
+        bool: True if ``recover`` should run
+    """
+    try:
+        with open(journal_path_for(file_path), 'rb') as f:
+            if not f.seek(0, os.SEEK_END):
+                return False
+            record = _last_record(f)
+    except OSError:
+        return False
+    if record is None or record.get("op") != "commit":
+        return True
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return True
+    return (record["ino"], record["size"], record["mtime_ns"]) != (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+def _replay(md, record: dict) -> int:
+    """Make the writes of one record that are missing from the file."""
+    if record["op"] == "append":
+        writes = [(record["at"], _bytes(record["data"]))]
+    elif record["op"] == "patch":
+        writes = [(start, _bytes(text)) for start, text in record["edits"]]
+    else:
+        return 0
+    size = md.seek(0, os.SEEK_END)
+    replayed = 0
+    for offset, data in writes:
+        # Without the bytes before it, there is nothing to write after
+        if offset > size:
+            continue
+        md.seek(offset)
+        if md.read(len(data)) != data:
+            md.seek(offset)
+            md.write(data)
+            size = max(size, offset + len(data))
+            replayed += 1
+    return replayed
+
+def recover(file_path: str) -> int:
+    """
+    Finish the journaled writes a crash left undone, then checkpoint.
+    
+    Records after the last commit belong to the batch that was in flight
+    and are always replayed. Every batch since the last checkpoint is
+    replayed, in order, when the file is shorter than at the last commit
+    without having been modified since, as happens when the system went
+    down before the file was synced; a file edited by hand is left as it
+    is. The journal is emptied afterwards.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    
+    Returns:
+        int: Number of byte ranges written back to the file
+    """
+    path = journal_path_for(file_path)
+    with file_lock(file_path):
+        try:
+            with open(path, 'rb') as f:
+                records = list(_iter_records(f))
+        except FileNotFoundError:
+            return 0
+        
+        replayed = 0
+        try:
+            md = open(file_path, 'r+b')
+        except FileNotFoundError:
+            # The file was moved away, e.g. by `peter migrate`
+            md = None
+        if md is not None:
+            with md:
+                stat = os.fstat(md.fileno())
+                commits = [i for i, record in enumerate(records) if record["op"] == "commit"]
+                in_flight = commits[-1] + 1 if commits else 0
+                last = records[commits[-1]] if commits else None
+                # Shorter than at the last commit but not modified since: the
+                # system went down before the appended tail reached the disk
+                lost = (last is not None and last["ino"] == stat.st_ino and stat.st_size < last["size"]
+                        and stat.st_mtime_ns <= last["mtime_ns"])
+                for record in records[0 if lost else in_flight:]:
+                    if record["ino"] == stat.st_ino:
+                        replayed += _replay(md, record)
+                md.flush()
+                os.fsync(md.fileno())
+        
+        with open(path, 'r+b') as f:
+            f.truncate(0)
+            os.fsync(f.fileno())
+    
+    if replayed:
+        print(f"🩹 Recovered {replayed} unfinished write(s) to {file_path} from {path}", file=sys.stderr)
+    return replayed
@@ -0,0 +1,187 @@
+# Advisory file locking shared by every reader and writer of peter.md
+#
+# Locks are taken on a sidecar ``.<name>.lock`` file rather than the markdown
+# file itself, because rewrites replace the markdown file with os.replace and
+# a lock on the old inode would no longer exclude anyone. Taking a lock is
+# also when a write left unfinished by a crash is recovered from the journal.
+import contextlib
+import os
+import tempfile
+import threading
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks on this platform; writers still replace atomically
+    fcntl = None
+
+# Locks the current thread already holds, so nested calls do not deadlock on
+# themselves: absolute markdown path -> (whether exclusive, nesting depth)
+_local = threading.local()
+
+def lock_path_for(file_path: str) -> str:
+    """
+    Return the lock file path for a markdown file.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    
+    Returns:
+        str: Path of the hidden ``.<name>.lock`` file next to it
+    """
+    directory, name = os.path.split(file_path)
+    return os.path.join(directory, f".{name}.lock")
+
+@contextlib.contextmanager
+def file_lock(file_path: str, exclusive: bool = True) -> Iterator[None]:
+    """
+    Hold an advisory lock on a markdown file.
+    
+    Writers take the exclusive lock and readers the shared one. Taking the
+    lock again inside a block that already holds it is a no-op, so a writer
+    may call readers such as ``load_todos`` while it holds the lock. Asking
+    for the exclusive lock inside a block holding only the shared one raises
+    ``RuntimeError``, since a no-op would let the caller write while other
+    readers hold the file. A reader that
+    cannot create the lock file, e.g. in a read-only directory, goes ahead
+    without it. Before the block runs, a journaled write that a crash left
+    unfinished is completed, briefly taking the exclusive lock if needed.
+    
+    Args:
+        file_path (str): Path to the markdown file
+        exclusive (bool): Exclusive (write) rather than shared (read) lock
+    """
+    held = getattr(_local, "held", None)
+    if held is None:
+        held = _local.held = {}
+    key = os.path.abspath(file_path)
+    if key in held:
+        held_exclusive, depth = held[key]
+        if exclusive and not held_exclusive:
+            raise RuntimeError(f"Cannot take the write lock on {file_path} inside a block holding its read lock")
+        held[key] = (held_exclusive, depth + 1)
+        try:
+            yield
+        finally:
+            held[key] = (held_exclusive, depth)
+        return
+    
+    if fcntl is None:
+        held[key] = (exclusive, 1)
+        try:
+            _recover(file_path, None, exclusive)
+            yield
+        finally:
+            del held[key]
+        return
+    
+    try:
+        fd = os.open(lock_path_for(file_path), os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        if exclusive:
+            raise
+        yield
+        return
+    
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        held[key] = (exclusive, 1)
+        try:
+            _recover(file_path, fd, exclusive)
+            yield
+        finally:
+            del held[key]
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
+
+@contextlib.contextmanager
+def read_lock(file_path: str) -> Iterator[None]:
+    """
+    Hold the shared lock of a markdown file without writing anything next to it.
+    
+    Unlike ``file_lock``, the lock file is only opened if it already exists
+    and the journal is never replayed, so reading another project's history
+    leaves its directory as it was. Without a lock file the block runs
+    unlocked, and a write that a crash left unfinished is read as it stands.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    """
+    fd = None
+    if fcntl is not None:
+        try:
+            fd = os.open(lock_path_for(file_path), os.O_RDONLY)
+        except OSError:
+            pass
+    try:
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+        yield
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+def _recover(file_path: str, fd, exclusive: bool):
+    """Replay the journal of a file if its last batch may be unfinished."""
+    # The journal takes this lock itself, so it is imported here
+    from .journal import needs_recovery, recover
+    if not needs_recovery(file_path):
+        return
+    if exclusive:
+        recover(file_path)
+        return
+    # Readers trade their shared lock for the exclusive one while replaying
+    key = os.path.abspath(file_path)
+    if fd is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    _local.held[key] = (True, 1)
+    try:
+        recover(file_path)
+    finally:
+        _local.held[key] = (False, 1)
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+
+@contextlib.contextmanager
+def atomic_replace(file_path: str, mode: str = 'w') -> Iterator:
+    """
+    Write a new version of a file and swap it in with ``os.replace``.
+    
+    Readers see either the old or the new file, never a partial one. The
+    permissions of an existing file are kept. If the block raises, the
+    original file is left untouched.
+    
+    Args:
+        file_path (str): File to replace
+        mode (str): ``'w'`` for text or ``'wb'`` for bytes
+    
+    Yields:
+        File object to write the new content to
+    """
+    directory = os.path.dirname(file_path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".peter-write-")
+    try:
+        if 'b' in mode:
+            f = os.fdopen(fd, mode)
+        else:
+            f = os.fdopen(fd, mode, encoding='utf-8')
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(file_path):
+            os.chmod(tmp_path, os.stat(file_path).st_mode & 0o7777)
+        else:
+            os.chmod(tmp_path, 0o666 & ~_umask())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def _umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
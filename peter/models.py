@@ -4,13 +4,13 @@ Data models for the peter todo application.
 from dataclasses import dataclass
 from typing import List, Dict, Any
 
-@dataclass
+@dataclass(slots=True)
 class Question:
     """Data class representing a question with priority."""
     question: str
     priority: int
 
-@dataclass
+@dataclass(slots=True)
 class Answer:
     """Data class representing an answer to a question with priority."""
     question: str
@@ -18,7 +18,7 @@ class Answer:
     priority: int
     completed: bool = False
 
-@dataclass
+@dataclass(slots=True)
 class Todo:
     """Data class representing a TODO item with completion status."""
     question: str
@@ -26,3 +26,8 @@ class Todo:
     priority: int
     completed: bool = False
     date: str = ""
+    offset: int = -1
+    id: str = ""
+    # Dates set on a todo that later duplicates were folded into, see peter.dedup
+    first_seen: str = ""
+    last_seen: str = ""
@@ -0,0 +1,156 @@
+# Chunked parallel parsing of very large peter.md files
+#
+# The file is memory-mapped and split at ``## `` date headers into roughly
+# equal byte ranges, the ranges are parsed in a process pool, and the results
+# are concatenated in file order. Chunks only start at a header whose date
+# differs from the header before it, so a date normally lies in one chunk and
+# its occurrence counts, and so its IDs, come out as in one pass. A date whose
+# sections come back in a later chunk has the IDs of its entries counted again
+# over the merged list.
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Set, Tuple
+from .models import Todo
+from .todo_manager import iter_todos_from_lines, todo_id
+
+# Chunks per worker, so a slow chunk does not leave the other workers idle
+CHUNKS_PER_WORKER = 4
+
+def _header_date(mm: mmap.mmap, pos: int) -> Tuple[Optional[str], int]:
+    """
+    Check the line starting at ``pos`` the same way the parser does.
+    
+    Returns:
+        Tuple[Optional[str], int]: Section date if the line is a ``## ``
+        header (else None), and the offset of the next line
+    """
+    end = mm.find(b"\n", pos)
+    end = len(mm) if end < 0 else end + 1
+    line = mm[pos:end].decode('utf-8').strip()
+    if line.startswith("## "):
+        return line[3:].strip(), end
+    return None, end
+
+def _next_header(mm: mmap.mmap, pos: int) -> Optional[Tuple[int, str]]:
+    """Find the first header line starting at or after ``pos``."""
+    while True:
+        found = mm.find(b"## ", pos)
+        if found < 0:
+            return None
+        line_start = mm.rfind(b"\n", 0, found) + 1
+        if line_start >= pos:
+            date, _ = _header_date(mm, line_start)
+            if date is not None:
+                return line_start, date
+        pos = found + 3
+
+def _previous_date(mm: mmap.mmap, pos: int) -> Optional[str]:
+    """Return the date of the last header before ``pos``, None if there is none."""
+    end = pos
+    while True:
+        found = mm.rfind(b"## ", 0, end)
+        if found < 0:
+            return None
+        line_start = mm.rfind(b"\n", 0, found) + 1
+        if line_start < pos:
+            date, line_end = _header_date(mm, line_start)
+            if date is not None and line_end <= pos:
+                return date
+        end = found
+
+def split_chunks(mm: mmap.mmap, chunks: int) -> List[Tuple[int, int]]:
+    """
+    Split a mapped file into byte ranges that can be parsed independently.
+    
+    Args:
+        mm (mmap.mmap): The whole markdown file
+        chunks (int): Number of ranges to aim for
+    
+    Returns:
+        List[Tuple[int, int]]: (start, end) ranges covering the file in order
+    """
+    size = len(mm)
+    starts = [0]
+    for i in range(1, chunks):
+        target = max(size * i // chunks, starts[-1] + 1)
+        if target >= size:
+            break
+        header = _next_header(mm, target)
+        previous = _previous_date(mm, header[0]) if header is not None else None
+        # Move on until the date changes, so a run of entries is never split
+        while header is not None and header[1] == previous:
+            previous = header[1]
+            header = _next_header(mm, _header_date(mm, header[0])[1])
+        if header is None:
+            break
+        if header[0] > starts[-1]:
+            starts.append(header[0])
+    return list(zip(starts, starts[1:] + [size]))
+
+def _iter_lines(mm: mmap.mmap, start: int, end: int) -> Iterator[bytes]:
+    mm.seek(start)
+    while mm.tell() < end:
+        yield mm.readline()
+
+def parse_chunk(file_path: str, start: int, end: int) -> List[tuple]:
+    """
+    Parse one byte range of a markdown file.
+    
+    Todos are returned as plain tuples, which cross the process boundary
+    much faster than Todo objects.
+    
+    Args:
+        file_path (str): Path to the markdown file
+        start (int): First byte of the range, at a line start
+        end (int): End of the range, at a line start or end of file
+    
+    Returns:
+        List[tuple]: Todo fields in ``Todo`` order
+    """
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return [(todo.question, todo.answer, todo.priority, todo.completed, todo.date, todo.offset, todo.id,
+                 todo.first_seen, todo.last_seen)
+                for todo in iter_todos_from_lines(_iter_lines(mm, start, end), start)]
+
+def parse_parallel(file_path: str, workers: int) -> List[Todo]:
+    """
+    Parse a markdown file in parallel chunks.
+    
+    The result is identical to ``parse_todos_from_markdown`` run serially.
+    
+    Args:
+        file_path (str): Path to the markdown file
+        workers (int): Worker processes
+    
+    Returns:
+        List[Todo]: Todos in file order
+    """
+    if os.path.getsize(file_path) == 0:
+        return []
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        ranges = split_chunks(mm, workers * CHUNKS_PER_WORKER)
+    
+    todos = []
+    seen = set()
+    repeated = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        starts, ends = zip(*ranges)
+        for chunk in pool.map(parse_chunk, [file_path] * len(ranges), starts, ends):
+            dates = {fields[4] for fields in chunk}
+            repeated |= dates & seen
+            seen |= dates
+            todos.extend(Todo(*fields) for fields in chunk)
+    if repeated:
+        _recount(todos, repeated)
+    return todos
+
+def _recount(todos: List[Todo], dates: Set[str]):
+    """Give the todos of dates found in several chunks their IDs over the whole file."""
+    occurrences = {}
+    for todo in todos:
+        if todo.date in dates:
+            key = (todo.date, todo.question, todo.answer, todo.priority)
+            occurrence = occurrences.get(key, 0)
+            occurrences[key] = occurrence + 1
+            todo.id = todo_id(todo, occurrence)
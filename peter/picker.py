@@ -0,0 +1,219 @@
+# Full-screen todo picker for `peter close`
+#
+# Only the rows in view are formatted on each redraw, reading their fields
+# from the todo list on demand, so the picker opens and scrolls at the same
+# speed with a hundred or a hundred thousand open todos. Typing filters by
+# question and answer text; while the filter grows, only the previous
+# matches are searched again. Only imported by `peter close` on a terminal.
+from typing import List, Optional, Sequence
+from prompt_toolkit.application import Application, get_app
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.key_binding import KeyBindings
+from prompt_toolkit.layout import BufferControl, FormattedTextControl, HSplit, Layout, Window
+from prompt_toolkit.styles import Style
+from .models import Todo
+
+# Lines taken by the title, the filter and the status line
+CHROME_LINES = 3
+
+HELP = "↑/↓ move · PgUp/PgDn page · Tab select · Ctrl-A select all matches · Enter close selected · Esc cancel"
+
+STYLE = Style.from_dict({
+    'title': 'bold fg:ansicyan',
+    'prompt': 'bold',
+    'cursor': 'reverse',
+    'selected': 'fg:ansigreen',
+    'status': 'fg:ansibrightblack',
+})
+
+class TodoFilter:
+    """
+    Incremental filter over the question and answer text of todos.
+    
+    A query matches todos containing each of its words, ignoring case.
+    Results for every step of the query typed so far are kept, so a longer
+    query narrows the last result and deleting characters reuses earlier ones.
+    
+    Args:
+        todos (Sequence[Todo]): Todos to filter, not copied
+    """
+    
+    def __init__(self, todos: Sequence[Todo]):
+        self.todos = todos
+        self._texts = None
+        # (query, positions in todos) for each step of the current query
+        self._steps = [("", range(len(todos)))]
+    
+    def _haystacks(self) -> List[str]:
+        # Built on the first keystroke, opening the picker never reads the text
+        if self._texts is None:
+            self._texts = [f"{todo.question}\n{todo.answer}".lower() for todo in self.todos]
+        return self._texts
+    
+    def matches(self, query: str) -> Sequence[int]:
+        """
+        Find the todos matching a query.
+        
+        Args:
+            query (str): Words typed into the filter
+        
+        Returns:
+            Sequence[int]: Positions in ``todos``, in order
+        """
+        query = " ".join(query.lower().split())
+        steps = self._steps
+        while len(steps) > 1 and not query.startswith(steps[-1][0]):
+            steps.pop()
+        last_query, result = steps[-1]
+        if query == last_query:
+            return result
+        texts = self._haystacks()
+        for term in query.split():
+            result = [position for position in result if term in texts[position]]
+        steps.append((query, result))
+        return result
+
+class TodoPicker:
+    """
+    Full-screen multi-select list of todos.
+    
+    Args:
+        todos (Sequence[Todo]): Todos in display order, e.g. TodoRow views
+        title (str): Heading shown above the filter
+    """
+    
+    def __init__(self, todos: Sequence[Todo], title: str = "Select TODOs to close"):
+        self.todos = todos
+        self.title = title
+        self.filter = TodoFilter(todos)
+        self.visible = self.filter.matches("")
+        # Positions in todos, kept while the filter changes
+        self.selected = set()
+        self.cursor = 0
+        self.top = 0
+        self.height = 1
+        self.buffer = Buffer(multiline=False, on_text_changed=self._refilter)
+    
+    def _refilter(self, _buffer: Buffer):
+        self.visible = self.filter.matches(self.buffer.text)
+        self.cursor = 0
+        self.top = 0
+    
+    def move(self, delta: int):
+        """Move the cursor, scrolling the window to keep it in view."""
+        if not self.visible:
+            return
+        self.cursor = max(0, min(len(self.visible) - 1, self.cursor + delta))
+        if self.cursor < self.top:
+            self.top = self.cursor
+        elif self.cursor >= self.top + self.height:
+            self.top = self.cursor - self.height + 1
+    
+    def toggle(self):
+        """Select or unselect the todo under the cursor."""
+        if self.visible:
+            self.selected ^= {self.visible[self.cursor]}
+    
+    def toggle_all(self):
+        """Select every match, or unselect them all if they already are."""
+        if self.selected.issuperset(self.visible):
+            self.selected.difference_update(self.visible)
+        else:
+            self.selected.update(self.visible)
+    
+    def chosen(self) -> List[Todo]:
+        """Return the selected todos in display order."""
+        return [self.todos[position] for position in sorted(self.selected)]
+    
+    def _rows(self):
+        size = get_app().output.get_size()
+        self.height = max(1, size.rows - CHROME_LINES)
+        # A resize can leave the cursor below the window
+        self.move(0)
+        fragments = []
+        for line, position in enumerate(self.visible[self.top:self.top + self.height], self.top):
+            todo = self.todos[position]
+            mark = "[x]" if position in self.selected else "[ ]"
+            text = f"{mark} P{todo.priority} {todo.date}  {todo.question} — {todo.answer}  ({todo.id})"
+            style = "class:cursor" if line == self.cursor else "class:selected" if position in self.selected else ""
+            fragments.append((style, text[:size.columns - 1].ljust(size.columns - 1) + "\n"))
+        if not self.visible:
+            fragments.append(("class:status", "No matching TODOs\n"))
+        return fragments
+    
+    def _status(self):
+        return [("class:status", f"{len(self.visible)}/{len(self.todos)} shown · {len(self.selected)} selected · {HELP}")]
+    
+    def _key_bindings(self) -> KeyBindings:
+        kb = KeyBindings()
+        
+        @kb.add("up")
+        def _(event):
+            self.move(-1)
+        
+        @kb.add("down")
+        def _(event):
+            self.move(1)
+        
+        @kb.add("pageup")
+        def _(event):
+            self.move(-self.height)
+        
+        @kb.add("pagedown")
+        def _(event):
+            self.move(self.height)
+        
+        @kb.add("tab")
+        def _(event):
+            self.toggle()
+            self.move(1)
+        
+        @kb.add("c-a")
+        def _(event):
+            self.toggle_all()
+        
+        # Only an explicit selection is closed, so a stray Enter closes nothing
+        @kb.add("enter")
+        def _(event):
+            if self.selected:
+                event.app.exit(result=self.chosen())
+        
+        @kb.add("escape", eager=True)
+        @kb.add("c-c")
+        def _(event):
+            event.app.exit(result=None)
+        
+        return kb
+    
+    def application(self, **kwargs) -> Application:
+        """
+        Build the full-screen application.
+        
+        Args:
+            **kwargs: Passed to ``Application``, e.g. ``input`` and ``output`` for tests
+        
+        Returns:
+            Application: Returns the chosen todos, or None if cancelled
+        """
+        layout = Layout(HSplit([
+            Window(FormattedTextControl([("class:title", f"📋 {self.title}")]), height=1),
+            Window(BufferControl(self.buffer, input_processors=[]), height=1,
+                   get_line_prefix=lambda line, wrap: [("class:prompt", "Filter: ")]),
+            Window(FormattedTextControl(self._rows), wrap_lines=False),
+            Window(FormattedTextControl(self._status), height=1),
+        ]), focused_element=self.buffer)
+        return Application(layout=layout, key_bindings=self._key_bindings(), style=STYLE,
+                           full_screen=True, **kwargs)
+
+def pick_todos(todos: Sequence[Todo], title: str = "Select TODOs to close") -> Optional[List[Todo]]:
+    """
+    Let the user pick todos in a full-screen list.
+    
+    Args:
+        todos (Sequence[Todo]): Todos in display order
+        title (str): Heading shown above the filter
+    
+    Returns:
+        Optional[List[Todo]]: Chosen todos, or None if cancelled
+    """
+    return TodoPicker(todos, title).application().run()
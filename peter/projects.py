@@ -0,0 +1,186 @@
+# Aggregation of peter histories across many project checkouts
+import hashlib
+import heapq
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .index import read_index
+from .locking import read_lock
+from .shards import SHARD_DIR, MANIFEST_FILE, shard_paths
+from .store import TodoRow, TodoStore
+from .todo_manager import iter_todos
+
+# Directories never searched for histories: VCS metadata, dependencies, build output
+PRUNE_DIRS = frozenset({
+    ".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv",
+    ".tox", ".nox", ".mypy_cache", ".pytest_cache", "build", "dist", "target",
+})
+
+# Per-root cache of parsed histories, one file per history, validated by
+# size and mtime
+CACHE_DIR = ".peter.recursive"
+CACHE_VERSION = 3
+
+def find_histories(root: str) -> List[Tuple[str, str]]:
+    """
+    Find the peter histories under a directory tree.
+    
+    A project has either a ``peter.md`` or a sharded ``peter.d/`` history.
+    Directories in ``PRUNE_DIRS`` are not descended into.
+    
+    Args:
+        root (str): Directory to search
+    
+    Returns:
+        List[Tuple[str, str]]: (project path relative to root, history file)
+        pairs in walk order
+    """
+    histories = []
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if name not in PRUNE_DIRS and name not in (SHARD_DIR, CACHE_DIR))
+        project = os.path.relpath(directory, root)
+        if "peter.md" in filenames:
+            histories.append((project, os.path.join(directory, "peter.md")))
+        shard_dir = os.path.join(directory, SHARD_DIR)
+        if os.path.exists(os.path.join(shard_dir, MANIFEST_FILE)):
+            histories.extend((project, path) for path in shard_paths(shard_dir))
+    return histories
+
+def _entry_path(root: str, key: str) -> str:
+    name = hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
+    return os.path.join(root, CACHE_DIR, f"{name}.idx")
+
+def _entry_header(key: str, st: os.stat_result) -> Dict[str, Any]:
+    return {"version": CACHE_VERSION, "key": key, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def _read_entry(root: str, key: str, st: os.stat_result) -> Optional[TodoStore]:
+    """Load the cached todos of one history, None if missing or stale."""
+    try:
+        with open(_entry_path(root, key), 'rb') as f:
+            # The header is checked before the todos are unpickled
+            if pickle.load(f) == _entry_header(key, st):
+                return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError, KeyError):
+        pass
+    return None
+
+def _write_entry(root: str, key: str, st: os.stat_result, store: TodoStore):
+    """Write one cache entry atomically; failures are ignored, it is an optimization only."""
+    try:
+        os.makedirs(os.path.join(root, CACHE_DIR), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(root, CACHE_DIR), prefix=".peter-recursive-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(_entry_header(key, st), f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(store, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, _entry_path(root, key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+
+def _prune_entries(root: str, keys: Iterable[str]):
+    """Remove the cache entries of histories that are gone."""
+    wanted = {os.path.basename(_entry_path(root, key)) for key in keys}
+    try:
+        names = os.listdir(os.path.join(root, CACHE_DIR))
+    except OSError:
+        return
+    for name in names:
+        if name.endswith(".idx") and name not in wanted:
+            try:
+                os.unlink(os.path.join(root, CACHE_DIR, name))
+            except OSError:
+                pass
+
+def load_read_only(file_path: str) -> TodoStore:
+    """
+    Load the todos of a history that may belong to another project.
+    
+    The project's own sidecar index is used while it is valid, otherwise the
+    file is parsed. Nothing is written next to the file: no index, lock or
+    journal file is created and no unfinished write is replayed.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    
+    Returns:
+        TodoStore: Todos with their status, in file order
+    """
+    with read_lock(file_path):
+        store = read_index(file_path)
+        if store is None:
+            store = TodoStore.from_todos(iter_todos(file_path))
+    return store
+
+def load_histories(root: str, workers: Optional[int] = None) -> List[Tuple[str, TodoStore]]:
+    """
+    Load every history under a tree, parsing changed files in parallel.
+    
+    Files whose size and mtime match their entry in the root's cache are
+    not opened at all. The others are loaded read-only with
+    ``load_read_only`` in a process pool, and only their cache entries are
+    written again.
+    
+    Args:
+        root (str): Directory to search
+        workers (Optional[int]): Worker processes, defaults to one per CPU
+    
+    Returns:
+        List[Tuple[str, TodoStore]]: (project path, todos) per history file
+    """
+    histories = find_histories(root)
+    
+    stores = {}
+    stale = []
+    for _, path in histories:
+        key = os.path.relpath(path, root)
+        # Stat before parsing, so a concurrent change leaves the entry stale
+        st = os.stat(path)
+        store = _read_entry(root, key, st)
+        if store is not None:
+            stores[key] = store
+        else:
+            stale.append((key, path, st))
+    
+    paths = [path for _, path, _ in stale]
+    if len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            loaded = list(pool.map(load_read_only, paths))
+    else:
+        loaded = [load_read_only(path) for path in paths]
+    for (key, _, st), store in zip(stale, loaded):
+        stores[key] = store
+        _write_entry(root, key, st, store)
+    
+    _prune_entries(root, stores)
+    return [(project, stores[os.path.relpath(path, root)]) for project, path in histories]
+
+def iter_ranked(histories: List[Tuple[str, TodoStore]], open_only: bool = False) -> Iterator[Tuple[str, TodoRow]]:
+    """
+    Merge histories into one stream ordered by priority and then date.
+    
+    Each file's rows are sorted on their own and the sorted runs are merged
+    lazily, as in ``peter close``. Todos answered "nothing" are skipped.
+    
+    Args:
+        histories (List[Tuple[str, TodoStore]]): Output of ``load_histories``
+        open_only (bool): Only open todos
+    
+    Yields:
+        Tuple[str, TodoRow]: (project path, todo), best first
+    """
+    def ranked(project, store):
+        if open_only:
+            rows = store.open_rows()
+        else:
+            empty = store.empty_answers
+            rows = [row for row, answer in enumerate(store.answer_codes) if answer not in empty]
+        for row in store.sorted_rows(rows):
+            yield project, store[row]
+    
+    return heapq.merge(*[ranked(project, store) for project, store in histories],
+                       key=lambda item: (item[1].priority, item[1].date))
@@ -0,0 +1,319 @@
+# Full-text search over todos with an inverted index
+#
+# The index is a SQLite sidecar (.peter.md.search.db) holding token -> todo
+# postings. It is built by the first search and then kept up to date by the
+# writers in todo_manager, which report appends, closes and rewrites here.
+import os
+import re
+import sqlite3
+from typing import Iterable, Iterator, List, Optional, Tuple
+from .locking import file_lock
+from .models import Todo
+from .todo_manager import iter_todos, iter_todos_from_lines, todo_id
+
+SCHEMA_VERSION = 2
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS docs (
+    doc INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS docs_id ON docs (id);
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    PRIMARY KEY (token, doc)
+) WITHOUT ROWID;
+"""
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search tokens.
+    
+    Args:
+        text (str): Question or answer text
+    
+    Returns:
+        List[str]: Distinct tokens in order of appearance
+    """
+    return list(dict.fromkeys(TOKEN_PATTERN.findall(text.lower())))
+
+def search_index_path(file_path: str) -> str:
+    """
+    Return the search index path for a markdown file.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    
+    Returns:
+        str: Path of the hidden ``.<name>.search.db`` file next to it
+    """
+    directory, name = os.path.split(file_path)
+    return os.path.join(directory, f".{name}.search.db")
+
+def file_state(file_path: str) -> Tuple[int, int]:
+    """
+    Return the size and mtime used to tell whether the index is in sync.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    
+    Returns:
+        Tuple[int, int]: (size, mtime_ns), or (-1, -1) if the file is missing
+    """
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return (-1, -1)
+    return (st.st_size, st.st_mtime_ns)
+
+def _connect(file_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(search_index_path(file_path))
+    conn.executescript(SCHEMA)
+    return conn
+
+def _indexed_state(conn: sqlite3.Connection) -> Optional[Tuple[int, int]]:
+    rows = dict(conn.execute("SELECT key, value FROM meta"))
+    if rows.get("version") != SCHEMA_VERSION or "size" not in rows:
+        return None
+    return (rows["size"], rows["mtime_ns"])
+
+def _set_state(conn: sqlite3.Connection, state: Tuple[int, int]):
+    conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                     [("version", SCHEMA_VERSION), ("size", state[0]), ("mtime_ns", state[1])])
+
+def _add_todos(conn: sqlite3.Connection, todos: Iterable[Todo]):
+    """Insert todos and their postings."""
+    for todo in todos:
+        cursor = conn.execute(
+            "INSERT INTO docs (id, date, priority, completed, question, answer) VALUES (?, ?, ?, ?, ?, ?)",
+            (todo.id, todo.date, todo.priority, int(todo.completed), todo.question, todo.answer))
+        doc = cursor.lastrowid
+        tokens = tokenize(f"{todo.question} {todo.answer}")
+        conn.executemany("INSERT OR IGNORE INTO postings (token, doc) VALUES (?, ?)",
+                         [(token, doc) for token in tokens])
+
+def _resolve_ids(conn: sqlite3.Connection, todos: Iterable[Todo]) -> Iterator[Todo]:
+    """
+    Give appended todos the IDs a full parse would.
+    
+    Occurrences count over every section of a date, so each todo skips the
+    occurrences its identical entries already hold in the index, including
+    those appended just before it.
+    """
+    for todo in todos:
+        occurrence = 0
+        while conn.execute("SELECT 1 FROM docs WHERE id = ? AND date = ? AND question = ? AND answer = ?"
+                           " AND priority = ?", (todo_id(todo, occurrence), todo.date, todo.question,
+                                                 todo.answer, todo.priority)).fetchone():
+            occurrence += 1
+        todo.id = todo_id(todo, occurrence)
+        yield todo
+
+def drop_search_index(file_path: str):
+    """
+    Remove the search index so the next search rebuilds it.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    """
+    index_file = search_index_path(file_path)
+    if os.path.exists(index_file):
+        os.unlink(index_file)
+
+def build_search_index(file_path: str):
+    """
+    Build the search index for a markdown file from scratch.
+    
+    The file is read under its shared lock, so a writer cannot change it
+    between taking its state and parsing it.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    """
+    with file_lock(file_path, exclusive=False):
+        drop_search_index(file_path)
+        state = file_state(file_path)
+        conn = _connect(file_path)
+        try:
+            with conn:
+                _add_todos(conn, iter_todos(file_path))
+                _set_state(conn, state)
+        finally:
+            conn.close()
+
+def _open_in_sync(file_path: str, before: Tuple[int, int]) -> Optional[sqlite3.Connection]:
+    """
+    Open an existing index that matched the file before a write.
+    
+    An index that was already out of sync is dropped instead, and the next
+    search rebuilds it.
+    """
+    if not os.path.exists(search_index_path(file_path)):
+        return None
+    conn = _connect(file_path)
+    if _indexed_state(conn) != before:
+        conn.close()
+        drop_search_index(file_path)
+        return None
+    return conn
+
+def record_append(file_path: str, before: Tuple[int, int]):
+    """
+    Index the entries a writer just appended to a markdown file.
+    
+    Only the bytes after the previous end of file are parsed.
+    
+    Args:
+        file_path (str): Path to the markdown file
+        before (Tuple[int, int]): ``file_state`` taken before the append
+    """
+    conn = _open_in_sync(file_path, before)
+    if conn is None:
+        return
+    try:
+        with conn:
+            with open(file_path, 'rb') as f:
+                f.seek(max(before[0], 0))
+                _add_todos(conn, _resolve_ids(conn, iter_todos_from_lines(f, max(before[0], 0))))
+            _set_state(conn, file_state(file_path))
+    finally:
+        conn.close()
+
+def record_completed(file_path: str, todos: Iterable[Todo], before: Tuple[int, int]):
+    """
+    Mark closed todos as completed in the index.
+    
+    Args:
+        file_path (str): Path to the markdown file
+        todos (Iterable[Todo]): Todos that were just closed
+        before (Tuple[int, int]): ``file_state`` taken before the write
+    """
+    conn = _open_in_sync(file_path, before)
+    if conn is None:
+        return
+    try:
+        with conn:
+            conn.executemany("UPDATE docs SET completed = 1 WHERE id = ?", [(todo.id,) for todo in todos])
+            _set_state(conn, file_state(file_path))
+    finally:
+        conn.close()
+
+def record_rewrite(file_path: str, before: Tuple[int, int]):
+    """
+    Bring the index in line with a rewrite of the whole markdown file.
+    
+    The rewritten file is parsed again, since a rewrite that regroups
+    sections moves entries, and one that drops entries renumbers the
+    identical ones after them. When its todos
+    are the indexed ones in the same order with some removed, completion
+    flags are updated in place and only the removed todos touch the
+    postings. Any other layout change rebuilds the index.
+    
+    Args:
+        file_path (str): Path to the markdown file
+        before (Tuple[int, int]): ``file_state`` taken before the rewrite
+    """
+    conn = _open_in_sync(file_path, before)
+    if conn is None:
+        return
+    try:
+        rewritten = list(iter_todos(file_path))
+        indexed = conn.execute("SELECT doc, id FROM docs ORDER BY doc").fetchall()
+        # Match the rewritten todos to the indexed rows in order; an ID fixes
+        # the date, question, answer and priority, so a match has the same text
+        kept = []
+        position = 0
+        for todo in rewritten:
+            while position < len(indexed) and indexed[position][1] != todo.id:
+                position += 1
+            if position == len(indexed):
+                break
+            kept.append((indexed[position][0], todo))
+            position += 1
+        if len(kept) != len(rewritten):
+            conn.close()
+            conn = None
+            build_search_index(file_path)
+            return
+        
+        with conn:
+            kept_docs = {doc for doc, _ in kept}
+            removed = [(doc,) for doc, _ in indexed if doc not in kept_docs]
+            conn.executemany("DELETE FROM postings WHERE doc = ?", removed)
+            conn.executemany("DELETE FROM docs WHERE doc = ?", removed)
+            conn.executemany("UPDATE docs SET completed = ? WHERE doc = ?",
+                             [(int(todo.completed), doc) for doc, todo in kept])
+            _set_state(conn, file_state(file_path))
+    finally:
+        if conn is not None:
+            conn.close()
+
+def search_todos(file_path: str, terms: Iterable[str], priority: Optional[int] = None,
+                 since: Optional[str] = None, until: Optional[str] = None,
+                 status: Optional[str] = None) -> List[Todo]:
+    """
+    Find todos whose question or answer contains every search term.
+    
+    The index is built on first use and rebuilt if the file changed behind
+    peter's back.
+    
+    Args:
+        file_path (str): Path to the markdown file
+        terms (Iterable[str]): Words that must all occur
+        priority (Optional[int]): Only todos with this priority
+        since (Optional[str]): Only todos dated on or after this date
+        until (Optional[str]): Only todos dated on or before this date
+        status (Optional[str]): "open" or "closed" to filter by completion
+    
+    Returns:
+        List[Todo]: Matching todos in file order
+    """
+    if not os.path.exists(file_path):
+        return []
+    
+    tokens = [token for term in terms for token in tokenize(term)]
+    # A writer could otherwise change the file between the state check and the query
+    with file_lock(file_path, exclusive=False):
+        conn = _connect(file_path)
+        try:
+            if _indexed_state(conn) != file_state(file_path):
+                conn.close()
+                build_search_index(file_path)
+                conn = _connect(file_path)
+            
+            clauses = []
+            params = []
+            if tokens:
+                clauses.append("doc IN (" + " INTERSECT ".join(["SELECT doc FROM postings WHERE token = ?"] * len(tokens)) + ")")
+                params.extend(tokens)
+            if priority is not None:
+                clauses.append("priority = ?")
+                params.append(priority)
+            if since is not None:
+                clauses.append("date >= ?")
+                params.append(since)
+            if until is not None:
+                clauses.append("date <= ?")
+                params.append(until)
+            if status == "open":
+                clauses.append("completed = 0 AND lower(answer) != 'nothing'")
+            elif status == "closed":
+                clauses.append("completed = 1")
+            
+            query = "SELECT question, answer, priority, completed, date, id FROM docs"
+            if clauses:
+                query += " WHERE " + " AND ".join(clauses)
+            query += " ORDER BY doc"
+            return [Todo(question, answer, priority, bool(completed), date, -1, doc_id)
+                    for question, answer, priority, completed, date, doc_id in conn.execute(query, params)]
+        finally:
+            conn.close()
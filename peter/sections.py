@@ -0,0 +1,448 @@
+# Date-section skip index for filtered queries
+#
+# The sidecar (.peter.md.sections) holds one summary per run of entries under
+# the same date: the byte offset of its first entry, how many entries and
+# open entries it has, and bitmasks of the priorities among them. Queries
+# filtered by date, priority or open state check the summaries first and
+# seek straight to the sections that can match, so the rest of the file is
+# never read. The writers in todo_manager keep the sidecar in step, like the
+# search index; any other change to the file shows up in its size or mtime
+# and the sidecar is rebuilt from ``load_todos``.
+import bisect
+import io
+import itertools
+import os
+import pickle
+import tempfile
+from array import array
+from datetime import date as _date
+from typing import Iterable, List, Optional, Tuple
+from .locking import file_lock
+from .models import Todo
+from .store import date_ordinal
+from .todo_manager import ParserState, iter_todos_from_lines
+from .trace import traced
+
+# Bump whenever the layout of the sidecar changes
+SECTIONS_VERSION = 2
+
+# Priorities below this get a bit of their own; any other priority sets the
+# top bit, so sections holding one are always read
+PRIORITY_BITS = 31
+
+def sections_path_for(file_path: str) -> str:
+    """
+    Return the skip index path for a markdown file.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    
+    Returns:
+        str: Path of the hidden ``.<name>.sections`` file next to it
+    """
+    directory, name = os.path.split(file_path)
+    return os.path.join(directory, f".{name}.sections")
+
+def priority_bit(priority: int) -> int:
+    return 1 << priority if 0 <= priority < PRIORITY_BITS else 1 << PRIORITY_BITS
+
+def is_open(todo: Todo) -> bool:
+    return not todo.completed and todo.answer.lower() != "nothing"
+
+def _file_state(file_path: str) -> Tuple[int, int]:
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return (-1, -1)
+    return (st.st_size, st.st_mtime_ns)
+
+def date_bounds(since: Optional[str], until: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Turn ``--since`` and ``--until`` values into day ordinals.
+    
+    Args:
+        since (Optional[str]): First day, YYYY-MM-DD
+        until (Optional[str]): Last day, YYYY-MM-DD
+    
+    Returns:
+        Tuple[Optional[int], Optional[int]]: Ordinals, None where not given
+    """
+    bounds = []
+    for name, value in (("--since", since), ("--until", until)):
+        ordinal = date_ordinal(value) if value is not None else None
+        if ordinal == 0:
+            raise ValueError(f"Invalid {name} date '{value}', expected YYYY-MM-DD")
+        bounds.append(ordinal)
+    return bounds[0], bounds[1]
+
+def todo_matches(todo: Todo, low: Optional[int] = None, high: Optional[int] = None,
+                 priority: Optional[int] = None, open_only: bool = False) -> bool:
+    """
+    Check one todo against the query filters.
+    
+    Todos whose date is not ISO formatted never match a date range, as in
+    ``peter stats``.
+    
+    Args:
+        todo (Todo): Todo to check
+        low (Optional[int]): First day ordinal, from ``date_bounds``
+        high (Optional[int]): Last day ordinal
+        priority (Optional[int]): Required priority
+        open_only (bool): Only open todos
+    
+    Returns:
+        bool: Whether the todo passes every filter
+    """
+    if priority is not None and todo.priority != priority:
+        return False
+    if open_only and not is_open(todo):
+        return False
+    if low is not None or high is not None:
+        ordinal = date_ordinal(todo.date)
+        if not ordinal or (low is not None and ordinal < low) or (high is not None and ordinal > high):
+            return False
+    return True
+
+class SectionIndex:
+    """
+    Per-section summaries of one markdown file.
+    
+    A section is a run of consecutive entries under the same date. Parsing
+    can start at its first entry, except that the occurrences behind the IDs
+    count over every section of a date: a section in ``repeats`` has a date
+    that an earlier section already had, and those are parsed first.
+    """
+    
+    __slots__ = ("size", "mtime_ns", "ordinals", "odd_dates", "starts", "counts", "open_counts",
+                 "priority_bits", "open_bits", "ordered", "repeats", "_dates", "_last_date")
+    
+    def __init__(self):
+        # File state the summaries describe
+        self.size = -1
+        self.mtime_ns = -1
+        # Dates are kept as ordinals; only those that do not round-trip
+        # through an ISO date are stored as text, by section
+        self.ordinals = array('i')
+        self.odd_dates = {}
+        self.starts = array('q')
+        self.counts = array('I')
+        self.open_counts = array('I')
+        self.priority_bits = array('I')
+        self.open_bits = array('I')
+        # Whether ordinals never decrease, so date ranges can be bisected
+        self.ordered = True
+        # Sections whose date already had a section, and every date seen
+        self.repeats = set()
+        self._dates = set()
+        self._last_date = None
+    
+    def __len__(self) -> int:
+        return len(self.starts)
+    
+    def add(self, todo: Todo):
+        """Add the next todo of the file, starting a section when its date changes."""
+        self.add_entry(todo.date, todo.offset, todo.priority, is_open(todo))
+    
+    def add_entry(self, date: str, offset: int, priority: int, entry_open: bool):
+        """Add the next entry by its fields, for callers reading store columns."""
+        bit = priority_bit(priority)
+        if date != self._last_date or not self.starts:
+            ordinal = date_ordinal(date)
+            if self.ordinals and ordinal < self.ordinals[-1]:
+                self.ordered = False
+            if not ordinal or _date.fromordinal(ordinal).isoformat() != date:
+                self.odd_dates[len(self.starts)] = date
+            if date in self._dates:
+                self.repeats.add(len(self.starts))
+            self._dates.add(date)
+            self._last_date = date
+            self.ordinals.append(ordinal)
+            self.starts.append(offset)
+            self.counts.append(0)
+            self.open_counts.append(0)
+            self.priority_bits.append(0)
+            self.open_bits.append(0)
+        self.counts[-1] += 1
+        self.priority_bits[-1] |= bit
+        if entry_open:
+            self.open_counts[-1] += 1
+            self.open_bits[-1] |= bit
+    
+    def truncate(self, sections: int):
+        """Drop every section from ``sections`` onwards."""
+        self._last_date = self.date(sections - 1) if sections > 0 else None
+        for section in range(sections, len(self)):
+            if section in self.repeats:
+                self.repeats.discard(section)
+            else:
+                self._dates.discard(self.date(section))
+        for section in [section for section in self.odd_dates if section >= sections]:
+            del self.odd_dates[section]
+        for column in (self.ordinals, self.starts, self.counts, self.open_counts, self.priority_bits, self.open_bits):
+            del column[sections:]
+    
+    def date(self, section: int) -> str:
+        """Return the date of a section as written in its header."""
+        date = self.odd_dates.get(section)
+        return date if date is not None else _date.fromordinal(self.ordinals[section]).isoformat()
+    
+    def end(self, section: int) -> int:
+        """Return the offset where a section's bytes end."""
+        return self.starts[section + 1] if section + 1 < len(self) else self.size
+    
+    def section_at(self, offset: int) -> int:
+        """Return the section holding the entry at a byte offset."""
+        return bisect.bisect_right(self.starts, offset) - 1
+    
+    def summarize(self, section: int, todos: Iterable[Todo]):
+        """Replace the summary of one section with one computed from its todos."""
+        count = open_count = bits = open_bits = 0
+        for todo in todos:
+            bit = priority_bit(todo.priority)
+            count += 1
+            bits |= bit
+            if is_open(todo):
+                open_count += 1
+                open_bits |= bit
+        self.counts[section] = count
+        self.open_counts[section] = open_count
+        self.priority_bits[section] = bits
+        self.open_bits[section] = open_bits
+    
+    def matching(self, low: Optional[int] = None, high: Optional[int] = None,
+                 priority: Optional[int] = None, open_only: bool = False) -> List[int]:
+        """
+        Find the sections that can hold todos passing the filters.
+        
+        Args:
+            low (Optional[int]): First day ordinal
+            high (Optional[int]): Last day ordinal
+            priority (Optional[int]): Required priority
+            open_only (bool): Only sections with open todos
+        
+        Returns:
+            List[int]: Section numbers in file order
+        """
+        ordinals = self.ordinals
+        first, last = 0, len(self)
+        if self.ordered:
+            # Undated sections have ordinal 0 and sort first
+            if low is not None or high is not None:
+                first = bisect.bisect_left(ordinals, low if low is not None else 1)
+            if high is not None:
+                last = bisect.bisect_right(ordinals, high, first)
+        sections = range(first, last)
+        if not self.ordered and (low is not None or high is not None):
+            sections = [section for section in sections
+                        if ordinals[section] and (low is None or ordinals[section] >= low)
+                        and (high is None or ordinals[section] <= high)]
+        if priority is not None:
+            bit = priority_bit(priority)
+            masks = self.open_bits if open_only else self.priority_bits
+            # Sections with unusual priorities keep the top bit and are always read
+            wanted = bit | (1 << PRIORITY_BITS)
+            return [section for section in sections if masks[section] & wanted]
+        if open_only:
+            open_counts = self.open_counts
+            return [section for section in sections if open_counts[section]]
+        return [section for section in sections if self.counts[section]]
+
+def _read_sections(file_path: str) -> Optional[SectionIndex]:
+    try:
+        with open(sections_path_for(file_path), 'rb') as f:
+            header = pickle.load(f)
+            if not isinstance(header, dict) or header.get("version") != SECTIONS_VERSION:
+                return None
+            index = pickle.load(f)
+            return index if isinstance(index, SectionIndex) else None
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError, KeyError, TypeError):
+        return None
+
+def _write_sections(file_path: str, index: SectionIndex):
+    """Write the sidecar atomically; failures are ignored, it is only a cache."""
+    try:
+        sections_file = sections_path_for(file_path)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(sections_file) or ".", prefix=".peter-sections-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump({"version": SECTIONS_VERSION}, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, sections_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+
+def drop_sections(file_path: str):
+    """
+    Remove the skip index so the next filtered query rebuilds it.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    """
+    try:
+        os.unlink(sections_path_for(file_path))
+    except FileNotFoundError:
+        pass
+
+def _parse_range(f, start: int, end: Optional[int], date: str,
+                 state: Optional[ParserState] = None) -> List[Todo]:
+    """
+    Parse the bytes from ``start`` to ``end`` (or EOF) as if from the entry at ``start``.
+    
+    The entries are parsed under a header line for ``date``, carrying on
+    from ``state`` when given.
+    """
+    f.seek(start)
+    data = f.read(end - start) if end is not None else f.read()
+    header = f"## {date}\n".encode('utf-8')
+    return list(iter_todos_from_lines(itertools.chain([header], io.BytesIO(data)), start - len(header), state))
+
+def _state_before(f, index: SectionIndex, first: int, last: int) -> Optional[ParserState]:
+    """
+    Count the entries of earlier sections sharing a date with sections ``first`` to ``last``.
+    
+    Returns:
+        Optional[ParserState]: State to parse the sections with, None when
+        none of their dates had an earlier section
+    """
+    dates = {index.date(section) for section in range(first, last + 1) if section in index.repeats}
+    if not dates:
+        return None
+    state = ParserState()
+    for section in range(first):
+        if index.date(section) in dates:
+            _parse_range(f, index.starts[section], index.end(section), index.date(section), state)
+    return state
+
+@traced("load_sections", count=None)
+def load_sections(file_path: str) -> SectionIndex:
+    """
+    Load the skip index of a markdown file, rebuilding it if it is stale.
+    
+    The caller holds at least a shared lock on ``file_path``.
+    
+    Args:
+        file_path (str): Path to the markdown file
+    
+    Returns:
+        SectionIndex: Summaries matching the current file
+    """
+    state = _file_state(file_path)
+    index = _read_sections(file_path)
+    if index is not None and (index.size, index.mtime_ns) == state:
+        return index
+    
+    # Rebuilt from the columns of the parsed store, not from the markdown
+    from .index import load_todos
+    store = load_todos(file_path)
+    index = SectionIndex()
+    dates = store._dates.values
+    empty = store.empty_answers
+    add_entry = index.add_entry
+    for date_code, offset, priority, done, answer_code in zip(
+            store.date_codes, store.offsets, store.priorities, store.completed, store.answer_codes):
+        add_entry(dates[date_code], offset, priority, not done and answer_code not in empty)
+    index.size, index.mtime_ns = state
+    _write_sections(file_path, index)
+    return index
+
+@traced("query")
+def query_todos(file_path: str, since: Optional[str] = None, until: Optional[str] = None,
+                priority: Optional[int] = None, open_only: bool = False) -> List[Todo]:
+    """
+    Find todos by date, priority and open state, reading only sections that can match.
+    
+    Args:
+        file_path (str): Path to the markdown file
+        since (Optional[str]): Only todos dated on or after this day (YYYY-MM-DD)
+        until (Optional[str]): Only todos dated on or before this day (YYYY-MM-DD)
+        priority (Optional[int]): Only todos with this priority
+        open_only (bool): Only open todos
+    
+    Returns:
+        List[Todo]: Matching todos in file order, with offsets and IDs
+    """
+    low, high = date_bounds(since, until)
+    if not os.path.exists(file_path):
+        return []
+    
+    todos = []
+    with file_lock(file_path, exclusive=False):
+        index = load_sections(file_path)
+        sections = index.matching(low, high, priority, open_only)
+        with open(file_path, 'rb') as f:
+            # Adjacent sections are read in one go
+            position = 0
+            while position < len(sections):
+                first = last = sections[position]
+                position += 1
+                while position < len(sections) and sections[position] == last + 1:
+                    last = sections[position]
+                    position += 1
+                state = _state_before(f, index, first, last)
+                for todo in _parse_range(f, index.starts[first], index.end(last), index.date(first), state):
+                    if todo_matches(todo, low, high, priority, open_only):
+                        todos.append(todo)
+    return todos
+
+def _open_in_sync(file_path: str, before: Tuple[int, int]) -> Optional[SectionIndex]:
+    """Load a skip index that matched the file before a write; drop one that did not."""
+    index = _read_sections(file_path)
+    if index is None:
+        return None
+    if (index.size, index.mtime_ns) != before:
+        drop_sections(file_path)
+        return None
+    return index
+
+def record_append(file_path: str, before: Tuple[int, int]):
+    """
+    Summarize the entries a writer just appended to a markdown file.
+    
+    The last section is parsed again, since the append may extend it; the
+    rest of the file is not read.
+    
+    Args:
+        file_path (str): Path to the markdown file
+        before (Tuple[int, int]): File state taken before the append
+    """
+    index = _open_in_sync(file_path, before)
+    if index is None:
+        return
+    last = len(index) - 1
+    start, date = (index.starts[last], index.date(last)) if last >= 0 else (0, "")
+    index.truncate(max(last, 0))
+    with open(file_path, 'rb') as f:
+        for todo in _parse_range(f, start, None, date):
+            index.add(todo)
+    index.size, index.mtime_ns = _file_state(file_path)
+    _write_sections(file_path, index)
+
+def record_edited(file_path: str, todos: Iterable[Todo], before: Tuple[int, int]):
+    """
+    Update the summaries of the sections holding todos that were just edited in place.
+    
+    Only those sections are parsed again. An edit that shifted the rest of
+    the file drops the skip index instead.
+    
+    Args:
+        file_path (str): Path to the markdown file
+        todos (Iterable[Todo]): Todos that were just edited, e.g. closed, with offsets
+        before (Tuple[int, int]): File state taken before the write
+    """
+    index = _open_in_sync(file_path, before)
+    if index is None:
+        return
+    after = _file_state(file_path)
+    if after[0] != before[0]:
+        drop_sections(file_path)
+        return
+    with open(file_path, 'rb') as f:
+        for section in sorted({index.section_at(todo.offset) for todo in todos}):
+            if section >= 0:
+                index.summarize(section, _parse_range(f, index.starts[section], index.end(section),
+                                                      index.date(section)))
+    index.size, index.mtime_ns = after
+    _write_sections(file_path, index)
@@ -0,0 +1,248 @@
+# Month-sharded storage for long peter.md histories
+import json
+import os
+from typing import Any, Dict, List
+from .index import index_path_for, load_todos
+from .locking import file_lock, atomic_replace
+from .todo_manager import iter_todos, format_entry
+
+SHARD_DIR = "peter.d"
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+def is_sharded(shard_dir: str = SHARD_DIR) -> bool:
+    """
+    Check whether the sharded layout is in use.
+    
+    Args:
+        shard_dir (str): Directory holding the shards
+    
+    Returns:
+        bool: True if the directory has a manifest
+    """
+    return os.path.exists(os.path.join(shard_dir, MANIFEST_FILE))
+
+def shard_name(date: str) -> str:
+    """
+    Return the shard file name for a section date.
+    
+    Args:
+        date (str): Date as written in a ``## `` header, e.g. 2026-10-17
+    
+    Returns:
+        str: Month shard such as ``2026-10.md``, or ``undated.md``
+    """
+    if len(date) >= 7 and date[4] == "-" and date[:4].isdigit() and date[5:7].isdigit():
+        return f"{date[:7]}.md"
+    return "undated.md"
+
+def shard_path_for(date: str, shard_dir: str = SHARD_DIR) -> str:
+    """
+    Return the path of the shard that entries for a date are appended to.
+    
+    Args:
+        date (str): Section date
+        shard_dir (str): Directory holding the shards
+    
+    Returns:
+        str: Path of the shard file
+    """
+    return os.path.join(shard_dir, shard_name(date))
+
+def shard_paths(shard_dir: str = SHARD_DIR) -> List[str]:
+    """
+    List every shard file in chronological order.
+    
+    Args:
+        shard_dir (str): Directory holding the shards
+    
+    Returns:
+        List[str]: Shard paths sorted by name
+    """
+    names = sorted(name for name in os.listdir(shard_dir) if name.endswith(".md") and not name.startswith("."))
+    return [os.path.join(shard_dir, name) for name in names]
+
+def load_manifest(shard_dir: str = SHARD_DIR) -> Dict[str, Any]:
+    """
+    Read the shard manifest.
+    
+    Args:
+        shard_dir (str): Directory holding the shards
+    
+    Returns:
+        Dict[str, Any]: Manifest with a record per shard, empty if unreadable
+    """
+    try:
+        with open(os.path.join(shard_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "shards": {}}
+
+def save_manifest(manifest: Dict[str, Any], shard_dir: str = SHARD_DIR):
+    """
+    Write the shard manifest atomically under its write lock.
+    
+    Args:
+        manifest (Dict[str, Any]): Manifest to write
+        shard_dir (str): Directory holding the shards
+    """
+    path = os.path.join(shard_dir, MANIFEST_FILE)
+    with file_lock(path), atomic_replace(path) as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def _merge_records(shard_dir: str, updated: Dict[str, Dict[str, Any]], removed: List[str]):
+    """
+    Store rebuilt shard records in the manifest.
+    
+    The manifest is read again under its write lock, so records saved by
+    another process in the meantime are kept. A rebuilt record is only
+    stored while its shard still has the size and mtime it was built from.
+    """
+    with file_lock(os.path.join(shard_dir, MANIFEST_FILE)):
+        manifest = load_manifest(shard_dir)
+        records = manifest["shards"]
+        for name in removed:
+            if not os.path.exists(os.path.join(shard_dir, name)):
+                records.pop(name, None)
+        for name, record in updated.items():
+            try:
+                st = os.stat(os.path.join(shard_dir, name))
+            except FileNotFoundError:
+                continue
+            if (record["size"], record["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+                records[name] = record
+        save_manifest(manifest, shard_dir)
+
+def _shard_record(path: str) -> Dict[str, Any]:
+    """Summarize one shard: stat fields, open/closed counts and date range."""
+    st = os.stat(path)
+    store = load_todos(path)
+    open_count = len(store.open_rows())
+    closed_count = sum(store.completed)
+    dates = [date for date in store.distinct_dates() if date]
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "open": open_count,
+        "closed": closed_count,
+        "first_date": min(dates) if dates else "",
+        "last_date": max(dates) if dates else "",
+    }
+
+def refresh_manifest(shard_dir: str = SHARD_DIR) -> Dict[str, Any]:
+    """
+    Bring the manifest up to date with the shard files.
+    
+    Only shards whose size or mtime changed since they were recorded are
+    re-read, so appends by ``peter run`` and in-place closes are picked up
+    without touching the other shards. The shards are read without the
+    manifest's lock, which is only taken to store the new records; if the
+    manifest cannot be written, the refreshed copy is still returned.
+    
+    Args:
+        shard_dir (str): Directory holding the shards
+    
+    Returns:
+        Dict[str, Any]: Current manifest
+    """
+    manifest = load_manifest(shard_dir)
+    records = manifest["shards"]
+    
+    paths = shard_paths(shard_dir)
+    names = {os.path.basename(path) for path in paths}
+    removed = [name for name in records if name not in names]
+    for name in removed:
+        del records[name]
+    
+    updated = {}
+    for path in paths:
+        name = os.path.basename(path)
+        record = records.get(name)
+        st = os.stat(path)
+        if record is None or record["size"] != st.st_size or record["mtime_ns"] != st.st_mtime_ns:
+            records[name] = updated[name] = _shard_record(path)
+    
+    if updated or removed:
+        try:
+            _merge_records(shard_dir, updated, removed)
+        except OSError:
+            # e.g. a read-only directory; the records are rebuilt next time
+            pass
+    return manifest
+
+def active_shard_paths(shard_dir: str = SHARD_DIR, open_only: bool = False) -> List[str]:
+    """
+    List the shards a command needs to read.
+    
+    Args:
+        shard_dir (str): Directory holding the shards
+        open_only (bool): Skip shards without open todos
+    
+    Returns:
+        List[str]: Shard paths in chronological order
+    """
+    records = refresh_manifest(shard_dir)["shards"]
+    return [os.path.join(shard_dir, name) for name in sorted(records)
+            if not open_only or records[name]["open"] > 0]
+
+def migrate_to_shards(source: str = "peter.md", shard_dir: str = SHARD_DIR) -> Dict[str, Any]:
+    """
+    Split a single peter.md into month shards in one streaming pass.
+    
+    The source file is renamed to ``<source>.migrated`` afterwards so it is
+    kept as a backup but no longer read.
+    
+    Args:
+        source (str): Existing single-file history
+        shard_dir (str): Directory to create the shards in
+    
+    Returns:
+        Dict[str, Any]: Manifest of the new shards
+    """
+    if is_sharded(shard_dir):
+        raise ValueError(f"{shard_dir} already holds a sharded history")
+    os.makedirs(shard_dir, exist_ok=True)
+    if shard_paths(shard_dir):
+        raise ValueError(f"{shard_dir} is not empty")
+    
+    # Hold the write lock so nothing is appended to the source mid-migration
+    with file_lock(source):
+        last_dates = {}
+        current_name = None
+        f = None
+        try:
+            for todo in iter_todos(source):
+                name = shard_name(todo.date)
+                if name != current_name:
+                    # Entries are mostly chronological, so keep one shard open at a time
+                    if f is not None:
+                        f.close()
+                    path = os.path.join(shard_dir, name)
+                    f = open(path, 'a', encoding='utf-8')
+                    if name not in last_dates:
+                        f.write("# Daily Todos\n\n")
+                        last_dates[name] = None
+                    current_name = name
+                if last_dates[name] != todo.date:
+                    f.write(f"## {todo.date}\n\n")
+                    last_dates[name] = todo.date
+                f.write(format_entry(todo))
+        finally:
+            if f is not None:
+                f.close()
+        
+        manifest = {"version": MANIFEST_VERSION, "shards": {}}
+        save_manifest(manifest, shard_dir)
+        manifest = refresh_manifest(shard_dir)
+        
+        if os.path.exists(source):
+            os.replace(source, source + ".migrated")
+            index_file = index_path_for(source)
+            if os.path.exists(index_file):
+                os.unlink(index_file)
+    
+    print(f"📦 Migrated {source} into {len(manifest['shards'])} shard(s) in {shard_dir}")
+    return manifest
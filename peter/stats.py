@@ -0,0 +1,177 @@
+# Completion statistics computed over the TodoStore columns
+#
+# The columns are aggregated with NumPy when it is installed, viewing the
+# ``array`` columns without copying them; otherwise the same group-bys run
+# through Counter and itertools.compress, which keep the per-row work in C.
+# Both backends produce identical results.
+import bisect
+import itertools
+import operator
+from collections import Counter
+from datetime import date as _date
+from typing import Any, Dict, Iterable, Optional
+from .store import TodoStore, date_ordinal
+from .trace import traced
+
+try:
+    import numpy as np
+except ImportError:
+    # Optional dependency; the array backend is slower but gives the same numbers
+    np = None
+
+# Open todo age buckets: a todo falls in the first bucket whose bound exceeds its age in days
+AGE_BOUNDS = (1, 7, 30, 90, 365)
+AGE_LABELS = ("under 1 day", "1-6 days", "7-29 days", "30-89 days", "90-364 days", "1 year or more")
+
+def _ordinal(value: Optional[str], name: str) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return _date.fromisoformat(value).toordinal()
+    except ValueError:
+        raise ValueError(f"Invalid {name} date '{value}', expected YYYY-MM-DD")
+
+def _column(column):
+    # Zero-copy view of an array column; the typecodes match NumPy's C type codes
+    return np.frombuffer(column, dtype=column.typecode) if len(column) else np.zeros(0, dtype=column.typecode)
+
+def _count_numpy(store: TodoStore, since: Optional[int], until: Optional[int], today: int) -> Dict[str, Any]:
+    """Group-by counts for one store using NumPy."""
+    priorities = _column(store.priorities)
+    completed = _column(store.completed).astype(bool)
+    ordinals = _column(store.ordinals)
+    keep = np.ones(len(store), dtype=bool)
+    if store.empty_answers:
+        keep &= ~np.isin(_column(store.answer_codes), np.fromiter(store.empty_answers, dtype=np.int64))
+    if since is not None:
+        keep &= ordinals >= since
+    if until is not None:
+        keep &= (ordinals <= until) & (ordinals > 0)
+    
+    counts = {}
+    values, totals = np.unique(priorities[keep], return_counts=True)
+    counts["total"] = Counter(dict(zip(values.tolist(), totals.tolist())))
+    values, done = np.unique(priorities[keep & completed], return_counts=True)
+    counts["completed"] = Counter(dict(zip(values.tolist(), done.tolist())))
+    
+    open_ordinals = ordinals[keep & ~completed & (ordinals > 0)]
+    ages = today - open_ordinals
+    buckets = np.bincount(np.searchsorted(AGE_BOUNDS, ages, side='right'), minlength=len(AGE_LABELS))
+    counts["ages"] = Counter({bucket: count for bucket, count in enumerate(buckets.tolist()) if count})
+    counts["oldest"] = int(ages.max()) if len(ages) else None
+    
+    dates = store.distinct_dates()
+    codes, per_day = np.unique(_column(store.date_codes)[keep], return_counts=True)
+    counts["days"] = Counter({dates[code]: count for code, count in zip(codes.tolist(), per_day.tolist())})
+    weeks, per_week = np.unique((ordinals[keep & (ordinals > 0)] - 1) // 7, return_counts=True)
+    counts["weeks"] = Counter(dict(zip(weeks.tolist(), per_week.tolist())))
+    
+    questions = store._questions.values
+    per_question = np.bincount(_column(store.question_codes)[keep], minlength=len(questions))
+    asked = np.flatnonzero(per_question)
+    counts["questions"] = Counter({questions[code]: count for code, count in zip(asked.tolist(), per_question[asked].tolist())})
+    return counts
+
+def _count_array(store: TodoStore, since: Optional[int], until: Optional[int], today: int) -> Dict[str, Any]:
+    """Group-by counts for one store using the ``array`` columns directly."""
+    compress = itertools.compress
+    if since is not None or until is not None:
+        # Test each distinct day once, then map rows through the set
+        low = since if since is not None else 0
+        allowed = {ordinal for ordinal in set(store.ordinals)
+                   if low <= ordinal and (until is None or 0 < ordinal <= until)}
+        in_range = map(allowed.__contains__, store.ordinals)
+    else:
+        in_range = itertools.repeat(True, len(store))
+    if store.empty_answers:
+        # True > False: in range and not answered "nothing"
+        keep = list(map(operator.gt, in_range, map(store.empty_answers.__contains__, store.answer_codes)))
+    else:
+        keep = list(in_range)
+    
+    counts = {}
+    counts["total"] = Counter(compress(store.priorities, keep))
+    counts["completed"] = Counter(compress(store.priorities, map(operator.and_, keep, store.completed)))
+    
+    # Everything per day is derived from one count per distinct date
+    dates = store.distinct_dates()
+    ordinal_of = [date_ordinal(date) for date in dates]
+    per_date = Counter(compress(store.date_codes, keep))
+    open_per_date = Counter(compress(store.date_codes, map(operator.gt, keep, store.completed)))
+    counts["days"] = Counter({dates[code]: count for code, count in per_date.items()})
+    weeks = Counter()
+    for code, count in per_date.items():
+        if ordinal_of[code]:
+            weeks[(ordinal_of[code] - 1) // 7] += count
+    counts["weeks"] = weeks
+    ages = Counter()
+    oldest = None
+    for code, count in open_per_date.items():
+        if ordinal_of[code]:
+            age = today - ordinal_of[code]
+            ages[bisect.bisect_right(AGE_BOUNDS, age)] += count
+            oldest = age if oldest is None else max(oldest, age)
+    counts["ages"] = ages
+    counts["oldest"] = oldest
+    
+    questions = store._questions.values
+    counts["questions"] = Counter({questions[code]: count for code, count in Counter(compress(store.question_codes, keep)).items()})
+    return counts
+
+@traced("aggregate", count=None)
+def compute_stats(stores: Iterable[TodoStore], since: Optional[str] = None, until: Optional[str] = None,
+                  top: int = 10, today: Optional[_date] = None, backend: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Aggregate completion statistics over one or more stores.
+    
+    Todos answered "nothing" are left out, as in ``peter status``. Todos
+    whose section date is not ISO formatted only count when no date range
+    is given, and never towards ages or weeks.
+    
+    Args:
+        stores (Iterable[TodoStore]): Stores from ``load_todos``, e.g. one per shard
+        since (Optional[str]): Only todos dated on or after this day (YYYY-MM-DD)
+        until (Optional[str]): Only todos dated on or before this day (YYYY-MM-DD)
+        top (int): Number of most frequent questions to report
+        today (Optional[date]): Reference day for ages, defaults to today
+        backend (Optional[str]): "numpy" or "array", defaults to NumPy when installed
+    
+    Returns:
+        Dict[str, Any]: ``backend``, ``total``, ``completed``, ``by_priority``
+        as (priority, total, completed) rows, ``open_ages`` as (label, count)
+        rows, ``oldest_open_days``, ``per_day`` and ``per_week`` as (date,
+        count) rows in date order, and ``top_questions`` as (question,
+        count) rows
+    """
+    if backend is None:
+        backend = "numpy" if np is not None else "array"
+    if backend == "numpy" and np is None:
+        raise ValueError("The numpy backend needs NumPy installed")
+    count = _count_numpy if backend == "numpy" else _count_array
+    low = _ordinal(since, "--since")
+    high = _ordinal(until, "--until")
+    reference = (today or _date.today()).toordinal()
+    
+    totals = {name: Counter() for name in ("total", "completed", "ages", "days", "weeks", "questions")}
+    oldest = None
+    for store in stores:
+        counts = count(store, low, high, reference)
+        if counts["oldest"] is not None:
+            oldest = counts["oldest"] if oldest is None else max(oldest, counts["oldest"])
+        for name, counter in totals.items():
+            counter.update(counts[name])
+    
+    return {
+        "backend": backend,
+        "total": sum(totals["total"].values()),
+        "completed": sum(totals["completed"].values()),
+        "by_priority": [(priority, total, totals["completed"][priority])
+                        for priority, total in sorted(totals["total"].items())],
+        "open_ages": [(label, totals["ages"][bucket]) for bucket, label in enumerate(AGE_LABELS)],
+        "oldest_open_days": oldest,
+        "per_day": sorted(totals["days"].items()),
+        "per_week": [(_date.fromordinal(week * 7 + 1).isoformat(), count)
+                     for week, count in sorted(totals["weeks"].items())],
+        # Ties keep first-seen order, like Counter.most_common
+        "top_questions": totals["questions"].most_common(top),
+    }
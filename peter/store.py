@@ -0,0 +1,276 @@
+# Compact columnar storage for parsed todos
+from array import array
+from datetime import date as _date
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from .models import Todo
+
+def date_ordinal(date: str) -> int:
+    """
+    Convert a section date to a day ordinal.
+    
+    Args:
+        date (str): Date as written in a ``## `` header
+    
+    Returns:
+        int: Proleptic Gregorian ordinal, or 0 if the date is not ISO formatted
+    """
+    try:
+        return _date.fromisoformat(date).toordinal()
+    except ValueError:
+        return 0
+
+class _Interner:
+    """Map repeated strings to small integer codes."""
+    
+    __slots__ = ("values", "codes")
+    
+    def __init__(self, values: Optional[List[str]] = None):
+        self.values = values if values is not None else []
+        # Built on first use, loading a cached store never needs it
+        self.codes = None
+    
+    def code(self, value: str) -> int:
+        if self.codes is None:
+            self.codes = {value: code for code, value in enumerate(self.values)}
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+class TodoRow:
+    """
+    Lightweight view of one row of a TodoStore.
+    
+    Exposes the same attributes as ``Todo``; setting ``completed`` writes
+    through to the store.
+    """
+    
+    __slots__ = ("_store", "_row")
+    
+    def __init__(self, store: "TodoStore", row: int):
+        self._store = store
+        self._row = row
+    
+    @property
+    def store(self) -> "TodoStore":
+        return self._store
+    
+    @property
+    def row(self) -> int:
+        return self._row
+    
+    @property
+    def question(self) -> str:
+        store = self._store
+        return store._questions.values[store.question_codes[self._row]]
+    
+    @property
+    def answer(self) -> str:
+        store = self._store
+        return store._answers.values[store.answer_codes[self._row]]
+    
+    @property
+    def priority(self) -> int:
+        return self._store.priorities[self._row]
+    
+    @property
+    def completed(self) -> bool:
+        return bool(self._store.completed[self._row])
+    
+    @completed.setter
+    def completed(self, value: bool):
+        self._store.completed[self._row] = 1 if value else 0
+    
+    @property
+    def date(self) -> str:
+        store = self._store
+        return store._dates.values[store.date_codes[self._row]]
+    
+    @property
+    def offset(self) -> int:
+        return self._store.offsets[self._row]
+    
+    @property
+    def id(self) -> str:
+        return f"{self._store.ids[self._row]:08x}"
+    
+    @property
+    def first_seen(self) -> str:
+        return self._store.seen.get(self._row, ("", ""))[0]
+    
+    @property
+    def last_seen(self) -> str:
+        return self._store.seen.get(self._row, ("", ""))[1]
+    
+    def to_todo(self) -> Todo:
+        """Materialize this row as a standalone Todo."""
+        return Todo(self.question, self.answer, self.priority, self.completed,
+                    self.date, self.offset, self.id, self.first_seen, self.last_seen)
+    
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (Todo, TodoRow)):
+            return (self.question, self.answer, self.priority, self.completed, self.date, self.offset, self.id,
+                    self.first_seen, self.last_seen) == \
+                (other.question, other.answer, other.priority, other.completed, other.date, other.offset, other.id,
+                 other.first_seen, other.last_seen)
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return f"TodoRow({self.to_todo()!r})"
+
+class TodoStore:
+    """
+    Columnar container for todos.
+    
+    Questions, answers and dates are interned and stored as integer codes;
+    priorities, completion flags, date ordinals, offsets and IDs live in
+    ``array`` columns. The first and last seen dates of the few todos that
+    have them are kept in a dict by row. Indexing or iterating yields
+    ``TodoRow`` views that behave like ``Todo`` objects.
+    """
+    
+    __slots__ = ("_questions", "_answers", "_dates", "question_codes", "answer_codes",
+                 "date_codes", "priorities", "completed", "ordinals", "offsets", "ids",
+                 "empty_answers", "seen")
+    
+    def __init__(self):
+        self._questions = _Interner()
+        self._answers = _Interner()
+        self._dates = _Interner()
+        self.question_codes = array('I')
+        self.answer_codes = array('I')
+        self.date_codes = array('I')
+        self.priorities = array('i')
+        self.completed = array('b')
+        self.ordinals = array('i')
+        self.offsets = array('q')
+        self.ids = array('I')
+        # Answer codes that spell "nothing", which never count as open
+        self.empty_answers = set()
+        # row -> (first seen, last seen), only for todos that have them
+        self.seen = {}
+    
+    @classmethod
+    def from_todos(cls, todos: Iterable[Todo]) -> "TodoStore":
+        """
+        Build a store from a stream of todos.
+        
+        Args:
+            todos (Iterable[Todo]): Todos, e.g. straight from ``iter_todos``
+        
+        Returns:
+            TodoStore: Store holding every todo in order
+        """
+        store = cls()
+        for todo in todos:
+            store.append(todo)
+        return store
+    
+    def append(self, todo: Todo):
+        """
+        Add a todo as a new row.
+        
+        Args:
+            todo (Todo): Todo to store
+        """
+        date_code = self._dates.code(todo.date)
+        answer_code = self._answers.code(todo.answer)
+        if todo.answer.lower() == "nothing":
+            self.empty_answers.add(answer_code)
+        self.question_codes.append(self._questions.code(todo.question))
+        self.answer_codes.append(answer_code)
+        self.date_codes.append(date_code)
+        self.priorities.append(todo.priority)
+        self.completed.append(1 if todo.completed else 0)
+        self.ordinals.append(date_ordinal(todo.date))
+        self.offsets.append(todo.offset)
+        if todo.first_seen or todo.last_seen:
+            self.seen[len(self.ids)] = (todo.first_seen, todo.last_seen)
+        self.ids.append(int(todo.id, 16) if todo.id else 0)
+    
+    def truncate(self, rows: int):
+        """
+        Drop every row from ``rows`` onwards.
+        
+        Interned strings are kept, so rows appended afterwards can reuse them.
+        
+        Args:
+            rows (int): Number of leading rows to keep
+        """
+        for name in ("question_codes", "answer_codes", "date_codes", "priorities",
+                     "completed", "ordinals", "offsets", "ids"):
+            del getattr(self, name)[rows:]
+        for row in [row for row in self.seen if row >= rows]:
+            del self.seen[row]
+    
+    def __len__(self) -> int:
+        return len(self.priorities)
+    
+    def __getitem__(self, row: int) -> TodoRow:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("TodoStore index out of range")
+        return TodoRow(self, row)
+    
+    def __iter__(self) -> Iterator[TodoRow]:
+        for row in range(len(self)):
+            yield TodoRow(self, row)
+    
+    def distinct_dates(self) -> List[str]:
+        """Return every section date that occurs in the store."""
+        return list(self._dates.values)
+    
+    def to_todos(self) -> List[Todo]:
+        """Materialize every row as a Todo object."""
+        return [row.to_todo() for row in self]
+    
+    def open_rows(self) -> List[int]:
+        """
+        Find rows of open todos using the columns only.
+        
+        A todo is open when it is not completed and its answer is not
+        "nothing", matching ``list_open_todos``.
+        
+        Returns:
+            List[int]: Row numbers of open todos in file order
+        """
+        empty = self.empty_answers
+        if not empty:
+            return [row for row, done in enumerate(self.completed) if not done]
+        return [row for row, (done, answer) in enumerate(zip(self.completed, self.answer_codes))
+                if not done and answer not in empty]
+    
+    def sorted_rows(self, rows: Iterable[int]) -> List[int]:
+        """
+        Order rows by priority (1 highest) and then by date (older first).
+        
+        Args:
+            rows (Iterable[int]): Row numbers to order
+        
+        Returns:
+            List[int]: Row numbers in display order
+        """
+        # Rank the distinct dates once, so the sort compares plain integers
+        rank = [0] * len(self._dates.values)
+        for position, code in enumerate(sorted(range(len(rank)), key=self._dates.values.__getitem__)):
+            rank[code] = position
+        priorities = self.priorities
+        date_codes = self.date_codes
+        return sorted(rows, key=lambda row: (priorities[row], rank[date_codes[row]]))
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        state = {name: getattr(self, name) for name in self.__slots__ if not name.startswith("_")}
+        state["questions"] = self._questions.values
+        state["answers"] = self._answers.values
+        state["dates"] = self._dates.values
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self._questions = _Interner(state.pop("questions"))
+        self._answers = _Interner(state.pop("answers"))
+        self._dates = _Interner(state.pop("dates"))
+        for name, value in state.items():
+            setattr(self, name, value)
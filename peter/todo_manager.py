@@ -1,23 +1,40 @@
 # Core todo management logic
+import contextlib
+import hashlib
+import heapq
 import os
 import re
 from datetime import datetime
-from prompt_toolkit import prompt
-from prompt_toolkit.formatted_text import HTML
-from prompt_toolkit.styles import Style
-from typing import List, Dict, Any
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from .models import Question, Answer, Todo
+from .store import TodoStore, date_ordinal
+from .locking import file_lock, atomic_replace
+from .trace import traced
 
-def process_todos(questions: List[Question]):
+def process_todos(questions: List[Question], output_file: str = "peter.md",
+                  history_files: Optional[List[str]] = None, dedup: Optional[str] = None):
     """
     Process todos by asking questions and saving responses.
     
+    All prompts share one PromptSession. Past answers are indexed on a
+    worker thread and offered as history and as completions for the same
+    question.
+    
     Args:
         questions (List[Question]): List of Question objects with priority
+        output_file (str): Markdown file to append the answers to
+        history_files (Optional[List[str]]): Files holding past answers,
+            defaults to ``output_file``
+        dedup (Optional[str]): Duplicate handling passed to ``save_todos_to_markdown``
     """
+    # Interactive only, keep prompt_toolkit out of the read-only commands
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.styles import Style
+    from .completion import AnswerHistory, AnswerIndex
+    
     # Get current date for filename
     today = datetime.now().strftime("%Y-%m-%d")
-    output_file = "peter.md"
     
     # Create styled prompt
     style = Style.from_dict({
@@ -26,6 +43,11 @@ def process_todos(questions: List[Question]):
         'date': 'bold fg:ansiyellow',
     })
     
+    # One session for every prompt, so the application and style are built once
+    answer_index = AnswerIndex(history_files if history_files is not None else [output_file])
+    history = AnswerHistory(answer_index)
+    session = PromptSession(style=style, history=history)
+    
     print(f"\n📝 Daily Todo Manager - {today}")
     print("=" * 50)
     print("Answer the following questions (press Ctrl+C to cancel):")
@@ -42,7 +64,7 @@ def process_todos(questions: List[Question]):
             print(f"Question {i}: {question_text}")
             
             # Prompt for priority with default value
-            priority_input = prompt(f"Priority (default {default_priority}): ", style=style)
+            priority_input = session.prompt(f"Priority (default {default_priority}): ", completer=None)
             
             # Use default priority if empty
             if not priority_input or not priority_input.strip():
@@ -58,7 +80,9 @@ def process_todos(questions: List[Question]):
             answer_number = 1
             while True:
                 # Get user answer
-                answer = prompt(f"Answer {answer_number}: ", style=style)
+                with history.recording():
+                    answer = session.prompt(f"Answer {answer_number}: ",
+                                            completer=answer_index.completer(question_text))
                 
                 # Handle empty input
                 if not answer or not answer.strip():
@@ -73,9 +97,9 @@ def process_todos(questions: List[Question]):
                 
                 # Ask if user wants to add another answer
                 if answer_number > 1:
-                    add_more = prompt("Add another answer? (y/n, default n): ", style=style)
+                    add_more = session.prompt("Add another answer? (y/n, default n): ", completer=None)
                 else:
-                    add_more = prompt("Add another answer? (y/n, default n): ", style=style)
+                    add_more = session.prompt("Add another answer? (y/n, default n): ", completer=None)
                 
                 # Default to yes if empty or invalid input
                 if add_more.lower().strip() in ['y', 'yes']:
@@ -99,11 +123,16 @@ def process_todos(questions: List[Question]):
             # answers.append(Answer(question_text, "nothing", default_priority))
     
     # Save to markdown file
-    save_todos_to_markdown(answers, today, output_file)
+    save_todos_to_markdown(answers, today, output_file, dedup=dedup, history_files=history_files)
     
     print(f"✅ Todos saved to {output_file}")
 
-def save_todos_to_markdown(answers: List[Answer], date: str, output_file: str):
+# What `dedup` does with an answer that is already open: warn, or fold it into the open todo
+DEDUP_MODES = ("flag", "fold")
+
+@traced("write", writes=lambda answers, date, output_file, dedup=None, history_files=None: output_file, count=None)
+def save_todos_to_markdown(answers: List[Answer], date: str, output_file: str, dedup: Optional[str] = None,
+                           history_files: Optional[List[str]] = None):
     """
     Save todos to markdown file.
     
@@ -111,17 +140,25 @@ def save_todos_to_markdown(answers: List[Answer], date: str, output_file: str):
         answers (List[Answer]): List of Answer objects
         date (str): Date string
         output_file (str): Output filename
+        dedup (Optional[str]): One of ``DEDUP_MODES``: ``"flag"`` to warn about
+            answers that are already open, ``"fold"`` to fold them into the
+            open todo instead
+        history_files (Optional[List[str]]): Files ``dedup`` looks for open
+            todos in, e.g. every shard; defaults to ``output_file``
     """
-    # Check if file exists and if we need to append or create new
-    file_exists = os.path.exists(output_file)
+    if dedup is not None:
+        from .dedup import dedup_answers, _lock_all
+        # Check and append under the locks, so the open todos cannot change in between
+        with contextlib.ExitStack() as stack:
+            _lock_all(stack, (history_files or []) + [output_file])
+            remaining = dedup_answers(answers, date, output_file, dedup, history_files)
+            if remaining:
+                save_todos_to_markdown(remaining, date, output_file)
+        return
     
     # Create markdown content
     content = []
     
-    if not file_exists:
-        content.append("# Daily Todos")
-        content.append("")
-    
     # Add date section
     content.append(f"## {date}")
     content.append("")
@@ -131,20 +168,237 @@ def save_todos_to_markdown(answers: List[Answer], date: str, output_file: str):
         content.append(f"- **Question**: {item.question}")
         content.append(f"  - **Answer**: {item.answer}")
         content.append(f"  - **Priority**: {item.priority}")
+        content.append(f"  - **Completed**: {item.completed}")
         content.append("")
     
-    # Write to file
-    with open(output_file, 'a', encoding='utf-8') as f:
-        f.write('\n'.join(content))
+    # Append through the journal under the write lock, keeping the search and
+    # skip indexes in sync. Whether the file needs its title is only known
+    # once the lock is held.
+    from .journal import journaled_append
+    from .search import file_state, record_append
+    from . import sections
+    with file_lock(output_file):
+        before = file_state(output_file)
+        if not os.path.exists(output_file):
+            content[:0] = ["# Daily Todos", ""]
+        journaled_append(output_file, '\n'.join(content).encode('utf-8'))
+        record_append(output_file, before)
+        sections.record_append(output_file, before)
     
     print(f"📝 Saved {len(answers)} todos for {date}")
 
-def parse_todos_from_markdown(file_path: str) -> List[Todo]:
+QUESTION_PREFIX = "- **Question**:"
+ANSWER_PREFIX = "- **Answer**:"
+PRIORITY_PREFIX = "- **Priority**:"
+COMPLETED_PREFIX = "- **Completed**:"
+# Set on a todo that duplicates were folded into; read into Todo.first_seen
+# and Todo.last_seen, and written back by every writer through format_entry
+FIRST_SEEN_PREFIX = "- **First seen**:"
+LAST_SEEN_PREFIX = "- **Last seen**:"
+
+def format_entry(todo: Todo) -> str:
+    """
+    Format one todo as a markdown entry, ending with a blank line.
+    
+    Args:
+        todo (Todo): Todo or TodoRow to write
+    
+    Returns:
+        str: Entry text including the first and last seen fields when set
+    """
+    lines = [f"{QUESTION_PREFIX} {todo.question}\n",
+             f"  {ANSWER_PREFIX} {todo.answer}\n",
+             f"  {PRIORITY_PREFIX} {todo.priority}\n",
+             f"  {COMPLETED_PREFIX} {todo.completed}\n"]
+    if todo.first_seen:
+        lines.append(f"  {FIRST_SEEN_PREFIX} {todo.first_seen}\n")
+    if todo.last_seen:
+        lines.append(f"  {LAST_SEEN_PREFIX} {todo.last_seen}\n")
+    lines.append("\n")
+    return "".join(lines)
+
+def todo_id(todo: Todo, occurrence: int = 0) -> str:
+    """
+    Derive the stable short ID of a todo from its content.
+    
+    The ID covers the date, question, answer and priority, but not the
+    completion status, so closing a todo keeps its ID. ``occurrence`` tells
+    identical entries under the same date apart, wherever in the file that
+    date's sections are.
+    
+    Args:
+        todo (Todo): Todo to identify
+        occurrence (int): How many identical entries of its date precede it
+            in the file
+        
+    Returns:
+        str: Eight hex character ID
+    """
+    key = f"{todo.date}\0{todo.question}\0{todo.answer}\0{todo.priority}\0{occurrence}"
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=4).hexdigest()
+
+@dataclass
+class ParserState:
+    """
+    Where a parse can be resumed after more lines are appended.
+    
+    ``resume_offset`` is the start of the last entry, which may still grow,
+    or -1 if the parse ended mid-line and cannot be resumed. The rest is the
+    occurrence count at that point: ``occurrences`` counts the identical
+    entries of the current ``date`` so far, ``bases`` holds the
+    occurrence-0 ID of each of its keys in the same order, and ``earlier``
+    holds, for every date whose run of entries has ended, the concatenated
+    occurrence-0 IDs of its entries, so a date that comes back later in the
+    file carries on counting.
+    """
+    date: str = ""
+    occurrences: Dict[Tuple[str, str, int], int] = field(default_factory=dict)
+    bases: List[str] = field(default_factory=list)
+    earlier: Dict[str, str] = field(default_factory=dict)
+    resume_offset: int = 0
+
+def _count_ids(ids: str) -> Dict[str, int]:
+    """Count the entries behind each occurrence-0 ID in an ``earlier`` value."""
+    counts = {}
+    for start in range(0, len(ids), 8):
+        base = ids[start:start + 8]
+        counts[base] = counts.get(base, 0) + 1
+    return counts
+
+def iter_todos(file_path: str, state: Optional[ParserState] = None) -> Iterator[Todo]:
+    """
+    Stream TODO entries from markdown file in a single pass.
+    
+    The file is read line by line and each entry is yielded as soon as the
+    next entry or date section starts, so memory use does not grow with the
+    size of the history. Each Todo records the byte offset of its
+    ``- **Question**:`` line and gets its ID from ``todo_id``.
+    
+    Args:
+        file_path (str): Path to the markdown file
+        state (Optional[ParserState]): Receives the resume point of the parse
+        
+    Yields:
+        Todo: Todo objects in file order
+    """
+    if not os.path.exists(file_path):
+        return
+    
+    with open(file_path, 'rb') as f:
+        yield from iter_todos_from_lines(f, 0, state)
+
+def iter_todos_from_lines(lines: Iterable[bytes], offset: int = 0,
+                          state: Optional[ParserState] = None) -> Iterator[Todo]:
+    """
+    Stream TODO entries from raw markdown lines.
+    
+    Args:
+        lines (Iterable[bytes]): Lines including their line endings
+        offset (int): Byte offset of the first line in its file
+        state (Optional[ParserState]): State to start from; updated with the
+            resume point once the lines are exhausted
+        
+    Yields:
+        Todo: Todo objects in order
+    """
+    if state is None:
+        state = ParserState()
+    current_date = state.date
+    pending = None
+    # Identical entries seen under the current date, for their IDs; the
+    # containers of ``state`` are copied, never changed in place
+    occurrences = dict(state.occurrences)
+    bases = list(state.bases)
+    earlier = dict(state.earlier)
+    prior = _count_ids(earlier[current_date]) if current_date in earlier else None
+    raw_line = b"\n"
+    
+    def finish(todo: Todo) -> Todo:
+        key = (todo.question, todo.answer, todo.priority)
+        occurrence = occurrences.get(key)
+        if occurrence is not None:
+            todo.id = todo_id(todo, occurrence)
+        else:
+            base = todo_id(todo)
+            occurrence = prior.get(base, 0) if prior else 0
+            todo.id = base if not occurrence else todo_id(todo, occurrence)
+            bases.append(base)
+        occurrences[key] = occurrence + 1
+        return todo
+    
+    def end_run():
+        """Fold the counts of the current date into ``earlier``."""
+        if not bases:
+            return
+        counts = zip(bases, occurrences.values())
+        if prior:
+            prior.update(counts)
+            counts = prior.items()
+        earlier[current_date] = "".join(base * count for base, count in counts)
+        occurrences.clear()
+        bases.clear()
+    
+    for raw_line in lines:
+        line_offset = offset
+        offset += len(raw_line)
+        line = raw_line.decode('utf-8').strip()
+        
+        # A date section or a new question closes the pending entry
+        if line.startswith("## "):
+            if pending is not None:
+                yield finish(pending)
+                pending = None
+            date = line[3:].strip()
+            if date != current_date:
+                end_run()
+                current_date = date
+                prior = _count_ids(earlier[date]) if date in earlier else None
+        elif line.startswith(QUESTION_PREFIX):
+            if pending is not None:
+                yield finish(pending)
+            question = line[len(QUESTION_PREFIX):].strip()
+            pending = Todo(question, "nothing", 999, False, current_date, line_offset)
+        elif pending is not None:
+            if line.startswith(ANSWER_PREFIX):
+                pending.answer = line[len(ANSWER_PREFIX):].strip()
+            elif line.startswith(PRIORITY_PREFIX):
+                pending.priority = int(line[len(PRIORITY_PREFIX):])
+            elif line.startswith(COMPLETED_PREFIX):
+                pending.completed = line[len(COMPLETED_PREFIX):].strip().lower() == "true"
+            elif line.startswith(FIRST_SEEN_PREFIX):
+                pending.first_seen = line[len(FIRST_SEEN_PREFIX):].strip()
+            elif line.startswith(LAST_SEEN_PREFIX):
+                pending.last_seen = line[len(LAST_SEEN_PREFIX):].strip()
+    
+    # Record the resume point before the last entry is counted
+    state.date = current_date
+    state.occurrences = dict(occurrences)
+    state.bases = list(bases)
+    state.earlier = dict(earlier)
+    if pending is not None:
+        state.resume_offset = pending.offset
+        yield finish(pending)
+    elif raw_line.endswith(b"\n"):
+        state.resume_offset = offset
+    else:
+        state.resume_offset = -1
+
+# Files smaller than this are always parsed serially; below it the process
+# pool costs more than it saves (see the parallel parse benchmark)
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+
+@traced("parse", reads=lambda file_path, workers=1: file_path)
+def parse_todos_from_markdown(file_path: str, workers: int = 1) -> List[Todo]:
     """
     Parse TODO entries from markdown file.
     
+    With ``workers`` above one, files of at least ``PARALLEL_MIN_BYTES`` are
+    split at date headers and parsed in a process pool. The result is the
+    same as the serial parse.
+    
     Args:
         file_path (str): Path to the markdown file
+        workers (int): Worker processes for large files
         
     Returns:
         List[Todo]: List of Todo objects with their status
@@ -152,57 +406,114 @@ def parse_todos_from_markdown(file_path: str) -> List[Todo]:
     if not os.path.exists(file_path):
         return []
     
-    todos = []
-    current_date = ""
+    with file_lock(file_path, exclusive=False):
+        if workers > 1 and os.path.getsize(file_path) >= PARALLEL_MIN_BYTES:
+            from .parallel import parse_parallel
+            return parse_parallel(file_path, workers)
+        return list(iter_todos(file_path))
+
+@traced("filter")
+def iter_open_todos(todos: Iterable[Todo]) -> Iterator[Todo]:
+    """
+    Lazily filter open (incomplete) TODOs from a stream.
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    A TodoStore is filtered over its columns and yields row views.
     
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        
-        # Check for date section
-        if line.startswith("## "):
-            current_date = line[3:].strip()
-        elif line.startswith("- **Question**:"):
-            # Parse a TODO entry
-            question = line[15:].strip()  # Remove "- **Question**: "
-            
-            # Look for answer and priority in following lines
-            answer = "nothing"
-            priority = 999 # default
-            completed = False
-            
-            # Check next lines for answer and priority
-            j = i + 1
-            while j < len(lines) and not lines[j].startswith("- **Question**:") and not lines[j].startswith("## "):
-                content_line = lines[j].strip()
-                if content_line.startswith("- **Answer**:"):
-                    answer = content_line[15:]  # Remove "- **Answer**: "
-                elif content_line.startswith("- **Priority**:"):
-                    priority = int(content_line[16:])  # Remove "- **Priority**: "
-                elif content_line.startswith("- **Completed**:"):
-                    completed = content_line[17:].strip().lower() == "true"
-                j += 1
-            todos.append(Todo(question, answer, priority, completed, current_date))
+    Args:
+        todos (Iterable[Todo]): Stream of TODO objects
         
-        i += 1
+    Yields:
+        Todo: Open TODO objects
+    """
+    if isinstance(todos, TodoStore):
+        for row in todos.open_rows():
+            yield todos[row]
+        return
     
-    return todos
+    # Filter out completed todos AND todos with empty answers ("nothing")
+    for todo in todos:
+        if not todo.completed and todo.answer.lower() != "nothing":
+            yield todo
 
+@traced("filter")
 def list_open_todos(todos: List[Todo]) -> List[Todo]:
     """
     Filter and return only open (incomplete) TODOs.
     
+    A TodoStore is filtered over its columns and returns row views.
+    
     Args:
         todos (List[Todo]): List of all TODO objects
         
     Returns:
         List[Todo]: List of open TODO objects
     """
-    # Filter out completed todos AND todos with empty answers ("nothing")
-    return [todo for todo in todos if not todo.completed and todo.answer.lower() != "nothing"]
+    if isinstance(todos, TodoStore):
+        return [todos[row] for row in todos.open_rows()]
+    return list(iter_open_todos(todos))
+
+# Orderings understood by top_todos
+TOP_ORDERS = ("priority", "age", "score")
+
+@traced("top_todos")
+def top_todos(todos: Iterable[Todo], k: int, order: str = "priority",
+              age_weight: float = 0.1, today: Optional[int] = None) -> List[Todo]:
+    """
+    Pick the k best todos from a stream without sorting all of them.
+    
+    The stream goes through a bounded heap, so this takes O(n log k) time
+    and O(k) memory. Feed it ``iter_open_todos`` to rank open todos. Orders:
+    
+    - ``priority``: priority (1 highest), then older first, as in ``peter close``
+    - ``age``: older first, then priority
+    - ``score``: priority minus ``age_weight`` per day open, lower first, so
+      a todo climbs one priority level every ``1 / age_weight`` days
+    
+    Ties keep stream order.
+    
+    Args:
+        todos (Iterable[Todo]): Todos to rank
+        k (int): Number of todos to return
+        order (str): One of ``TOP_ORDERS``
+        age_weight (float): Priority levels gained per day open, for ``score``
+        today (Optional[int]): Day ordinal to count days open from, for testing
+        
+    Returns:
+        List[Todo]: Up to k todos, best first
+    """
+    if order == "priority":
+        key = lambda todo: (todo.priority, todo.date)
+    elif order == "age":
+        key = lambda todo: (todo.date, todo.priority)
+    elif order == "score":
+        if today is None:
+            today = datetime.now().date().toordinal()
+        def key(todo):
+            ordinal = date_ordinal(todo.date)
+            days_open = today - ordinal if ordinal else 0
+            return (todo.priority - age_weight * days_open, todo.date)
+    else:
+        raise ValueError(f"Unknown order '{order}', expected one of {', '.join(TOP_ORDERS)}")
+    return heapq.nsmallest(k, todos, key=key)
+
+@traced("index_todos")
+def index_todos(todos: Iterable[Todo]) -> Dict[str, Optional[Todo]]:
+    """
+    Build an ID lookup table for todos.
+    
+    IDs are short hashes, so two different entries can in rare cases share
+    one; such IDs map to None and must not be used to select a todo.
+    
+    Args:
+        todos (Iterable[Todo]): Todos with IDs from the parser
+        
+    Returns:
+        Dict[str, Optional[Todo]]: Todo for each ID, None if ambiguous
+    """
+    index = {}
+    for todo in todos:
+        index[todo.id] = None if todo.id in index else todo
+    return index
 
 def mark_todo_completed(todos: List[Todo], index: int) -> List[Todo]:
     """
@@ -219,10 +530,16 @@ def mark_todo_completed(todos: List[Todo], index: int) -> List[Todo]:
         todos[index].completed = True
     return todos
 
+@traced("write", writes=lambda todos, output_file: output_file, rewrite=True, count=None)
 def save_todos_to_markdown_with_status(todos: List[Todo], output_file: str):
     """
     Save todos to markdown file with completion status.
     
+    The file is rewritten through a temporary file and ``os.replace`` under
+    the write lock. Callers that read the todos first should hold
+    ``file_lock(output_file)`` across the read as well, so entries appended
+    in between are not lost.
+    
     Args:
         todos (List[Todo]): List of Todo objects
         output_file (str): Output filename
@@ -235,21 +552,152 @@ def save_todos_to_markdown_with_status(todos: List[Todo], output_file: str):
             dated_todos[date] = []
         dated_todos[date].append(todo)
     
-    # Write to file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("# Daily Todos\n\n")
-        
-        # Write each date section
-        for date in sorted(dated_todos.keys()):
-            f.write(f"## {date}\n\n")
-            for todo in dated_todos[date]:
-                f.write(f"- **Question**: {todo.question}\n")
-                f.write(f"  - **Answer**: {todo.answer}\n")
-                f.write(f"  - **Priority**: {todo.priority}\n")
-                f.write(f"  - **Completed**: {todo.completed}\n\n")
+    # Write to file, keeping the search index in sync; section offsets all move
+    from .search import file_state, record_rewrite
+    from .sections import drop_sections
+    with file_lock(output_file):
+        before = file_state(output_file)
+        with atomic_replace(output_file) as f:
+            f.write("# Daily Todos\n\n")
+            
+            # Write each date section
+            for date in sorted(dated_todos.keys()):
+                f.write(f"## {date}\n\n")
+                for todo in dated_todos[date]:
+                    f.write(format_entry(todo))
+        record_rewrite(output_file, before)
+        drop_sections(output_file)
     
     print(f"📝 Updated todos saved to {output_file}")
 
+def _field_edit(f, todo: Todo, prefix: str, value: str) -> Optional[Tuple[int, int, bytes]]:
+    """
+    Work out the byte edit that sets one field line of an entry.
+    
+    Args:
+        f: Markdown file opened in binary mode
+        todo (Todo): Todo whose offset points at its question line
+        prefix (str): Field prefix such as ``COMPLETED_PREFIX``
+        value (str): New value of the field
+        
+    Returns:
+        Optional[Tuple[int, int, bytes]]: (start, end, replacement), or None
+        if the field already has this value
+    """
+    f.seek(todo.offset)
+    first_line = f.readline().decode('utf-8').strip()
+    if not first_line.startswith(QUESTION_PREFIX) or first_line[len(QUESTION_PREFIX):].strip() != todo.question:
+        raise ValueError(f"Entry at byte {todo.offset} no longer matches '{todo.question}'; re-read the file and try again")
+    
+    # Insert after the last field line of the block unless the field exists
+    insert_at = f.tell()
+    needs_newline = False
+    while True:
+        pos = f.tell()
+        raw_line = f.readline()
+        if not raw_line:
+            break
+        line = raw_line.decode('utf-8').strip()
+        if line.startswith("## ") or line.startswith(QUESTION_PREFIX):
+            break
+        if line.startswith(prefix):
+            if line[len(prefix):].strip().lower() == value.lower():
+                return None
+            # Overwrite just the value. A shorter one, such as True over
+            # False, is padded with spaces after the colon, which the parser
+            # strips, so the line keeps its length and no trailing space;
+            # a longer one shifts the rest of the file
+            value_start = pos + raw_line.index(b":") + 1
+            value_end = pos + len(raw_line.rstrip(b"\r\n"))
+            data = f" {value}".encode('utf-8').rjust(value_end - value_start)
+            return (value_start, value_end, data)
+        if line.startswith("- **"):
+            insert_at = pos + len(raw_line)
+            needs_newline = not raw_line.endswith(b"\n")
+    
+    field_line = f"  {prefix} {value}".encode('utf-8')
+    if needs_newline:
+        return (insert_at, insert_at, b"\n" + field_line)
+    return (insert_at, insert_at, field_line + b"\n")
+
+def _completion_edit(f, todo: Todo) -> Optional[Tuple[int, int, bytes]]:
+    """Work out the byte edit that marks one entry as completed, None if it already is."""
+    return _field_edit(f, todo, COMPLETED_PREFIX, "True")
+
+def _apply_edits(f, output_file: str, edits: List[Tuple[int, int, bytes]]):
+    """
+    Apply byte edits to an open markdown file under the write lock.
+    
+    Edits that keep their length are written in place through the journal.
+    Otherwise the patched file is written to a temporary file and swapped
+    in with ``os.replace``, so readers never see a half-shifted tail.
+    
+    Args:
+        f: Markdown file opened with ``'rb'``
+        output_file (str): Path of the file
+        edits (List[Tuple[int, int, bytes]]): Non-overlapping (start, end, replacement) edits
+    """
+    edits.sort()
+    if all(end - start == len(data) for start, end, data in edits):
+        from .journal import journaled_patch
+        journaled_patch(output_file, edits)
+        return
+    
+    # Copy the untouched prefix and patch the tail into a new file
+    first = edits[0][0]
+    with atomic_replace(output_file, 'wb') as out:
+        f.seek(0)
+        remaining = first
+        while remaining:
+            chunk = f.read(min(remaining, 1 << 16))
+            if not chunk:
+                break
+            out.write(chunk)
+            remaining -= len(chunk)
+        tail = f.read()
+        cursor = first
+        for start, end, data in edits:
+            out.write(tail[cursor - first:start - first])
+            out.write(data)
+            cursor = end
+        out.write(tail[cursor - first:])
+
+@traced("write", writes=lambda todos, output_file: output_file, count=None)
+def close_todos_in_place(todos: List[Todo], output_file: str):
+    """
+    Mark todos as completed by patching only their entries in the file.
+    
+    Entries that already have a ``- **Completed**:`` line are overwritten in
+    place without changing the file size. Entries without one get the line
+    inserted, in which case the patched file is written to a temporary file
+    and swapped in with ``os.replace``. Both happen under the write lock.
+    
+    Args:
+        todos (List[Todo]): Todos to close, with offsets from the parser
+        output_file (str): Markdown file the todos were read from
+    """
+    from .search import file_state, record_completed
+    from . import sections
+    with file_lock(output_file):
+        before = file_state(output_file)
+        with open(output_file, 'rb') as f:
+            edits = []
+            for todo in todos:
+                if todo.offset < 0:
+                    raise ValueError(f"Todo '{todo.question}' has no file offset")
+                edit = _completion_edit(f, todo)
+                if edit is not None:
+                    edits.append(edit)
+            if edits:
+                _apply_edits(f, output_file, edits)
+        
+        for todo in todos:
+            todo.completed = True
+        record_completed(output_file, todos, before)
+        sections.record_edited(output_file, todos, before)
+    
+    print(f"📝 Updated {len(edits)} todo(s) in {output_file}")
+
 def create_sample_config():
     """Create a sample .peter file for testing."""
     sample_content = """# Daily Todo Questions
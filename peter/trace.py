@@ -0,0 +1,373 @@
+# Opt-in per-phase tracing and profiling
+#
+# Enabled with ``peter --profile``, whose ``--profile-format`` (``summary``,
+# the default, ``json``, ``chrome`` or ``cprofile``) and ``--profile-output
+# FILE`` options also turn it on, or with the ``PETER_TRACE=MODE[:FILE]``
+# environment variable. Functions wrapped with ``traced`` record wall time,
+# bytes read and written and todo counts into nested spans. Only the thread
+# that started tracing records; other threads run traced code untimed. While
+# tracing is off a traced function costs one global check and an extra call,
+# and nothing is recorded.
+import atexit
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, TextIO, Tuple
+from . import IMPORT_STARTED
+
+TRACE_ENV = "PETER_TRACE"
+
+# Output modes, with the file each one writes when SPEC names none
+MODES = {"summary": None, "json": None, "chrome": "peter-trace.json", "cprofile": "peter.prof"}
+
+# The active tracer, None while tracing is off
+_tracer = None
+
+class Span:
+    """One timed phase with its counters."""
+    
+    __slots__ = ("tracer", "name", "path", "start", "elapsed", "resumed", "counts")
+    
+    def __init__(self, tracer: "Tracer", name: str, path: Tuple[str, ...]):
+        self.tracer = tracer
+        self.name = name
+        # Names of the enclosing spans and this one, outermost first
+        self.path = path
+        self.start = None
+        self.elapsed = 0.0
+        self.resumed = None
+        self.counts = {}
+    
+    def add(self, **counts: int):
+        """Add to this span's counters, e.g. ``add(todos=3)``."""
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+    
+    def __enter__(self) -> "Span":
+        self.tracer.resume(self)
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.tracer.pause(self)
+
+class _NullSpan:
+    """Stand-in returned by ``span`` while tracing is off."""
+    
+    __slots__ = ()
+    
+    def add(self, **counts: int):
+        pass
+    
+    def __enter__(self) -> "_NullSpan":
+        return self
+    
+    def __exit__(self, *exc_info):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class _StdoutMeter:
+    """Proxy for sys.stdout that books writes to the ``render`` span."""
+    
+    def __init__(self, tracer: "Tracer", stream: TextIO):
+        self._tracer = tracer
+        self._stream = stream
+        self._span = Span(tracer, "render", ("render",))
+    
+    def write(self, text: str) -> int:
+        self._tracer.resume(self._span, nested=False)
+        try:
+            return self._stream.write(text)
+        finally:
+            self._tracer.pause(self._span, nested=False)
+            self._span.add(bytes_written=len(text.encode('utf-8', 'replace')))
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+class Tracer:
+    """Collects spans for one process and reports them when finished."""
+    
+    def __init__(self, mode: str, output: Optional[str]):
+        self.mode = mode
+        self.output = output
+        self.spans = []
+        self.stack = []
+        self.thread = threading.get_ident()
+        self.profiler = None
+        self.stdout = None
+        # Everything before tracing started counts as import time
+        started = time.perf_counter()
+        imported = Span(self, "import", ("import",))
+        imported.start = IMPORT_STARTED
+        imported.elapsed = started - IMPORT_STARTED
+        self.spans.append(imported)
+    
+    def open(self, name: str) -> Span:
+        parent = self.stack[-1].path if self.stack else ()
+        return Span(self, name, parent + (name,))
+    
+    def resume(self, span: Span, nested: bool = True):
+        if threading.get_ident() != self.thread:
+            return
+        now = time.perf_counter()
+        if span.start is None:
+            span.start = now
+            self.spans.append(span)
+        span.resumed = now
+        if nested:
+            self.stack.append(span)
+    
+    def pause(self, span: Span, nested: bool = True):
+        if span.resumed is None:
+            return
+        span.elapsed += time.perf_counter() - span.resumed
+        span.resumed = None
+        if nested and self.stack and self.stack[-1] is span:
+            self.stack.pop()
+    
+    def call(self, name: str, fn: Callable, args: tuple, kwargs: Dict[str, Any],
+             reads: Optional[Callable], writes: Optional[Callable], rewrite: bool, count: Optional[str]) -> Any:
+        """Run a traced function inside a new span."""
+        span = self.open(name)
+        path = writes(*args, **kwargs) if writes else None
+        before = _size(path) if writes else 0
+        with span:
+            if reads:
+                span.add(bytes_read=_size(reads(*args, **kwargs)))
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                if writes:
+                    after = _size(path)
+                    span.add(bytes_written=after if rewrite else max(after - before, 0))
+        if count and hasattr(result, "__len__"):
+            span.add(**{count: len(result)})
+        return result
+    
+    def iterate(self, name: str, iterator: Iterator, count: Optional[str]) -> Iterator:
+        """Time a generator while it runs, not while its consumer does."""
+        if threading.get_ident() != self.thread:
+            yield from iterator
+            return
+        span = self.open(name)
+        span.start = time.perf_counter()
+        self.spans.append(span)
+        # Resume and pause are inlined, this loop runs once per item
+        stack = self.stack
+        clock = time.perf_counter
+        advance = iterator.__next__
+        items = 0
+        elapsed = 0.0
+        try:
+            while True:
+                stack.append(span)
+                started = clock()
+                try:
+                    item = advance()
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += clock() - started
+                    stack.pop()
+                items += 1
+                yield item
+        finally:
+            span.elapsed += elapsed
+            if count:
+                span.add(**{count: items})
+    
+    def start(self):
+        self.stdout = sys.stdout
+        sys.stdout = _StdoutMeter(self, sys.stdout)
+        if self.mode == "cprofile":
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+    
+    def finish(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        if isinstance(sys.stdout, _StdoutMeter):
+            sys.stdout = self.stdout
+        for span in reversed(self.stack):
+            self.pause(span)
+        total = time.perf_counter() - IMPORT_STARTED
+        
+        if self.mode == "json":
+            report = json.dumps(self.report(total), indent=2)
+            if self.output:
+                _write_text(self.output, report + "\n")
+            else:
+                print(report, file=sys.stderr)
+        elif self.mode == "chrome":
+            _write_text(self.output, json.dumps(self.chrome_trace()))
+            print(f"⏱️  Chrome trace written to {self.output} (open in chrome://tracing or ui.perfetto.dev)", file=sys.stderr)
+        else:
+            print_summary(self.report(total), sys.stderr)
+        if self.profiler is not None:
+            self.profiler.dump_stats(self.output)
+            print(f"🔬 cProfile stats written to {self.output} (python -m pstats {self.output})", file=sys.stderr)
+    
+    def report(self, total: float) -> Dict[str, Any]:
+        """
+        Aggregate spans by their nesting path.
+        
+        Returns:
+            Dict[str, Any]: ``total_ms`` and ``phases``, one entry per path in
+            order of first appearance with calls, wall time and counters
+        """
+        phases = {}
+        for span in sorted(self.spans, key=lambda span: span.start):
+            phase = phases.get(span.path)
+            if phase is None:
+                phase = phases[span.path] = {"name": span.name, "depth": len(span.path) - 1,
+                                             "calls": 0, "wall_ms": 0.0}
+            phase["calls"] += 1
+            phase["wall_ms"] += span.elapsed * 1000
+            for key, value in span.counts.items():
+                phase[key] = phase.get(key, 0) + value
+        for phase in phases.values():
+            phase["wall_ms"] = round(phase["wall_ms"], 3)
+        return {"total_ms": round(total * 1000, 3), "phases": list(phases.values())}
+    
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Render spans in the Chrome trace event format."""
+        pid = os.getpid()
+        events = [{"name": span.name, "cat": "peter", "ph": "X", "pid": pid, "tid": 0,
+                   "ts": round((span.start - IMPORT_STARTED) * 1e6, 1),
+                   "dur": round(span.elapsed * 1e6, 1), "args": span.counts}
+                  for span in self.spans]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def _size(path: Optional[str]) -> int:
+    try:
+        return os.path.getsize(path) if path else 0
+    except OSError:
+        return 0
+
+def _write_text(path: str, text: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+def print_summary(report: Dict[str, Any], stream: TextIO):
+    """
+    Print a report from ``Tracer.report`` as an indented table.
+    
+    Args:
+        report (Dict[str, Any]): Aggregated phases
+        stream (TextIO): Destination, normally stderr
+    """
+    print(f"\n⏱️  peter profile: {report['total_ms']:.1f} ms total", file=stream)
+    print(f"{'phase':<32} {'calls':>6} {'wall ms':>10} {'read':>12} {'written':>12} {'todos':>9}", file=stream)
+    for phase in report["phases"]:
+        name = "  " * phase["depth"] + phase["name"]
+        print(f"{name:<32} {phase['calls']:>6} {phase['wall_ms']:>10.2f} {phase.get('bytes_read', ''):>12} "
+              f"{phase.get('bytes_written', ''):>12} {phase.get('todos', ''):>9}", file=stream)
+
+def parse_spec(spec: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Parse a ``--profile`` or ``PETER_TRACE`` value.
+    
+    Args:
+        spec (str): ``MODE[:FILE]``; "1", "true" and "on" mean ``summary``
+    
+    Returns:
+        Optional[Tuple[str, Optional[str]]]: (mode, output file), or None
+        for an empty or "0" value
+    """
+    spec = spec.strip()
+    if spec.lower() in ("", "0", "false", "off", "no"):
+        return None
+    if spec.lower() in ("1", "true", "on", "yes"):
+        return "summary", None
+    mode, _, output = spec.partition(":")
+    mode = mode.lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown profile mode '{mode}', expected one of {', '.join(MODES)}")
+    return mode, output or MODES[mode]
+
+def start(spec: str) -> Optional[Tracer]:
+    """
+    Turn tracing on for the rest of the process.
+    
+    The report is written by ``finish``, which also runs at exit.
+    
+    Args:
+        spec (str): ``MODE[:FILE]``, see ``parse_spec``
+    
+    Returns:
+        Optional[Tracer]: The active tracer, None if ``spec`` turns tracing off
+    """
+    global _tracer
+    if _tracer is not None:
+        return _tracer
+    parsed = parse_spec(spec)
+    if parsed is None:
+        return None
+    _tracer = Tracer(*parsed)
+    _tracer.start()
+    atexit.register(finish)
+    return _tracer
+
+def finish():
+    """Stop tracing and write the report; does nothing if tracing is off."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.finish()
+
+def enabled() -> bool:
+    return _tracer is not None
+
+def span(name: str):
+    """
+    Time a block as a phase of its own.
+    
+    Returns:
+        Span: Context manager whose ``add`` records counters; a shared no-op
+        object while tracing is off
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.open(name)
+
+def traced(name: str, reads: Optional[Callable[..., str]] = None, writes: Optional[Callable[..., str]] = None,
+           rewrite: bool = False, count: Optional[str] = "todos") -> Callable:
+    """
+    Decorate a function so each call is recorded as a span.
+    
+    Args:
+        name (str): Phase name
+        reads (Optional[Callable[..., str]]): Takes the call's arguments and
+            returns the file whose size is booked as bytes read
+        writes (Optional[Callable[..., str]]): Likewise for the file written;
+            its growth is booked as bytes written
+        rewrite (bool): Book the whole size of the written file instead,
+            for functions that replace it
+        count (Optional[str]): Counter set to ``len()`` of the result, or
+            incremented per item for generators
+    
+    Returns:
+        Callable: Decorator
+    """
+    def decorate(fn: Callable) -> Callable:
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return fn(*args, **kwargs)
+                return _tracer.iterate(name, fn(*args, **kwargs), count)
+            return generator_wrapper
+        
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            return _tracer.call(name, fn, args, kwargs, reads, writes, rewrite, count)
+        return wrapper
+    return decorate
@@ -0,0 +1,104 @@
+# Test compaction into the archive
+import os
+import tempfile
+from datetime import date
+from peter.archive import compact_history, iter_archive_todos, archive_table_path
+from peter.todo_manager import save_todos_to_markdown, parse_todos_from_markdown, close_todos_in_place
+from peter.models import Answer
+
+def _write_history(directory):
+    output_file = os.path.join(directory, "peter.md")
+    save_todos_to_markdown([Answer('Question 1', 'Answer 1', 2), Answer('Question 2', 'Answer 2', 1)], "2026-01-01", output_file)
+    save_todos_to_markdown([Answer('Question 3', 'Answer 3', 2), Answer('Question 4', 'Answer 4', 1)], "2026-01-02", output_file)
+    save_todos_to_markdown([Answer('Question 5', 'Answer 5', 2)], "2026-01-20", output_file)
+    todos = parse_todos_from_markdown(output_file)
+    # 2026-01-01 fully completed, 2026-01-02 half completed, 2026-01-20 completed
+    close_todos_in_place([todos[0], todos[1], todos[2], todos[4]], output_file)
+    return output_file
+
+def test_compact_completed_sections():
+    """Test that only fully completed sections move to the archive."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _write_history(directory)
+        archive_file = os.path.join(directory, "peter.archive.md")
+        
+        stats = compact_history(output_file, archive_file)
+        assert stats == {"sections": 2, "todos": 3}
+        
+        hot = parse_todos_from_markdown(output_file)
+        assert [todo.question for todo in hot] == ['Question 3', 'Question 4']
+        archived = list(iter_archive_todos(archive_file))
+        assert [todo.question for todo in archived] == ['Question 1', 'Question 2', 'Question 5']
+        assert all(todo.completed for todo in archived)
+        print("✅ Compact sections test passed")
+
+def test_compact_older_than_days():
+    """Test that old completed entries move while open ones stay."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _write_history(directory)
+        archive_file = os.path.join(directory, "peter.archive.md")
+        
+        stats = compact_history(output_file, archive_file, days=10, today=date(2026, 1, 21))
+        assert stats == {"sections": 3, "todos": 4}
+        
+        hot = parse_todos_from_markdown(output_file)
+        assert [(todo.question, todo.date) for todo in hot] == [('Question 4', '2026-01-02')]
+        print("✅ Compact by age test passed")
+
+def test_compact_gzip_archive():
+    """Test gzip archives with a per-section offset table."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _write_history(directory)
+        archive_file = os.path.join(directory, "peter.archive.md.gz")
+        
+        compact_history(output_file, archive_file, compress=True)
+        assert os.path.exists(archive_table_path(archive_file))
+        
+        archived = list(iter_archive_todos(archive_file))
+        assert [todo.question for todo in archived] == ['Question 1', 'Question 2', 'Question 5']
+        
+        # The offset table lets readers skip whole sections
+        recent = list(iter_archive_todos(archive_file, since="2026-01-10"))
+        assert [todo.question for todo in recent] == ['Question 5']
+        
+        # A second compaction appends new members after the existing ones
+        save_todos_to_markdown([Answer('Question 6', 'Answer 6', 1)], "2026-01-21", output_file)
+        todo = parse_todos_from_markdown(output_file)[-1]
+        close_todos_in_place([todo], output_file)
+        compact_history(output_file, archive_file, compress=True)
+        archived = list(iter_archive_todos(archive_file))
+        assert [todo.question for todo in archived][-1] == 'Question 6'
+        print("✅ Gzip archive test passed")
+
+def test_compact_syncs_archive_before_swap(monkeypatch):
+    """Test that the archive and the compacted file are synced before the file is replaced."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _write_history(directory)
+        archive_file = os.path.join(directory, "peter.archive.md.gz")
+        events = []
+        fsync, replace = os.fsync, os.replace
+        
+        def record_fsync(fd):
+            events.append(("fsync", os.path.basename(os.readlink(f"/proc/self/fd/{fd}"))))
+            fsync(fd)
+        
+        def record_replace(src, dst):
+            events.append(("replace", os.path.basename(dst)))
+            replace(src, dst)
+        
+        monkeypatch.setattr(os, "fsync", record_fsync)
+        monkeypatch.setattr(os, "replace", record_replace)
+        compact_history(output_file, archive_file, compress=True)
+        
+        swap = events.index(("replace", "peter.md"))
+        assert events.index(("fsync", "peter.archive.md.gz")) < swap
+        assert events.index(("replace", os.path.basename(archive_table_path(archive_file)))) < swap
+        # The compacted file itself is synced before it is swapped in
+        assert events[swap - 1][0] == "fsync"
+        print("✅ Compact fsync order test passed")
+
+if __name__ == "__main__":
+    test_compact_completed_sections()
+    test_compact_older_than_days()
+    test_compact_gzip_archive()
+    print("All archive tests passed!")
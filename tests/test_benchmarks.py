@@ -0,0 +1,45 @@
+# Test the benchmark generator and runner
+import os
+import tempfile
+from benchmarks.generate import generate_peter_md, generate_config
+from benchmarks.run import run_benchmarks, compare, crossover
+from peter.config import load_config
+from peter.todo_manager import parse_todos_from_markdown
+
+def test_generate_peter_md():
+    """Test that generated histories parse back to the requested size."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        size = generate_peter_md(output_file, 100, todos_per_day=7)
+        
+        assert size == os.path.getsize(output_file)
+        todos = parse_todos_from_markdown(output_file)
+        assert len(todos) == 100
+        assert len({todo.date for todo in todos}) == 15
+        assert any(todo.completed for todo in todos)
+        assert any(not todo.completed for todo in todos)
+        
+        config_file = os.path.join(directory, ".peter")
+        generate_config(config_file)
+        assert len(load_config(config_file)) == 6
+        print("✅ Benchmark generator test passed")
+
+def test_run_benchmarks_report():
+    """Test a tiny benchmark run and baseline comparison."""
+    report = run_benchmarks([50], repeat=1)
+    
+    names = [result["name"] for result in report["results"]]
+    assert "parse_todos_from_markdown" in names
+    assert "cli close" in names
+    for result in report["results"]:
+        assert result["seconds"] >= 0
+        assert result["peak_bytes"] >= 0
+    
+    assert len(compare(report, report)) == len(names)
+    assert crossover(report)[-1].startswith("crossover:")
+    print("✅ Benchmark runner test passed")
+
+if __name__ == "__main__":
+    test_generate_peter_md()
+    test_run_benchmarks_report()
+    print("All benchmark tests passed!")
@@ -0,0 +1,65 @@
+# Test answer history and autocompletion for `peter run`
+import os
+import tempfile
+from prompt_toolkit.document import Document
+from peter.completion import AnswerHistory, AnswerIndex, AnswerTrie
+from peter.todo_manager import save_todos_to_markdown
+from peter.models import Answer
+
+def test_trie_matching():
+    """Test word-start prefixes, long prefixes, fuzzy fallback and ranking."""
+    trie = AnswerTrie()
+    trie.add("Ship the parser release", 1)
+    trie.add("Review parser PRs", 2)
+    trie.add("Write release notes", 3, count=4)
+    trie.add("Review parser PRs", 5)
+    
+    assert trie.complete("rev") == ["Review parser PRs"]
+    assert trie.complete("PARS") == ["Review parser PRs", "Ship the parser release"]
+    # Frequency first, then recency
+    assert trie.complete("rel") == ["Write release notes", "Ship the parser release"]
+    assert trie.complete("") == ["Write release notes", "Review parser PRs", "Ship the parser release"]
+    # Past the keyed characters, matches must still start at a word
+    assert trie.complete("parser re") == ["Ship the parser release"]
+    # No word starts with "hpr", but the letters appear in order
+    assert trie.complete("hpr") == ["Ship the parser release"]
+    assert trie.complete("zzz") == []
+    print("✅ Trie matching test passed")
+
+def test_index_and_history():
+    """Test building the index from history files and recording only answers."""
+    with tempfile.TemporaryDirectory() as directory:
+        old_file = os.path.join(directory, "old.md")
+        output_file = os.path.join(directory, "peter.md")
+        save_todos_to_markdown([Answer('Plans', 'Fix the flaky test', 1), Answer('Plans', 'nothing', 1)],
+                               "2026-01-01", old_file)
+        save_todos_to_markdown([Answer('Plans', 'Fix the build', 1), Answer('Wins', 'Fixed bugs', 2)],
+                               "2026-01-02", output_file)
+        save_todos_to_markdown([Answer('Plans', 'Fix the build', 1)], "2026-01-03", output_file)
+        
+        index = AnswerIndex([old_file, output_file])
+        assert index.ready.wait(10)
+        assert index.complete("Plans", "fix") == ["Fix the build", "Fix the flaky test"]
+        assert index.complete("Wins", "fix") == ["Fixed bugs"]
+        assert index.complete("Unknown", "fix") == []
+        assert index.recent == ["Fix the build", "Fixed bugs", "Fix the flaky test"]
+        
+        completions = list(index.completer("Plans").get_completions(Document("fla"), None))
+        assert [completion.text for completion in completions] == ["Fix the flaky test"]
+        assert completions[0].start_position == -3
+        
+        history = AnswerHistory(index)
+        history.append_string("2")
+        with history.recording():
+            history.append_string("Ship it")
+        assert history.get_strings() == ["Ship it"]
+        
+        missing = AnswerIndex([os.path.join(directory, "missing.md")])
+        assert missing.ready.wait(10)
+        assert missing.complete("Plans", "fix") == []
+        print("✅ Answer index test passed")
+
+if __name__ == "__main__":
+    test_trie_matching()
+    test_index_and_history()
+    print("All completion tests passed!")
@@ -0,0 +1,122 @@
+# Test the `peter serve` daemon and its thin client
+import asyncio
+import contextlib
+import os
+import tempfile
+import threading
+import time
+import peter.index
+from peter.client import send_command, socket_path, can_forward
+from peter.daemon import PeterDaemon
+from peter.todo_manager import save_todos_to_markdown, parse_todos_from_markdown
+from peter.models import Answer
+
+@contextlib.contextmanager
+def _running_daemon():
+    """Run a daemon for a fresh temporary directory in a background thread."""
+    with tempfile.TemporaryDirectory() as directory, contextlib.chdir(directory):
+        save_todos_to_markdown([
+            Answer('Question 1', 'Answer 1', 2),
+            Answer('Question 2', 'Answer 2', 1)
+        ], "2026-01-02", "peter.md")
+        
+        loop = asyncio.new_event_loop()
+        task = loop.create_task(PeterDaemon(".", poll_interval=0.05).serve())
+        def run():
+            with contextlib.suppress(asyncio.CancelledError):
+                loop.run_until_complete(task)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        
+        deadline = time.monotonic() + 5
+        while not os.path.exists(socket_path()):
+            assert time.monotonic() < deadline, "daemon did not start"
+            time.sleep(0.01)
+        try:
+            yield directory
+        finally:
+            loop.call_soon_threadsafe(task.cancel)
+            thread.join(5)
+            loop.close()
+            peter.index._resident = None
+
+def test_daemon_answers_list(capsys):
+    """Test that list output comes from the daemon and matches the CLI."""
+    with _running_daemon():
+        assert send_command(["list"]) == 0
+        output = capsys.readouterr().out
+        for todo in parse_todos_from_markdown("peter.md"):
+            assert f"ID: {todo.id}" in output
+        print("✅ Daemon list test passed")
+
+def test_daemon_close_and_add(capsys):
+    """Test that writes through the daemon land in peter.md and are seen next time."""
+    with _running_daemon():
+        todo = parse_todos_from_markdown("peter.md")[0]
+        assert send_command(["close", todo.id]) == 0
+        assert parse_todos_from_markdown("peter.md")[0].completed
+        
+        assert send_command(["add", "Question 3", "Answer 3", "--priority", "1"]) == 0
+        capsys.readouterr()
+        assert send_command(["status"]) == 0
+        output = capsys.readouterr().out
+        assert "[✅ Completed] Question 1" in output
+        assert "Answer: Answer 3" in output
+        print("✅ Daemon close and add test passed")
+
+def test_daemon_reports_errors(capsys):
+    """Test that a failing command keeps its message and exit code."""
+    with _running_daemon():
+        assert send_command(["close", "deadbeef"]) == 1
+        # Like click in-process, the message goes to stderr
+        assert "Unknown TODO ID: deadbeef" in capsys.readouterr().err
+        print("✅ Daemon error test passed")
+
+def test_daemon_uses_current_config(capsys):
+    """Test that add takes priorities from the daemon's copy of .peter, reloaded when it changes."""
+    with _running_daemon():
+        with open(".peter", 'w', encoding='utf-8') as f:
+            f.write("- Question 3 [priority:1]\n")
+        assert send_command(["add", "Question 3", "Answer 3"]) == 0
+        with open(".peter", 'w', encoding='utf-8') as f:
+            f.write("- Question 3 [priority:5]\n")
+        assert send_command(["add", "Question 3", "Answer 4"]) == 0
+        assert [todo.priority for todo in parse_todos_from_markdown("peter.md")[2:]] == [1, 5]
+        print("✅ Daemon config test passed")
+
+def test_daemon_relays_stderr(capsys):
+    """Test that what a command writes to stderr reaches the client's stderr."""
+    with _running_daemon():
+        assert send_command(["list", "--bogus"]) == 2
+        captured = capsys.readouterr()
+        assert "No such option '--bogus'" in captured.err
+        assert "--bogus" not in captured.out
+        print("✅ Daemon stderr test passed")
+
+def test_client_falls_back_without_daemon():
+    """Test that the client declines when no daemon is listening."""
+    with tempfile.TemporaryDirectory() as directory, contextlib.chdir(directory):
+        assert send_command(["list"]) is None
+        # A stale socket file from a dead daemon is ignored too
+        with open(socket_path(), 'w'):
+            pass
+        assert send_command(["list"]) is None
+        # Interactive close always runs in-process
+        assert send_command(["close"]) is None
+        print("✅ Client fallback test passed")
+
+def test_close_forwarded_only_with_ids():
+    """Test that option values of `close` are not taken for todo IDs."""
+    assert can_forward(["close", "abc123"])
+    assert can_forward(["close", "--limit", "5", "abc123"])
+    assert can_forward(["close", "--limit=5", "abc123"])
+    assert not can_forward(["close", "--limit", "5"])
+    assert not can_forward(["close", "--limit=5"])
+    assert not can_forward(["close"])
+    assert not can_forward(["close", "abc123", "--help"])
+    print("✅ Close forwarding test passed")
+
+if __name__ == "__main__":
+    test_client_falls_back_without_daemon()
+    test_close_forwarded_only_with_ids()
+    print("All daemon tests passed!")
@@ -0,0 +1,230 @@
+# Test duplicate detection, folding and the --dedup save modes
+import contextlib
+import os
+from datetime import datetime
+import tempfile
+from click.testing import CliRunner
+from peter.cli import cli
+from peter.dedup import find_duplicates, fold_duplicates, fold_lines, normalize
+from peter.index import load_todos
+from peter.sections import query_todos
+from peter.todo_manager import (save_todos_to_markdown, parse_todos_from_markdown, close_todos_in_place,
+                                save_todos_to_markdown_with_status, iter_todos)
+from peter.export import export_todos, import_todos, iter_jsonl
+from peter.shards import migrate_to_shards, shard_paths, shard_path_for
+from peter.models import Answer
+
+def _write_history(output_file):
+    save_todos_to_markdown([Answer('Plans', 'Write report', 1), Answer('Blocks', 'Waiting on QA', 2)],
+                           "2026-01-01", output_file)
+    save_todos_to_markdown([Answer('plans', '  write   REPORT ', 1)], "2026-01-02", output_file)
+    save_todos_to_markdown([Answer('Plans', 'Review PRs', 2), Answer('Blocks', 'waiting on qa', 2)],
+                           "2026-01-03", output_file)
+    save_todos_to_markdown([Answer('Plans', 'Write report', 1)], "2026-01-05", output_file)
+
+def test_find_and_fold_duplicates():
+    """Test grouping by normalized text, then folding into the oldest entry."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        _write_history(output_file)
+        assert normalize("  Write\tREPORT ") == "write report"
+        
+        # Stores and plain lists give the same groups
+        todos = parse_todos_from_markdown(output_file)
+        for source in (load_todos(output_file), todos):
+            groups = find_duplicates([(output_file, source)])
+            assert [[todo.date for _, todo in group.entries] for group in groups] == \
+                [["2026-01-01", "2026-01-02", "2026-01-05"], ["2026-01-01", "2026-01-03"]]
+        assert (groups[0].first_seen, groups[0].last_seen) == ("2026-01-01", "2026-01-05")
+        
+        # A closed todo is not a duplicate of an open one
+        close_todos_in_place([todos[1]], output_file)
+        groups = find_duplicates([(output_file, load_todos(output_file))])
+        assert len(groups) == 1
+        folded_groups = fold_duplicates([output_file])
+        assert [len(group.entries) for group in folded_groups] == [3]
+        
+        folded = parse_todos_from_markdown(output_file)
+        assert [(todo.date, todo.answer) for todo in folded] == \
+            [("2026-01-01", "Write report"), ("2026-01-01", "Waiting on QA"), ("2026-01-03", "Review PRs"),
+             ("2026-01-03", "waiting on qa")]
+        assert folded[0].id == todos[0].id
+        with open(output_file, encoding='utf-8') as f:
+            content = f.read()
+        assert "  - **First seen**: 2026-01-01\n  - **Last seen**: 2026-01-05\n" in content
+        # Sections left empty by the fold are gone
+        assert "## 2026-01-02" not in content and "## 2026-01-05" not in content
+        assert find_duplicates([(output_file, load_todos(output_file))]) == []
+        assert query_todos(output_file, open_only=True) == [todo for todo in folded if not todo.completed]
+        print("✅ Find and fold test passed")
+
+def test_fold_keeps_other_ids():
+    """Test that folding only renumbers a completed copy that followed a dropped entry."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        save_todos_to_markdown([Answer('Plans', 'Write report', 1)], "2026-01-01", output_file)
+        save_todos_to_markdown([Answer('Plans', 'Write report', 1), Answer('Plans', 'Write report', 1),
+                                Answer('Plans', 'Review PRs', 2)], "2026-01-02", output_file)
+        todos = parse_todos_from_markdown(output_file)
+        close_todos_in_place([todos[2]], output_file)
+        
+        assert [len(group.entries) for group in fold_duplicates([output_file])] == [2]
+        folded = parse_todos_from_markdown(output_file)
+        assert [(todo.answer, todo.completed) for todo in folded] == \
+            [("Write report", False), ("Write report", True), ("Review PRs", False)]
+        # The completed copy is now the first of its date and takes the dropped entry's ID
+        assert [todo.id for todo in folded] == [todos[0].id, todos[1].id, todos[3].id]
+        assert [todo.id for todo in load_todos(output_file)] == [todo.id for todo in folded]
+        print("✅ Fold ID test passed")
+
+def test_save_with_dedup_modes():
+    """Test that flag warns but appends and fold updates the open todo instead."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        _write_history(output_file)
+        before = parse_todos_from_markdown(output_file)
+        
+        save_todos_to_markdown([Answer('Plans', 'write report', 1)], "2026-01-06", output_file, dedup="flag")
+        assert len(parse_todos_from_markdown(output_file)) == len(before) + 1
+        
+        save_todos_to_markdown([Answer('Plans', 'Write report', 1), Answer('Plans', 'Ship it', 3),
+                                Answer('Plans', 'Ship  it', 3)], "2026-01-07", output_file, dedup="fold")
+        todos = parse_todos_from_markdown(output_file)
+        assert [todo.answer for todo in todos[len(before) + 1:]] == ["Ship it"]
+        with open(output_file, encoding='utf-8') as f:
+            content = f.read()
+        assert content.count("**Last seen**") == 1
+        assert "  - **First seen**: 2026-01-01\n  - **Last seen**: 2026-01-07\n" in content
+        
+        # Folding again moves Last seen without growing the file
+        size = os.path.getsize(output_file)
+        save_todos_to_markdown([Answer('Plans', 'Write report', 1)], "2026-01-08", output_file, dedup="fold")
+        assert os.path.getsize(output_file) == size
+        assert "**Last seen**: 2026-01-08" in open(output_file, encoding='utf-8').read()
+        assert query_todos(output_file, open_only=True) == [todo for todo in parse_todos_from_markdown(output_file)
+                                                             if not todo.completed]
+        print("✅ Save with dedup test passed")
+
+def test_fold_rechecks_entries():
+    """Test that folding works on the file as it is under the lock and never drops a moved entry."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        _write_history(output_file)
+        listed = find_duplicates([(output_file, load_todos(output_file))])
+        
+        # Another peter rewrites the file after the duplicates were listed
+        todos = parse_todos_from_markdown(output_file)
+        save_todos_to_markdown_with_status(todos[:3] + [todos[4], todos[3]] + todos[5:], output_file)
+        with open(output_file, 'rb') as f:
+            content = f.read()
+        # Offsets from before the rewrite no longer start entries
+        drop = {todo.offset: todo for _, todo in listed[1].entries[1:]}
+        try:
+            with open(output_file, 'rb') as f:
+                list(fold_lines(f, drop, {}))
+            assert False, "folded with stale offsets"
+        except ValueError as e:
+            assert "No entry starts at byte" in str(e)
+        # An offset that starts a different entry is refused too
+        moved = parse_todos_from_markdown(output_file)
+        try:
+            with open(output_file, 'rb') as f:
+                list(fold_lines(f, {moved[3].offset: moved[4]}, {}))
+            assert False, "folded a moved entry"
+        except ValueError as e:
+            assert "no longer matches" in str(e)
+        assert open(output_file, 'rb').read() == content
+        
+        # fold_duplicates finds them again where they are now
+        fold_duplicates([output_file])
+        assert [(todo.date, todo.answer) for todo in parse_todos_from_markdown(output_file)] == \
+            [("2026-01-01", "Write report"), ("2026-01-01", "Waiting on QA"), ("2026-01-03", "Review PRs")]
+        print("✅ Fold recheck test passed")
+
+def test_fold_keeps_earlier_first_seen():
+    """Test that answering again keeps a First seen older than the entry's date."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write("# Daily Todos\n\n## 2026-01-05\n\n- **Question**: Plans\n  - **Answer**: Write report\n"
+                    "  - **Priority**: 1\n  - **Completed**: False\n  - **First seen**: 2025-12-01\n"
+                    "  - **Last seen**: 2026-01-06\n\n")
+        save_todos_to_markdown([Answer('Plans', 'write report', 1)], "2026-01-09", output_file, dedup="fold")
+        todo, = parse_todos_from_markdown(output_file)
+        assert (todo.first_seen, todo.last_seen) == ("2025-12-01", "2026-01-09")
+        print("✅ Earlier first seen test passed")
+
+def test_dedup_across_shards():
+    """Test that a repeat of a todo open in an earlier month's shard is found."""
+    with tempfile.TemporaryDirectory() as directory, contextlib.chdir(directory):
+        _write_history("peter.md")
+        migrate_to_shards("peter.md")
+        result = CliRunner().invoke(cli, ["add", "Blocks", "waiting on QA", "--dedup", "fold"])
+        assert result.exit_code == 0, result.output
+        assert "Folded into" in result.output
+        today = datetime.now().strftime("%Y-%m-%d")
+        assert not os.path.exists(shard_path_for(today))
+        first = parse_todos_from_markdown(shard_path_for("2026-01-01"))[1]
+        assert (first.answer, first.first_seen, first.last_seen) == ("Waiting on QA", "2026-01-01", today)
+        print("✅ Dedup across shards test passed")
+
+def test_seen_dates_survive_rewrites():
+    """Test that first and last seen are parsed and kept by rewrites, migrate and export/import."""
+    with tempfile.TemporaryDirectory() as directory, contextlib.chdir(directory):
+        _write_history("peter.md")
+        fold_duplicates(["peter.md"])
+        seen = [(todo.answer, todo.first_seen, todo.last_seen) for todo in parse_todos_from_markdown("peter.md")]
+        assert seen[0] == ("Write report", "2026-01-01", "2026-01-05")
+        assert seen[2] == ("Review PRs", "", "")
+        assert [(todo.first_seen, todo.last_seen) for todo in load_todos("peter.md")] == [row[1:] for row in seen]
+        
+        save_todos_to_markdown_with_status(parse_todos_from_markdown("peter.md"), "peter.md")
+        assert [(todo.answer, todo.first_seen, todo.last_seen) for todo in parse_todos_from_markdown("peter.md")] == seen
+        
+        export_todos(iter_todos("peter.md"), "jsonl", "todos.jsonl")
+        with open("todos.jsonl", encoding='utf-8') as f:
+            import_todos(iter_jsonl(f), "imported.md")
+        assert [(todo.answer, todo.first_seen, todo.last_seen) for todo in parse_todos_from_markdown("imported.md")] == seen
+        
+        migrate_to_shards("peter.md")
+        migrated = [todo for path in shard_paths("peter.d") for todo in parse_todos_from_markdown(path)]
+        assert [(todo.answer, todo.first_seen, todo.last_seen) for todo in migrated] == seen
+        
+        result = CliRunner().invoke(cli, ["list"])
+        assert "Seen: 2026-01-01 to 2026-01-05" in result.output
+        print("✅ Seen dates test passed")
+
+def test_dedup_command():
+    """Test `peter dedup` reporting and folding, and `add --dedup` from the environment."""
+    runner = CliRunner()
+    with tempfile.TemporaryDirectory() as directory, contextlib.chdir(directory):
+        _write_history("peter.md")
+        
+        result = runner.invoke(cli, ["dedup"])
+        assert result.exit_code == 0, result.output
+        assert "Open 3 times, first seen 2026-01-01, last seen 2026-01-05" in result.output
+        assert "peter dedup --fold" in result.output
+        
+        result = runner.invoke(cli, ["dedup", "--fold"])
+        assert "Folded 3 duplicate(s) into 2 TODO(s)" in result.output
+        assert "No duplicate open TODOs found" in runner.invoke(cli, ["dedup"]).output
+        
+        result = runner.invoke(cli, ["add", "Blocks", "WAITING on QA"], env={"PETER_DEDUP": "fold"})
+        assert result.exit_code == 0, result.output
+        assert "Folded into" in result.output
+        assert len(parse_todos_from_markdown("peter.md")) == 3
+        
+        result = runner.invoke(cli, ["add", "Blocks", "Waiting on QA", "--dedup", "merge"])
+        assert result.exit_code != 0
+        print("✅ Dedup command test passed")
+
+if __name__ == "__main__":
+    test_find_and_fold_duplicates()
+    test_fold_keeps_other_ids()
+    test_fold_rechecks_entries()
+    test_fold_keeps_earlier_first_seen()
+    test_dedup_across_shards()
+    test_save_with_dedup_modes()
+    test_seen_dates_survive_rewrites()
+    test_dedup_command()
+    print("All dedup tests passed!")
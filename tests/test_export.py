@@ -0,0 +1,141 @@
+# Test streaming export and bulk import
+import contextlib
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+from click.testing import CliRunner
+import peter.export
+from peter.cli import cli, EXPORT_CHOICES
+from peter.export import export_todos, import_todos, iter_jsonl
+from peter.todo_manager import iter_todos, parse_todos_from_markdown, save_todos_to_markdown, save_todos_to_markdown_with_status
+from peter.models import Answer
+
+def _write_history(output_file):
+    save_todos_to_markdown([Answer('Task A', 'Answer A', 1), Answer('Task B', 'Answer B', 2)], "2026-01-01", output_file)
+    save_todos_to_markdown([Answer('Task "C", quoted', 'Answer C', 3)], "2026-01-02", output_file)
+    todos = parse_todos_from_markdown(output_file)
+    todos[1].completed = True
+    save_todos_to_markdown_with_status(todos, output_file)
+    return parse_todos_from_markdown(output_file)
+
+def test_export_formats():
+    """Test that every format holds the same records as the parser."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        todos = _write_history(output_file)
+        # The CLI spells the formats out so it can skip importing peter.export
+        assert EXPORT_CHOICES == peter.export.EXPORT_FORMATS
+        expected = [(t.id, t.date, t.question, t.answer, t.priority, t.completed, t.first_seen, t.last_seen)
+                    for t in todos]
+
+        jsonl_file = os.path.join(directory, "todos.jsonl")
+        assert export_todos(iter_todos(output_file), "jsonl", jsonl_file) == 3
+        with open(jsonl_file, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert [tuple(record.values()) for record in records] == expected
+
+        csv_file = os.path.join(directory, "todos.csv")
+        export_todos(iter_todos(output_file), "csv", csv_file)
+        with open(csv_file, encoding='utf-8', newline='') as f:
+            rows = [*csv.reader(f)]
+        assert rows[0] == ["id", "date", "question", "answer", "priority", "completed", "first_seen", "last_seen"]
+        assert rows[3][2] == 'Task "C", quoted'
+
+        db_file = os.path.join(directory, "todos.db")
+        export_todos(iter_todos(output_file), "sqlite", db_file)
+        export_todos(iter_todos(output_file), "sqlite", db_file)
+        with contextlib.closing(sqlite3.connect(db_file)) as conn:
+            rows = conn.execute("SELECT * FROM todos").fetchall()
+        assert [row[:5] + (bool(row[5]),) + row[6:] for row in rows] == expected
+        print("✅ Export formats test passed")
+
+def test_import_round_trip():
+    """Test that importing an export reproduces the history and its IDs."""
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "source.md")
+        todos = _write_history(source)
+        jsonl_file = os.path.join(directory, "todos.jsonl")
+        export_todos(iter_todos(source), "jsonl", jsonl_file)
+
+        target = os.path.join(directory, "peter.md")
+        with open(jsonl_file, encoding='utf-8') as f:
+            stats = import_todos(iter_jsonl(f), target)
+        assert stats == {"todos": 3, "sections": 2}
+        with open(target, encoding='utf-8') as f:
+            content = f.read()
+        assert content.count("## 2026-01-01") == 1
+        imported = parse_todos_from_markdown(target)
+        assert [(t.id, t.question, t.completed) for t in imported] == [(t.id, t.question, t.completed) for t in todos]
+        print("✅ Import round trip test passed")
+
+def test_import_flushes_large_sections():
+    """Test that a section larger than the buffer is written in pieces."""
+    with tempfile.TemporaryDirectory() as directory:
+        target = os.path.join(directory, "peter.md")
+        records = ({"question": f"Task {i}", "answer": "a", "priority": 2, "date": "2026-01-01"} for i in range(200))
+        original = peter.export.WRITE_BUFFER
+        peter.export.WRITE_BUFFER = 512
+        try:
+            stats = import_todos(records, target)
+        finally:
+            peter.export.WRITE_BUFFER = original
+        assert stats == {"todos": 200, "sections": 1}
+        assert [t.question for t in parse_todos_from_markdown(target)] == [f"Task {i}" for i in range(200)]
+        print("✅ Large section import test passed")
+
+def test_import_invalid_record_leaves_file_unchanged():
+    """Test that a bad record rolls the whole import back."""
+    with tempfile.TemporaryDirectory() as directory:
+        target = os.path.join(directory, "peter.md")
+        save_todos_to_markdown([Answer('Existing', 'yes', 1)], "2026-01-01", target)
+        with open(target, 'rb') as f:
+            before = f.read()
+
+        records = [{"question": "New", "answer": "a", "priority": 1, "date": "2026-01-02"},
+                   {"question": "Broken", "answer": "a", "date": "2026-01-02"}]
+        try:
+            import_todos(records, target)
+            assert False, "missing priority should fail"
+        except ValueError as e:
+            assert "priority" in str(e)
+        with open(target, 'rb') as f:
+            assert f.read() == before
+
+        # A new file is removed again
+        fresh = os.path.join(directory, "fresh.md")
+        try:
+            import_todos(records, fresh)
+        except ValueError:
+            pass
+        assert not os.path.exists(fresh)
+        print("✅ Import rollback test passed")
+
+def test_export_import_cli():
+    """Test `peter export` to stdout and `peter import` from stdin."""
+    runner = CliRunner()
+    with tempfile.TemporaryDirectory() as directory, contextlib.chdir(directory):
+        _write_history("peter.md")
+        result = runner.invoke(cli, ["export"])
+        assert result.exit_code == 0, result.output
+        assert len(result.output.splitlines()) == 3
+        exported = result.output
+
+        os.rename("peter.md", "old.md")
+        result = runner.invoke(cli, ["import"], input=exported)
+        assert result.exit_code == 0, result.output
+        assert "Imported 3 TODO(s) in 2 date section(s)" in result.output
+        assert [t.id for t in parse_todos_from_markdown("peter.md")] == [t.id for t in parse_todos_from_markdown("old.md")]
+
+        result = runner.invoke(cli, ["export", "--format", "sqlite"])
+        assert result.exit_code != 0
+        print("✅ Export/import CLI test passed")
+
+if __name__ == "__main__":
+    test_export_formats()
+    test_import_round_trip()
+    test_import_flushes_large_sections()
+    test_import_invalid_record_leaves_file_unchanged()
+    test_export_import_cli()
+    print("All export tests passed!")
@@ -0,0 +1,122 @@
+# Test sidecar index cache
+import os
+import tempfile
+import peter.index
+from peter.index import load_todos, index_path_for
+from peter.todo_manager import save_todos_to_markdown, save_todos_to_markdown_with_status, parse_todos_from_markdown
+from peter.models import Answer
+
+def _make_history(directory):
+    output_file = os.path.join(directory, "peter.md")
+    save_todos_to_markdown([Answer('Question 1', 'Answer 1', 2)], "2026-01-02", output_file)
+    return output_file
+
+def test_load_todos_builds_index():
+    """Test that a cold load parses the file and writes the index."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _make_history(directory)
+        
+        todos = load_todos(output_file)
+        assert todos.to_todos() == parse_todos_from_markdown(output_file)
+        assert os.path.exists(index_path_for(output_file))
+        print("✅ Index build test passed")
+
+def test_load_todos_warm_skips_parse(monkeypatch):
+    """Test that a warm load never touches the markdown parser."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _make_history(directory)
+        expected = load_todos(output_file)
+        
+        def fail(lines, offset=0, state=None):
+            raise AssertionError("parser should not run on a warm index")
+        monkeypatch.setattr(peter.index, "iter_todos_from_lines", fail)
+        
+        assert load_todos(output_file).to_todos() == expected.to_todos()
+        print("✅ Warm index test passed")
+
+def test_load_todos_stale_index_rebuilds():
+    """Test that appending to the file invalidates the index."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _make_history(directory)
+        load_todos(output_file)
+        
+        save_todos_to_markdown([Answer('Question 2', 'Answer 2', 1)], "2026-01-03", output_file)
+        todos = load_todos(output_file)
+        assert [todo.question for todo in todos] == ['Question 1', 'Question 2']
+        print("✅ Stale index test passed")
+
+def test_load_todos_parses_only_appended_tail(monkeypatch):
+    """Test that an append is parsed from the last cached entry, not byte 0."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _make_history(directory)
+        load_todos(output_file)
+        size = os.path.getsize(output_file)
+        
+        # Same date twice, so the new entries depend on the cached parser state
+        answers = [Answer('Question 1', 'Answer 1', 2), Answer('Question 3', 'Answer 3', 1)]
+        save_todos_to_markdown(answers, "2026-01-02", output_file)
+        save_todos_to_markdown(answers, "2026-01-02", output_file)
+        
+        starts = []
+        original = peter.index.iter_todos_from_lines
+        def spy(lines, offset=0, state=None):
+            starts.append(offset)
+            return original(lines, offset, state)
+        monkeypatch.setattr(peter.index, "iter_todos_from_lines", spy)
+        
+        todos = load_todos(output_file)
+        assert starts and 0 < starts[0] < size
+        assert todos.to_todos() == parse_todos_from_markdown(output_file)
+        assert len({todo.id for todo in todos}) == len(todos)
+        print("✅ Tail reparse test passed")
+
+def test_load_todos_rewrite_falls_back_to_full_parse(monkeypatch):
+    """Test that a change inside the parsed prefix triggers a full parse."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _make_history(directory)
+        save_todos_to_markdown([Answer('Question 2', 'Answer 2', 1)], "2026-01-03", output_file)
+        load_todos(output_file)
+        
+        todos = parse_todos_from_markdown(output_file)
+        todos[0].completed = True
+        save_todos_to_markdown_with_status(todos, output_file)
+        
+        starts = []
+        original = peter.index.iter_todos_from_lines
+        def spy(lines, offset=0, state=None):
+            starts.append(offset)
+            return original(lines, offset, state)
+        monkeypatch.setattr(peter.index, "iter_todos_from_lines", spy)
+        
+        assert load_todos(output_file).to_todos() == parse_todos_from_markdown(output_file)
+        assert starts == [0]
+        print("✅ Rewrite fallback test passed")
+
+def test_load_todos_truncation_falls_back_to_full_parse():
+    """Test that truncating the file below the cached prefix is detected."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _make_history(directory)
+        save_todos_to_markdown([Answer('Question 2', 'Answer 2', 1)], "2026-01-03", output_file)
+        load_todos(output_file)
+        
+        with open(output_file, 'r+b') as f:
+            f.truncate(os.path.getsize(output_file) // 3)
+        assert load_todos(output_file).to_todos() == parse_todos_from_markdown(output_file)
+        print("✅ Truncation fallback test passed")
+
+def test_load_todos_corrupt_index():
+    """Test that a corrupt index falls back to a full parse."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _make_history(directory)
+        with open(index_path_for(output_file), 'wb') as f:
+            f.write(b"not an index")
+        
+        assert load_todos(output_file).to_todos() == parse_todos_from_markdown(output_file)
+        print("✅ Corrupt index test passed")
+
+if __name__ == "__main__":
+    test_load_todos_builds_index()
+    test_load_todos_stale_index_rebuilds()
+    test_load_todos_truncation_falls_back_to_full_parse()
+    test_load_todos_corrupt_index()
+    print("All index tests passed!")
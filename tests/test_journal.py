@@ -0,0 +1,117 @@
+# Test the write-ahead journal and crash recovery
+import os
+import tempfile
+from peter import journal as journal_module
+from peter.journal import Journal, journal_path_for, needs_recovery, recover, _iter_records
+from peter.todo_manager import (save_todos_to_markdown, parse_todos_from_markdown, close_todos_in_place,
+                                todo_id)
+from peter.index import load_todos
+from peter.models import Answer
+
+def _records(output_file):
+    with open(journal_path_for(output_file), 'rb') as f:
+        return list(_iter_records(f))
+
+def _crash_during_commit(output_file, queue, written):
+    """Do what Journal.commit does, but die after ``written`` bytes of each markdown write."""
+    with Journal(output_file) as journal:
+        queue(journal)
+        for record in journal._records:
+            journal._write_record(record)
+        journal.journal.flush()
+        for offset, data in journal._writes:
+            journal.md.seek(offset)
+            journal.md.write(data[:written])
+
+def test_writes_are_journaled():
+    """Test that appends and closes go through committed journal records."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        save_todos_to_markdown([Answer('Plans', 'Write report', 1)], "2026-01-01", output_file)
+        save_todos_to_markdown([Answer('Plans', 'Review PRs', 2)], "2026-01-02", output_file)
+        todos = parse_todos_from_markdown(output_file)
+        close_todos_in_place(todos[:1], output_file)
+        
+        assert [record["op"] for record in _records(output_file)] == \
+            ["append", "commit", "append", "commit", "patch", "commit"]
+        assert not needs_recovery(output_file)
+        assert recover(output_file) == 0
+        assert [todo.completed for todo in parse_todos_from_markdown(output_file)] == [True, False]
+        
+        # A checkpoint syncs the file and empties the journal
+        limit = journal_module.JOURNAL_CHECKPOINT_BYTES
+        journal_module.JOURNAL_CHECKPOINT_BYTES = 1
+        try:
+            save_todos_to_markdown([Answer('Plans', 'Ship it', 3)], "2026-01-03", output_file)
+        finally:
+            journal_module.JOURNAL_CHECKPOINT_BYTES = limit
+        assert os.path.getsize(journal_path_for(output_file)) == 0
+        assert len(parse_todos_from_markdown(output_file)) == 3
+        print("✅ Journaled writes test passed")
+
+def test_recovers_torn_writes():
+    """Test that a torn append and an unfinished close are completed by the next reader."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        save_todos_to_markdown([Answer('Plans', 'Write report', 1)], "2026-01-01", output_file)
+        expected = parse_todos_from_markdown(output_file)
+        
+        entry = b"## 2026-01-02\n\n- **Question**: Plans\n  - **Answer**: Review PRs\n  - **Priority**: 2\n  - **Completed**: False\n"
+        _crash_during_commit(output_file, lambda journal: journal.append(entry), 30)
+        assert needs_recovery(output_file)
+        # The next lock, here a reader's, finishes the append
+        todos = list(load_todos(output_file))
+        assert [todo.answer for todo in todos] == ["Write report", "Review PRs"]
+        assert todos[0].id == expected[0].id and todos[1].id == todo_id(todos[1])
+        assert not needs_recovery(output_file)
+        assert os.path.getsize(journal_path_for(output_file)) == 0
+        
+        # A close that died before touching the file
+        with open(output_file, 'rb') as f:
+            content = f.read()
+        start = content.rindex(b"False")
+        _crash_during_commit(output_file, lambda journal: journal.patch([(start - 1, start + 5, b"  True")]), 0)
+        assert [todo.completed for todo in parse_todos_from_markdown(output_file)] == [False, True]
+        
+        # Replaying again changes nothing
+        assert recover(output_file) == 0
+        print("✅ Torn write recovery test passed")
+
+def test_recovery_leaves_hand_edits_alone():
+    """Test that a torn journal tail is dropped and later hand edits are kept."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        save_todos_to_markdown([Answer('Plans', 'Write report', 1)], "2026-01-01", output_file)
+        save_todos_to_markdown([Answer('Plans', 'Review PRs', 2)], "2026-01-02", output_file)
+        with open(output_file, 'rb') as f:
+            content = f.read()
+        
+        # A record cut short before its fsync never reached the file
+        with open(journal_path_for(output_file), 'ab') as f:
+            f.write(b"0badc0de {\"op\":\"app")
+        assert needs_recovery(output_file)
+        assert recover(output_file) == 0
+        assert open(output_file, 'rb').read() == content
+        
+        # The last entry removed by hand stays removed
+        save_todos_to_markdown([Answer('Plans', 'Ship it', 3)], "2026-01-03", output_file)
+        with open(output_file, 'r+b') as f:
+            f.truncate(len(content))
+        assert needs_recovery(output_file)
+        assert [todo.answer for todo in parse_todos_from_markdown(output_file)] == ["Write report", "Review PRs"]
+        
+        # A tail lost before the file was synced, with an older mtime, is written back
+        save_todos_to_markdown([Answer('Plans', 'Ship it', 3)], "2026-01-03", output_file)
+        stat = os.stat(output_file)
+        with open(output_file, 'r+b') as f:
+            f.truncate(len(content) + 10)
+        os.utime(output_file, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10 ** 9))
+        assert [todo.answer for todo in parse_todos_from_markdown(output_file)] == \
+            ["Write report", "Review PRs", "Ship it"]
+        print("✅ Hand edit test passed")
+
+if __name__ == "__main__":
+    test_writes_are_journaled()
+    test_recovers_torn_writes()
+    test_recovery_leaves_hand_edits_alone()
+    print("All journal tests passed!")
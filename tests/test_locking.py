@@ -0,0 +1,110 @@
+# Test locking and atomic rewrites under concurrent writers
+import os
+import subprocess
+import sys
+import tempfile
+from peter.locking import atomic_replace, file_lock, lock_path_for
+from peter.todo_manager import parse_todos_from_markdown
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WRITERS = 6
+APPENDS_PER_WRITER = 15
+REWRITES = 10
+
+APPEND_SCRIPT = """
+import sys
+from peter.todo_manager import save_todos_to_markdown
+from peter.models import Answer
+writer = sys.argv[1]
+for i in range(int(sys.argv[2])):
+    save_todos_to_markdown([Answer(f"writer {writer} entry {i}", "answer", 2)], "2026-01-02", "peter.md")
+"""
+
+REWRITE_SCRIPT = """
+import sys
+from peter.locking import file_lock
+from peter.todo_manager import parse_todos_from_markdown, save_todos_to_markdown_with_status
+for _ in range(int(sys.argv[1])):
+    with file_lock("peter.md"):
+        todos = parse_todos_from_markdown("peter.md")
+        for todo in todos:
+            if not todo.completed:
+                todo.completed = True
+                break
+        save_todos_to_markdown_with_status(todos, "peter.md")
+"""
+
+def _spawn(script, args, cwd):
+    env = dict(os.environ, PYTHONPATH=PACKAGE_ROOT)
+    return subprocess.Popen([sys.executable, "-c", script] + [str(arg) for arg in args],
+                            cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+def test_concurrent_writers_lose_nothing():
+    """Test that parallel appends and rewrites keep every entry."""
+    with tempfile.TemporaryDirectory() as directory:
+        processes = [_spawn(APPEND_SCRIPT, [writer, APPENDS_PER_WRITER], directory) for writer in range(WRITERS)]
+        processes.append(_spawn(REWRITE_SCRIPT, [REWRITES], directory))
+        for process in processes:
+            _, stderr = process.communicate(timeout=120)
+            assert process.returncode == 0, stderr.decode()
+        
+        todos = parse_todos_from_markdown(os.path.join(directory, "peter.md"))
+        questions = sorted(todo.question for todo in todos)
+        expected = sorted(f"writer {writer} entry {i}" for writer in range(WRITERS) for i in range(APPENDS_PER_WRITER))
+        assert questions == expected
+        assert all(todo.answer == "answer" and todo.priority == 2 for todo in todos)
+        print("✅ Concurrent writers test passed")
+
+def test_file_lock_is_reentrant():
+    """Test that a thread can take the lock again while holding it."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        with file_lock(output_file):
+            with file_lock(output_file, exclusive=False):
+                pass
+        assert os.path.exists(lock_path_for(output_file))
+        print("✅ Reentrant lock test passed")
+
+def test_file_lock_refuses_upgrade():
+    """Test that the write lock cannot be taken inside a block holding the read lock."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        with file_lock(output_file, exclusive=False):
+            with file_lock(output_file, exclusive=False):
+                pass
+            try:
+                with file_lock(output_file):
+                    assert False, "took the write lock under the read lock"
+            except RuntimeError as e:
+                assert "inside a block holding its read lock" in str(e)
+        # The failed request left nothing behind
+        with file_lock(output_file):
+            pass
+        print("✅ Lock upgrade test passed")
+
+def test_atomic_replace_keeps_original_on_error():
+    """Test that a failed rewrite leaves the file and directory untouched."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write("original\n")
+        
+        try:
+            with atomic_replace(output_file) as f:
+                f.write("partial")
+                raise RuntimeError("interrupted")
+        except RuntimeError:
+            pass
+        
+        with open(output_file, 'r', encoding='utf-8') as f:
+            assert f.read() == "original\n"
+        assert os.listdir(directory) == ["peter.md"]
+        print("✅ Atomic replace test passed")
+
+if __name__ == "__main__":
+    test_concurrent_writers_lose_nothing()
+    test_file_lock_is_reentrant()
+    test_file_lock_refuses_upgrade()
+    test_atomic_replace_keeps_original_on_error()
+    print("All locking tests passed!")
@@ -0,0 +1,72 @@
+# Test chunked parallel parsing
+import mmap
+import os
+import tempfile
+from benchmarks.generate import generate_peter_md
+from peter.parallel import parse_parallel, split_chunks
+from peter.todo_manager import iter_todos, parse_todos_from_markdown
+
+def _write_tricky_history(output_file):
+    """Same-date sections back to back, duplicates, lines that look like headers and a date that comes back."""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write("# Daily Todos\n\n")
+        for section in range(60):
+            f.write(f"## 2026-01-{section // 3 + 1:02d}\n\n")
+            for entry in range(3):
+                f.write(f"- **Question**: Question {entry % 2}\n")
+                f.write("  - **Answer**: same ## not a header\n")
+                f.write("  - **Priority**: 2\n\n")
+            if section % 7 == 0:
+                f.write("## \n\n")
+        f.write("## 2026-01-01\n\n")
+        for entry in range(3):
+            f.write(f"- **Question**: Question {entry % 2}\n")
+            f.write("  - **Answer**: same ## not a header\n")
+            f.write("  - **Priority**: 2\n\n")
+
+def test_parse_parallel_matches_serial():
+    """Test that every chunking gives the serial result, IDs included."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        _write_tricky_history(output_file)
+        serial = list(iter_todos(output_file))
+        assert len({todo.id for todo in serial}) == len(serial)
+        
+        for workers in (2, 3, 5):
+            assert parse_parallel(output_file, workers) == serial
+        
+        generate_peter_md(output_file, 500)
+        assert parse_parallel(output_file, 2) == list(iter_todos(output_file))
+        print("✅ Parallel parse test passed")
+
+def test_split_chunks_keeps_same_date_sections_together():
+    """Test that no chunk starts at a header repeating the previous date."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        _write_tricky_history(output_file)
+        
+        with open(output_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ranges = split_chunks(mm, 8)
+            assert ranges[0][0] == 0 and ranges[-1][1] == len(mm)
+            assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+            for start, _ in ranges[1:]:
+                line = mm[start:mm.find(b"\n", start)].decode('utf-8')
+                assert line.startswith("## 2026-01-")
+                # Sections come in threes per date, so chunks start every third one
+                previous = mm.rfind(b"## 2026", 0, start)
+                assert mm[previous:previous + 13] != mm[start:start + 13]
+        print("✅ Chunk split test passed")
+
+def test_parse_todos_from_markdown_small_file_stays_serial():
+    """Test that a small file ignores workers and parses in-process."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        _write_tricky_history(output_file)
+        assert parse_todos_from_markdown(output_file, workers=4) == list(iter_todos(output_file))
+        print("✅ Serial fallback test passed")
+
+if __name__ == "__main__":
+    test_parse_parallel_matches_serial()
+    test_split_chunks_keeps_same_date_sections_together()
+    test_parse_todos_from_markdown_small_file_stays_serial()
+    print("All parallel parse tests passed!")
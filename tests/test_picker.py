@@ -0,0 +1,70 @@
+# Test the full-screen picker used by `peter close`
+from prompt_toolkit.input import create_pipe_input
+from prompt_toolkit.output import DummyOutput
+from peter.models import Todo
+from peter.picker import TodoFilter, TodoPicker
+
+def _todos(count):
+    return [Todo(f"Question {i % 3}", f"Answer {i} {'report' if i % 2 else 'review'}", i % 4 + 1,
+                 False, "2026-01-01", i, f"{i:08x}") for i in range(count)]
+
+def _run(picker, keys):
+    with create_pipe_input() as pipe:
+        pipe.send_text(keys)
+        return picker.application(input=pipe, output=DummyOutput()).run()
+
+def test_filter_narrows_incrementally():
+    """Test word matching, narrowing while typing and reuse after deleting."""
+    todos = _todos(20)
+    todo_filter = TodoFilter(todos)
+    assert list(todo_filter.matches("")) == list(range(20))
+    assert todo_filter.matches("REPORT") == [i for i in range(20) if i % 2]
+    # "1" also matches "Question 1"
+    assert todo_filter.matches("report 1") == [1, 7, 11, 13, 15, 17, 19]
+    assert todo_filter.matches("report 1 question 2") == [11, 17]
+    steps = len(todo_filter._steps)
+    # Deleting back to an earlier query reuses its result
+    assert todo_filter.matches("report") == [i for i in range(20) if i % 2]
+    assert len(todo_filter._steps) < steps
+    assert todo_filter.matches("nowhere") == []
+    print("✅ Filter test passed")
+
+def test_picker_selects_and_cancels():
+    """Test selecting with Tab and Ctrl-A, confirming with Enter and cancelling with Esc."""
+    todos = _todos(1000)
+    
+    # Filter, select the first two matches, confirm
+    picker = TodoPicker(todos)
+    assert [todo.id for todo in _run(picker, "report 99\t\t\r")] == [todos[99].id, todos[199].id]
+    
+    # Without a selection, Enter closes nothing and the picker stays open
+    assert _run(TodoPicker(todos), "\x1b[B\x1b[B\r\x1b") is None
+    assert _run(TodoPicker(todos), "\x1b[B\x1b[B\r\t\r") == [todos[2]]
+    
+    # Ctrl-A selects every match
+    picker = TodoPicker(todos)
+    chosen = _run(picker, "review 10\x01\r")
+    assert chosen == [todo for todo in todos if "review" in todo.answer and "10" in todo.answer]
+    
+    assert _run(TodoPicker(todos), "report\t\x1b") is None
+    print("✅ Picker test passed")
+
+def test_picker_draws_only_the_window():
+    """Test that scrolling keeps the cursor in view and only visible rows are drawn."""
+    picker = TodoPicker(_todos(100_000))
+    picker.height = 10
+    picker.move(25)
+    assert (picker.cursor, picker.top) == (25, 16)
+    picker.move(-20)
+    assert (picker.cursor, picker.top) == (5, 5)
+    picker.move(10 ** 6)
+    assert picker.cursor == 99_999
+    # Opening the picker did not read any todo text
+    assert picker.filter._texts is None
+    print("✅ Picker window test passed")
+
+if __name__ == "__main__":
+    test_filter_narrows_incrementally()
+    test_picker_selects_and_cancels()
+    test_picker_draws_only_the_window()
+    print("All picker tests passed!")
@@ -0,0 +1,97 @@
+# Test aggregation of histories across project checkouts
+import contextlib
+import os
+import tempfile
+from click.testing import CliRunner
+import peter.projects
+from peter.cli import cli
+from peter.projects import find_histories, load_histories, iter_ranked, CACHE_DIR
+from peter.todo_manager import save_todos_to_markdown
+from peter.models import Answer
+
+@contextlib.contextmanager
+def _projects_tree():
+    """Create a tree with two projects and a history hidden in pruned dirs."""
+    with tempfile.TemporaryDirectory() as root:
+        for project, answers in [
+            ("alpha", [Answer('Alpha low', 'a', 3), Answer('Alpha high', 'b', 1)]),
+            ("work/beta", [Answer('Beta mid', 'c', 2), Answer('Beta empty', 'nothing', 1)]),
+            ("alpha/node_modules/pkg", [Answer('Vendored', 'd', 1)]),
+            (".git/peter", [Answer('Git internals', 'e', 1)]),
+        ]:
+            os.makedirs(os.path.join(root, project))
+            save_todos_to_markdown(answers, "2026-01-02", os.path.join(root, project, "peter.md"))
+        yield root
+
+def test_find_histories_prunes_heavy_dirs():
+    """Test that .git and node_modules are never searched."""
+    with _projects_tree() as root:
+        projects = [project for project, _ in find_histories(root)]
+        assert projects == ["alpha", os.path.join("work", "beta")]
+        print("✅ Discovery test passed")
+
+def test_load_histories_merges_by_priority():
+    """Test the merged view and that unchanged files come from the cache."""
+    with _projects_tree() as root:
+        histories = load_histories(root, workers=2)
+        ranked = [(project, todo.question) for project, todo in iter_ranked(histories, open_only=True)]
+        assert ranked == [("alpha", "Alpha high"), (os.path.join("work", "beta"), "Beta mid"), ("alpha", "Alpha low")]
+        entries = {name: os.stat(os.path.join(root, CACHE_DIR, name)).st_mtime_ns
+                   for name in os.listdir(os.path.join(root, CACHE_DIR))}
+        assert len(entries) == 2
+
+        # Only the appended file is handed to the parser on the next run,
+        # and only its cache entry is written again
+        save_todos_to_markdown([Answer('Beta urgent', 'f', 1)], "2026-01-03", os.path.join(root, "work", "beta", "peter.md"))
+        loaded = []
+        original = peter.projects.load_read_only
+        peter.projects.load_read_only = lambda path: loaded.append(path) or original(path)
+        try:
+            histories = load_histories(root)
+        finally:
+            peter.projects.load_read_only = original
+        assert loaded == [os.path.join(root, "work", "beta", "peter.md")]
+        changed = [name for name in os.listdir(os.path.join(root, CACHE_DIR))
+                   if os.stat(os.path.join(root, CACHE_DIR, name)).st_mtime_ns != entries[name]]
+        assert len(changed) == 1
+        assert [todo.question for _, todo in iter_ranked(histories)][:2] == ["Alpha high", "Beta urgent"]
+        print("✅ Merge and cache test passed")
+
+def test_load_histories_writes_nothing_in_projects():
+    """Test that projects are read without index, lock or journal files."""
+    with tempfile.TemporaryDirectory() as root:
+        project = os.path.join(root, "alpha")
+        os.makedirs(project)
+        with open(os.path.join(project, "peter.md"), 'w', encoding='utf-8') as f:
+            f.write("# Daily Todos\n\n## 2026-01-02\n\n- **Question**: Plans\n  - **Answer**: Ship it\n"
+                    "  - **Priority**: 1\n  - **Completed**: False\n\n")
+        with open(os.path.join(root, "peter.md"), 'w', encoding='utf-8') as f:
+            f.write("# Daily Todos\n")
+        
+        histories = load_histories(root, workers=2)
+        assert [todo.question for _, todo in iter_ranked(histories)] == ["Plans"]
+        assert os.listdir(project) == ["peter.md"]
+        assert sorted(os.listdir(root)) == [CACHE_DIR, "alpha", "peter.md"]
+        print("✅ Read-only projects test passed")
+
+def test_status_recursive_cli():
+    """Test `peter status --recursive` annotates each todo with its project."""
+    runner = CliRunner()
+    with _projects_tree() as root, contextlib.chdir(root):
+        result = runner.invoke(cli, ["status", "--recursive"])
+        assert result.exit_code == 0, result.output
+        assert "1. [⏳ Open] Alpha high\n   Project: alpha" in result.output
+        assert "Beta empty" not in result.output
+        assert "Vendored" not in result.output
+
+        result = runner.invoke(cli, ["list", "--recursive", root, "--limit", "1"])
+        assert result.exit_code == 0, result.output
+        assert "Alpha high" in result.output and "Beta mid" not in result.output
+        print("✅ Recursive CLI test passed")
+
+if __name__ == "__main__":
+    test_find_histories_prunes_heavy_dirs()
+    test_load_histories_merges_by_priority()
+    test_load_histories_writes_nothing_in_projects()
+    test_status_recursive_cli()
+    print("All project aggregation tests passed!")
@@ -0,0 +1,127 @@
+# Test full-text search and incremental index maintenance
+import os
+import sqlite3
+import tempfile
+from peter.search import search_todos, search_index_path, tokenize
+from peter.todo_manager import (save_todos_to_markdown, parse_todos_from_markdown, close_todos_in_place,
+                                save_todos_to_markdown_with_status)
+from peter.models import Answer
+
+def _write_history(directory):
+    output_file = os.path.join(directory, "peter.md")
+    save_todos_to_markdown([
+        Answer('What are your priorities?', 'Finish the quarterly report', 1),
+        Answer('What are your priorities?', 'Review pull requests', 2)
+    ], "2026-01-01", output_file)
+    save_todos_to_markdown([Answer('What blocks you?', 'Report template is missing', 3)], "2026-01-05", output_file)
+    return output_file
+
+def _indexed_docs(output_file):
+    conn = sqlite3.connect(search_index_path(output_file))
+    try:
+        return conn.execute("SELECT count(*) FROM docs").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_tokenize():
+    """Test that tokens are lowercased and deduplicated."""
+    assert tokenize("Report, report; REPORT done") == ["report", "done"]
+
+def test_search_with_filters():
+    """Test term matching combined with priority, date and status filters."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _write_history(directory)
+        
+        assert [t.answer for t in search_todos(output_file, ["report"])] == \
+            ['Finish the quarterly report', 'Report template is missing']
+        assert [t.answer for t in search_todos(output_file, ["report", "quarterly"])] == ['Finish the quarterly report']
+        assert [t.answer for t in search_todos(output_file, ["report"], priority=3)] == ['Report template is missing']
+        assert [t.answer for t in search_todos(output_file, ["report"], since="2026-01-02")] == ['Report template is missing']
+        assert [t.answer for t in search_todos(output_file, [], until="2026-01-01")] == \
+            ['Finish the quarterly report', 'Review pull requests']
+        
+        ids = {t.id for t in parse_todos_from_markdown(output_file)}
+        assert {t.id for t in search_todos(output_file, [])} == ids
+        print("✅ Search filters test passed")
+
+def test_index_follows_writes():
+    """Test that appends, closes and rewrites update the existing index."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _write_history(directory)
+        search_todos(output_file, ["report"])
+        index_file = search_index_path(output_file)
+        inode = os.stat(index_file).st_ino
+        
+        # Same date and content as an existing entry: needs the next occurrence ID
+        save_todos_to_markdown([Answer('What blocks you?', 'Report template is missing', 3)], "2026-01-05", output_file)
+        assert _indexed_docs(output_file) == 4
+        
+        todos = parse_todos_from_markdown(output_file)
+        close_todos_in_place([todos[0]], output_file)
+        open_hits = search_todos(output_file, ["report"], status="open")
+        assert [t.id for t in open_hits] == [todos[2].id, todos[3].id]
+        assert [t.id for t in search_todos(output_file, ["report"], status="closed")] == [todos[0].id]
+        
+        # Rewriting without the closed todo removes it from the index
+        save_todos_to_markdown_with_status(parse_todos_from_markdown(output_file)[1:], output_file)
+        assert _indexed_docs(output_file) == 3
+        assert search_todos(output_file, ["quarterly"]) == []
+        
+        # None of the writes above rebuilt the index from scratch
+        assert os.stat(index_file).st_ino == inode
+        print("✅ Incremental index test passed")
+
+def test_appended_ids_match_full_parse():
+    """Test that entries appended under a date seen earlier get the IDs a full parse gives them."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _write_history(directory)
+        search_todos(output_file, ["report"])
+        inode = os.stat(search_index_path(output_file)).st_ino
+        
+        # 2026-01-01 again after 2026-01-05 starts a new run of occurrences
+        save_todos_to_markdown([Answer('What are your priorities?', 'Finish the quarterly report', 1)],
+                               "2026-01-01", output_file)
+        save_todos_to_markdown([Answer('What are your priorities?', 'Finish the quarterly report', 1)],
+                               "2026-01-01", output_file)
+        assert os.stat(search_index_path(output_file)).st_ino == inode
+        assert [t.id for t in search_todos(output_file, [])] == [t.id for t in parse_todos_from_markdown(output_file)]
+        print("✅ Appended ID test passed")
+
+def test_regrouping_rewrite_reindexes():
+    """Test that a rewrite that moves and renumbers entries leaves the index matching a reparse."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        save_todos_to_markdown([Answer('Plans', 'x', 1)], "2026-01-02", output_file)
+        save_todos_to_markdown([Answer('Plans', 'y', 1)], "2026-01-01", output_file)
+        save_todos_to_markdown([Answer('Plans', 'x', 1)], "2026-01-02", output_file)
+        search_todos(output_file, [])
+        
+        save_todos_to_markdown_with_status(parse_todos_from_markdown(output_file), output_file)
+        reparsed = parse_todos_from_markdown(output_file)
+        assert [t.answer for t in reparsed] == ["y", "x", "x"]
+        assert [t.id for t in search_todos(output_file, [])] == [t.id for t in reparsed]
+        
+        # Appends after the rewrite resume from the reindexed order
+        save_todos_to_markdown([Answer('Plans', 'x', 1)], "2026-01-02", output_file)
+        assert [t.id for t in search_todos(output_file, [])] == [t.id for t in parse_todos_from_markdown(output_file)]
+        print("✅ Regrouping rewrite test passed")
+
+def test_index_rebuilds_after_hand_edit():
+    """Test that changes made outside peter trigger a rebuild."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = _write_history(directory)
+        search_todos(output_file, ["report"])
+        
+        with open(output_file, 'a', encoding='utf-8') as f:
+            f.write("\n## 2026-01-06\n\n- **Question**: Added by hand\n  - **Answer**: Another report\n  - **Priority**: 2\n")
+        assert [t.question for t in search_todos(output_file, ["another"])] == ['Added by hand']
+        print("✅ Rebuild after hand edit test passed")
+
+if __name__ == "__main__":
+    test_tokenize()
+    test_search_with_filters()
+    test_index_follows_writes()
+    test_appended_ids_match_full_parse()
+    test_regrouping_rewrite_reindexes()
+    test_index_rebuilds_after_hand_edit()
+    print("All search tests passed!")
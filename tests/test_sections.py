@@ -0,0 +1,102 @@
+# Test the date-section skip index and filter pushdown
+import contextlib
+import os
+import tempfile
+from click.testing import CliRunner
+from peter.cli import cli
+from peter.sections import (query_todos, load_sections, sections_path_for, date_bounds, todo_matches,
+                            _read_sections)
+from peter.todo_manager import (save_todos_to_markdown, parse_todos_from_markdown, close_todos_in_place,
+                                save_todos_to_markdown_with_status)
+from peter.models import Answer
+
+def _write_history(output_file):
+    save_todos_to_markdown([Answer('Plans', 'Write report', 1), Answer('Plans', 'Write report', 1),
+                            Answer('Blocks', 'nothing', 2)], "2026-01-01", output_file)
+    save_todos_to_markdown([Answer('Plans', 'Review PRs', 2)], "2026-01-03", output_file)
+    # A second section for the same date continues the first one
+    save_todos_to_markdown([Answer('Plans', 'Write report', 1)], "2026-01-03", output_file)
+    save_todos_to_markdown([Answer('Plans', 'Ship it', 3)], "2026-01-07", output_file)
+
+def _brute_force(output_file, since=None, until=None, priority=None, open_only=False):
+    low, high = date_bounds(since, until)
+    return [todo for todo in parse_todos_from_markdown(output_file)
+            if todo_matches(todo, low, high, priority, open_only)]
+
+def test_query_matches_full_parse():
+    """Test that pushed-down queries return what filtering a full parse does, IDs included."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        _write_history(output_file)
+        
+        index = load_sections(output_file)
+        assert [index.date(section) for section in range(len(index))] == ["2026-01-01", "2026-01-03", "2026-01-07"]
+        assert list(index.counts) == [3, 2, 1] and list(index.open_counts) == [2, 2, 1]
+        assert index.matching(priority=1) == [0, 1]
+        assert index.matching(priority=2, open_only=True) == [1]
+        assert index.matching(*date_bounds("2026-01-02", "2026-01-05")) == [1]
+        
+        for filters in ({}, {"since": "2026-01-03"}, {"until": "2026-01-03", "priority": 1},
+                        {"priority": 2, "open_only": True}, {"open_only": True}, {"since": "2027-01-01"}):
+            assert query_todos(output_file, **filters) == _brute_force(output_file, **filters), filters
+        assert [todo.answer for todo in query_todos(output_file, since="2026-01-03", priority=1)] == ["Write report"]
+        print("✅ Query pushdown test passed")
+
+def test_writers_keep_index_in_sync():
+    """Test that appends and closes update the sidecar and rewrites drop it."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        _write_history(output_file)
+        load_sections(output_file)
+        
+        save_todos_to_markdown([Answer('Plans', 'Plan sprint', 1)], "2026-01-08", output_file)
+        index = _read_sections(output_file)
+        assert (index.size, index.mtime_ns) == (os.path.getsize(output_file), os.stat(output_file).st_mtime_ns)
+        assert index.date(len(index) - 1) == "2026-01-08"
+        
+        todos = query_todos(output_file, until="2026-01-01", open_only=True)
+        close_todos_in_place(todos[:1], output_file)
+        index = _read_sections(output_file)
+        assert (index.size, index.mtime_ns) == (os.path.getsize(output_file), os.stat(output_file).st_mtime_ns)
+        assert index.open_counts[0] == 1
+        assert query_todos(output_file, open_only=True) == _brute_force(output_file, open_only=True)
+        
+        save_todos_to_markdown_with_status(parse_todos_from_markdown(output_file), output_file)
+        assert not os.path.exists(sections_path_for(output_file))
+        assert query_todos(output_file, priority=1) == _brute_force(output_file, priority=1)
+        
+        # A hand edit is caught by size and mtime
+        with open(output_file, 'a', encoding='utf-8') as f:
+            f.write("\n## 2026-02-01\n\n- **Question**: Plans\n  - **Answer**: Edited\n  - **Priority**: 1\n")
+        assert [todo.answer for todo in query_todos(output_file, since="2026-02-01")] == ["Edited"]
+        print("✅ Index sync test passed")
+
+def test_list_and_status_filters():
+    """Test the --since/--until/--priority/--open options of `list` and `status`."""
+    runner = CliRunner()
+    with tempfile.TemporaryDirectory() as directory, contextlib.chdir(directory):
+        _write_history("peter.md")
+        close_todos_in_place(query_todos("peter.md", since="2026-01-07"), "peter.md")
+        
+        result = runner.invoke(cli, ["list", "--since", "2026-01-02", "--priority", "1"])
+        assert result.exit_code == 0, result.output
+        assert "Write report" in result.output and "Review PRs" not in result.output
+        assert "Date: 2026-01-01" not in result.output
+        
+        result = runner.invoke(cli, ["status", "--since", "2026-01-07"])
+        assert "[✅ Completed] Plans" in result.output and "Ship it" in result.output
+        result = runner.invoke(cli, ["status", "--since", "2026-01-07", "--open"])
+        assert "No TODOs found" in result.output
+        result = runner.invoke(cli, ["status", "--open", "--until", "2026-01-03", "--priority", "2"])
+        assert "Review PRs" in result.output and "Write report" not in result.output
+        
+        result = runner.invoke(cli, ["list", "--since", "January"])
+        assert result.exit_code != 0
+        assert "Invalid --since date" in result.output
+        print("✅ List and status filters test passed")
+
+if __name__ == "__main__":
+    test_query_matches_full_parse()
+    test_writers_keep_index_in_sync()
+    test_list_and_status_filters()
+    print("All section index tests passed!")
@@ -0,0 +1,112 @@
+# Test month-sharded storage
+import contextlib
+import os
+import tempfile
+from click.testing import CliRunner
+from peter.cli import cli
+from peter.shards import (SHARD_DIR, MANIFEST_FILE, is_sharded, shard_name, shard_path_for, migrate_to_shards,
+                          refresh_manifest, active_shard_paths, load_manifest, _shard_record, _merge_records)
+from peter.todo_manager import save_todos_to_markdown, parse_todos_from_markdown, close_todos_in_place
+from peter.models import Answer
+
+@contextlib.contextmanager
+def _in_tempdir():
+    with tempfile.TemporaryDirectory() as directory, contextlib.chdir(directory):
+        yield directory
+
+def _write_history():
+    save_todos_to_markdown([Answer('Question 1', 'Answer 1', 2)], "2026-01-30", "peter.md")
+    save_todos_to_markdown([Answer('Question 2', 'Answer 2', 1)], "2026-02-01", "peter.md")
+    save_todos_to_markdown([Answer('Question 3', 'Answer 3', 3)], "2026-02-02", "peter.md")
+    todos = parse_todos_from_markdown("peter.md")
+    close_todos_in_place([todos[0]], "peter.md")
+    return parse_todos_from_markdown("peter.md")
+
+def test_shard_name():
+    """Test mapping section dates to month shards."""
+    assert shard_name("2026-10-17") == "2026-10.md"
+    assert shard_name("someday") == "undated.md"
+    assert shard_name("") == "undated.md"
+
+def test_migrate_to_shards():
+    """Test splitting peter.md into shards with a manifest."""
+    with _in_tempdir():
+        todos = _write_history()
+        manifest = migrate_to_shards("peter.md", SHARD_DIR)
+        
+        assert is_sharded()
+        assert not os.path.exists("peter.md")
+        assert os.path.exists("peter.md.migrated")
+        assert manifest["shards"]["2026-01.md"]["open"] == 0
+        assert manifest["shards"]["2026-01.md"]["closed"] == 1
+        assert manifest["shards"]["2026-02.md"]["open"] == 2
+        assert manifest["shards"]["2026-02.md"]["first_date"] == "2026-02-01"
+        assert manifest["shards"]["2026-02.md"]["last_date"] == "2026-02-02"
+        
+        migrated = []
+        for path in active_shard_paths():
+            migrated.extend(parse_todos_from_markdown(path))
+        assert [(t.question, t.answer, t.completed, t.date, t.id) for t in migrated] == \
+            [(t.question, t.answer, t.completed, t.date, t.id) for t in todos]
+        
+        # Only shards with open todos are read for open-todo queries
+        assert active_shard_paths(open_only=True) == [os.path.join(SHARD_DIR, "2026-02.md")]
+        print("✅ Shard migration test passed")
+
+def test_manifest_tracks_appends():
+    """Test that the manifest picks up writes to a shard."""
+    with _in_tempdir():
+        _write_history()
+        migrate_to_shards("peter.md", SHARD_DIR)
+        
+        save_todos_to_markdown([Answer('Question 4', 'Answer 4', 1)], "2026-03-05", shard_path_for("2026-03-05"))
+        records = refresh_manifest()["shards"]
+        assert records["2026-03.md"]["open"] == 1
+        assert records["2026-02.md"]["open"] == 2
+        print("✅ Manifest refresh test passed")
+
+def test_manifest_written_under_lock():
+    """Test that refreshes store records under the manifest lock and never store stale ones."""
+    with _in_tempdir():
+        _write_history()
+        migrate_to_shards("peter.md", SHARD_DIR)
+        path = shard_path_for("2026-02-01")
+        stale = _shard_record(path)
+        save_todos_to_markdown([Answer('Question 4', 'Answer 4', 1)], "2026-02-03", path)
+        
+        # A record built before the append is not stored
+        _merge_records(SHARD_DIR, {"2026-02.md": stale}, [])
+        assert load_manifest()["shards"]["2026-02.md"]["open"] == 2
+        assert refresh_manifest()["shards"]["2026-02.md"]["open"] == 3
+        assert load_manifest()["shards"]["2026-02.md"]["open"] == 3
+        assert os.path.exists(os.path.join(SHARD_DIR, f".{MANIFEST_FILE}.lock"))
+        print("✅ Locked manifest test passed")
+
+def test_cli_on_shards():
+    """Test list and close by ID against a sharded history."""
+    runner = CliRunner()
+    with _in_tempdir():
+        todos = _write_history()
+        result = runner.invoke(cli, ["migrate"])
+        assert result.exit_code == 0, result.output
+        
+        result = runner.invoke(cli, ["list"])
+        assert "Question 2" in result.output
+        assert "Question 3" in result.output
+        assert "Question 1" not in result.output
+        
+        result = runner.invoke(cli, ["close", todos[2].id])
+        assert result.exit_code == 0, result.output
+        assert refresh_manifest()["shards"]["2026-02.md"]["open"] == 1
+        
+        result = runner.invoke(cli, ["status"])
+        assert result.output.count("Completed") == 2
+        print("✅ Sharded CLI test passed")
+
+if __name__ == "__main__":
+    test_shard_name()
+    test_migrate_to_shards()
+    test_manifest_tracks_appends()
+    test_manifest_written_under_lock()
+    test_cli_on_shards()
+    print("All shard tests passed!")
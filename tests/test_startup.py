@@ -0,0 +1,67 @@
+# Test cold-start cost of the read-only commands
+import os
+import subprocess
+import sys
+import tempfile
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous ceiling for importing peter.cli, well above the expected cost
+IMPORT_BUDGET_US = 500_000
+
+def _run_python(args, cwd):
+    env = dict(os.environ, PYTHONPATH=PACKAGE_ROOT)
+    return subprocess.run([sys.executable] + args, cwd=cwd, env=env,
+                          capture_output=True, text=True, check=True)
+
+def test_list_does_not_import_prompt_toolkit():
+    """Test that `peter list` runs without loading prompt_toolkit."""
+    script = (
+        "import sys\n"
+        "from peter.cli import cli\n"
+        "cli(['list'], standalone_mode=False)\n"
+        "assert 'prompt_toolkit' not in sys.modules, 'prompt_toolkit was imported'\n"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        result = _run_python(["-c", script], directory)
+        assert "No open TODOs found" in result.stdout
+    print("✅ Lazy import test passed")
+
+def test_cli_import_skips_command_modules():
+    """Test that modules used by a single command are imported by that command, not by peter.cli."""
+    script = (
+        "import sys\n"
+        "from peter.cli import cli\n"
+        "modules = ('peter.archive', 'peter.shards', 'peter.export', 'peter.sections', 'peter.dedup')\n"
+        "loaded = [name for name in modules if name in sys.modules]\n"
+        "assert not loaded, loaded\n"
+        "cli(['status'], standalone_mode=False)\n"
+        "loaded = [name for name in ('peter.archive', 'peter.export', 'peter.dedup') if name in sys.modules]\n"
+        "assert not loaded, loaded\n"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        _run_python(["-c", script], directory)
+    print("✅ Command module import test passed")
+
+def test_cli_import_time_budget():
+    """Test the import time of peter.cli with `python -X importtime`."""
+    with tempfile.TemporaryDirectory() as directory:
+        result = _run_python(["-X", "importtime", "-c", "import peter.cli"], directory)
+    
+    cumulative = None
+    for line in result.stderr.splitlines():
+        # Format: "import time: <self> | <cumulative> | <name>"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == "peter.cli":
+            cumulative = int(parts[1])
+        assert "prompt_toolkit" not in line, line
+    
+    assert cumulative is not None
+    assert cumulative < IMPORT_BUDGET_US, f"peter.cli took {cumulative}us to import"
+    print(f"✅ Import time budget test passed ({cumulative}us)")
+
+if __name__ == "__main__":
+    test_list_does_not_import_prompt_toolkit()
+    test_cli_import_skips_command_modules()
+    test_cli_import_time_budget()
+    print("All startup tests passed!")
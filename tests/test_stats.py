@@ -0,0 +1,88 @@
+# Test completion statistics
+import contextlib
+import os
+import tempfile
+from datetime import date
+from click.testing import CliRunner
+import peter.stats
+from peter.cli import cli
+from peter.index import load_todos
+from peter.stats import compute_stats
+from peter.todo_manager import parse_todos_from_markdown, save_todos_to_markdown, save_todos_to_markdown_with_status
+from peter.models import Answer
+
+TODAY = date(2026, 3, 1)
+
+def _write_history(output_file):
+    save_todos_to_markdown([Answer('Plan', 'a', 1), Answer('Review', 'b', 2), Answer('Idle', 'nothing', 1)], "2025-12-01", output_file)
+    save_todos_to_markdown([Answer('Plan', 'c', 1), Answer('Write', 'd', 3)], "2026-02-25", output_file)
+    save_todos_to_markdown([Answer('Plan', 'e', 1)], "2026-03-01", output_file)
+    todos = parse_todos_from_markdown(output_file)
+    for todo in todos:
+        if todo.answer in ("a", "b"):
+            todo.completed = True
+    save_todos_to_markdown_with_status(todos, output_file)
+
+def test_compute_stats():
+    """Test the aggregates against a hand-counted history."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        _write_history(output_file)
+        result = compute_stats([load_todos(output_file)], today=TODAY, backend="array", top=2)
+
+        assert result["total"] == 5 and result["completed"] == 2
+        assert result["by_priority"] == [(1, 3, 1), (2, 1, 1), (3, 1, 0)]
+        assert dict(result["open_ages"]) == {"under 1 day": 1, "1-6 days": 2, "7-29 days": 0,
+                                             "30-89 days": 0, "90-364 days": 0, "1 year or more": 0}
+        assert result["oldest_open_days"] == 4
+        assert result["per_day"] == [("2025-12-01", 2), ("2026-02-25", 2), ("2026-03-01", 1)]
+        # Weeks start on Monday
+        assert result["per_week"] == [("2025-12-01", 2), ("2026-02-23", 3)]
+        assert result["top_questions"] == [("Plan", 3), ("Review", 1)]
+
+        ranged = compute_stats([load_todos(output_file)], since="2026-01-01", until="2026-02-28", today=TODAY, backend="array")
+        assert ranged["total"] == 2 and ranged["per_day"] == [("2026-02-25", 2)]
+        print("✅ Stats test passed")
+
+def test_backends_agree():
+    """Test that NumPy and the array fallback give the same numbers."""
+    if peter.stats.np is None:
+        print("⏭️  NumPy not installed, skipping backend comparison")
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        _write_history(output_file)
+        store = load_todos(output_file)
+        for since, until in [(None, None), ("2026-01-01", None), (None, "2026-02-25")]:
+            expected = compute_stats([store], since, until, today=TODAY, backend="array")
+            actual = compute_stats([store], since, until, today=TODAY, backend="numpy")
+            expected.pop("backend")
+            actual.pop("backend")
+            assert actual == expected
+        print("✅ Backend comparison test passed")
+
+def test_stats_cli():
+    """Test `peter stats` output and date validation."""
+    runner = CliRunner()
+    with tempfile.TemporaryDirectory() as directory, contextlib.chdir(directory):
+        result = runner.invoke(cli, ["stats"])
+        assert result.exit_code == 0 and "No TODOs found" in result.output
+
+        _write_history("peter.md")
+        result = runner.invoke(cli, ["stats", "--by", "day", "--top", "1"])
+        assert result.exit_code == 0, result.output
+        assert "Completed: 2/5 (40%)" in result.output
+        assert "Priority 1: 1/3 completed (33%)" in result.output
+        assert "2026-02-25: 2" in result.output
+        assert "3x Plan" in result.output and "Review" not in result.output
+
+        result = runner.invoke(cli, ["stats", "--since", "yesterday"])
+        assert result.exit_code != 0
+        assert "Invalid --since date" in result.output
+        print("✅ Stats CLI test passed")
+
+if __name__ == "__main__":
+    test_compute_stats()
+    test_backends_agree()
+    test_stats_cli()
+    print("All stats tests passed!")
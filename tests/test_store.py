@@ -0,0 +1,67 @@
+# Test the columnar todo store
+import pickle
+from peter.models import Todo
+from peter.store import TodoStore, TodoRow, date_ordinal
+from peter.todo_manager import list_open_todos
+
+TODOS = [
+    Todo('Question 1', 'Answer 1', 2, False, "2026-01-03", 10, "0000000a"),
+    Todo('Question 2', 'nothing', 1, False, "2026-01-03", 20, "0000000b"),
+    Todo('Question 1', 'Answer 3', 1, True, "2026-01-02", 30, "0000000c"),
+    Todo('Question 2', 'Answer 4', 2, False, "2026-01-01", 40, "0000000d"),
+    Todo('Question 1', 'Answer 5', 1, False, "2026-01-04", 50, "0000000e")
+]
+
+def test_store_round_trip():
+    """Test that rows behave like the todos they were built from."""
+    store = TodoStore.from_todos(TODOS)
+    assert len(store) == len(TODOS)
+    assert store.to_todos() == TODOS
+    assert list(store) == TODOS
+    assert store[-1] == TODOS[-1]
+    
+    # Repeated strings are stored once
+    assert store.question_codes.tolist() == [0, 1, 0, 1, 0]
+    print("✅ Store round trip test passed")
+
+def test_store_open_rows_and_sort():
+    """Test column filtering and ordering against the list-based helpers."""
+    store = TodoStore.from_todos(TODOS)
+    
+    assert list_open_todos(store) == list_open_todos(list(TODOS))
+    
+    expected = sorted(list_open_todos(list(TODOS)), key=lambda x: (x.priority, x.date))
+    assert [store[row] for row in store.sorted_rows(store.open_rows())] == expected
+    print("✅ Store filter and sort test passed")
+
+def test_store_row_writes_through():
+    """Test that marking a row completed updates the store."""
+    store = TodoStore.from_todos(TODOS)
+    row = store[0]
+    assert isinstance(row, TodoRow)
+    row.completed = True
+    assert store[0].completed is True
+    assert 0 not in store.open_rows()
+
+def test_store_pickle():
+    """Test that a pickled store loads back unchanged and stays appendable."""
+    store = pickle.loads(pickle.dumps(TodoStore.from_todos(TODOS)))
+    assert store.to_todos() == TODOS
+    
+    store.append(Todo('Question 3', 'Answer 1', 3, False, "2026-01-05", 60, "0000000f"))
+    assert store[-1].question == 'Question 3'
+    assert store[-1].answer == 'Answer 1'
+    assert store.answer_codes[-1] == store.answer_codes[0]
+
+def test_date_ordinal():
+    """Test date ordinals for ISO and free-form section dates."""
+    assert date_ordinal("2026-01-02") - date_ordinal("2026-01-01") == 1
+    assert date_ordinal("someday") == 0
+
+if __name__ == "__main__":
+    test_store_round_trip()
+    test_store_open_rows_and_sort()
+    test_store_row_writes_through()
+    test_store_pickle()
+    test_date_ordinal()
+    print("All store tests passed!")
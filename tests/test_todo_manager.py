@@ -1,8 +1,12 @@
 # Test todo management functionality
 import os
 import tempfile
-from peter.todo_manager import save_todos_to_markdown, create_sample_config
-from peter.models import Answer
+from peter.todo_manager import save_todos_to_markdown, create_sample_config, iter_todos, parse_todos_from_markdown, close_todos_in_place, index_todos, iter_open_todos, top_todos, save_todos_to_markdown_with_status
+from peter.index import load_todos
+from peter.search import search_todos
+from peter.sections import query_todos
+from peter.store import TodoStore, date_ordinal
+from peter.models import Answer, Todo
 
 def test_save_todos_to_markdown():
     """Test saving todos to markdown file."""
@@ -69,6 +73,230 @@ def test_save_todos_to_markdown_existing_file():
     finally:
         os.unlink(output_file)
 
+def test_iter_todos_streams_entries():
+    """Test streaming todos across date sections."""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
+        output_file = f.name
+        f.write("""# Daily Todos
+
+## 2026-01-02
+
+- **Question**: Question A
+  - **Answer**: Answer A
+  - **Priority**: 2
+  - **Completed**: True
+
+- **Question**: Question B
+  - **Answer**: Answer B
+  - **Priority**: 1
+
+## 2026-01-03
+
+- **Question**: Question C
+  - **Priority**: 3
+""")
+    
+    try:
+        stream = iter_todos(output_file)
+        first = next(stream)
+        assert first.question == "Question A"
+        assert first.answer == "Answer A"
+        assert first.priority == 2
+        assert first.completed is True
+        assert first.date == "2026-01-02"
+        
+        rest = list(stream)
+        assert [todo.question for todo in rest] == ["Question B", "Question C"]
+        assert rest[0].completed is False
+        assert rest[1].answer == "nothing"
+        assert rest[1].date == "2026-01-03"
+        
+        assert parse_todos_from_markdown(output_file) == [first] + rest
+        print("✅ Streaming parser test passed")
+    finally:
+        os.unlink(output_file)
+
+def test_iter_todos_missing_file():
+    """Test streaming from a file that does not exist."""
+    assert list(iter_todos("does-not-exist.md")) == []
+    assert parse_todos_from_markdown("does-not-exist.md") == []
+
+def test_close_todos_in_place_keeps_size():
+    """Test closing entries that already carry a Completed line."""
+    answers = [
+        Answer('Question 1', 'Answer 1', 3),
+        Answer('Question 2', 'Answer 2', 2),
+        Answer('Question 3', 'Answer 3', 1)
+    ]
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
+        output_file = f.name
+    
+    try:
+        save_todos_to_markdown(answers, "2026-01-02", output_file)
+        size_before = os.path.getsize(output_file)
+        
+        todos = parse_todos_from_markdown(output_file)
+        close_todos_in_place([todos[0], todos[2]], output_file)
+        
+        assert os.path.getsize(output_file) == size_before
+        with open(output_file, 'r', encoding='utf-8') as f:
+            completed_lines = [line for line in f.read().split("\n") if "Completed" in line]
+        # The shorter value is padded after the colon, leaving no trailing space
+        assert completed_lines == ["  - **Completed**:  True", "  - **Completed**: False", "  - **Completed**:  True"]
+        reparsed = parse_todos_from_markdown(output_file)
+        assert [todo.completed for todo in reparsed] == [True, False, True]
+        assert [todo.answer for todo in reparsed] == ['Answer 1', 'Answer 2', 'Answer 3']
+        print("✅ In-place close test passed")
+    finally:
+        os.unlink(output_file)
+
+def test_close_todos_in_place_inserts_line():
+    """Test closing entries written without a Completed line."""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
+        output_file = f.name
+        f.write("""# Daily Todos
+
+## 2026-01-02
+
+- **Question**: Question A
+  - **Answer**: Answer A
+  - **Priority**: 2
+
+- **Question**: Question B
+  - **Answer**: Answer B
+  - **Priority**: 1""")
+    
+    try:
+        todos = parse_todos_from_markdown(output_file)
+        close_todos_in_place(todos, output_file)
+        
+        reparsed = parse_todos_from_markdown(output_file)
+        assert [todo.completed for todo in reparsed] == [True, True]
+        assert [todo.priority for todo in reparsed] == [2, 1]
+        
+        # Closing again is a no-op
+        close_todos_in_place(reparsed, output_file)
+        assert parse_todos_from_markdown(output_file) == reparsed
+        print("✅ In-place close with insertion test passed")
+    finally:
+        os.unlink(output_file)
+
+def test_close_todos_in_place_detects_changed_file():
+    """Test that stale offsets are rejected instead of patching the wrong entry."""
+    answers = [Answer('Question 1', 'Answer 1', 3)]
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
+        output_file = f.name
+    
+    try:
+        save_todos_to_markdown(answers, "2026-01-02", output_file)
+        todo = parse_todos_from_markdown(output_file)[0]
+        todo.offset += 1
+        
+        try:
+            close_todos_in_place([todo], output_file)
+            assert False, "Expected ValueError"
+        except ValueError:
+            pass
+        print("✅ Stale offset test passed")
+    finally:
+        os.unlink(output_file)
+
+def test_todo_ids_are_stable_and_unique():
+    """Test that identical entries get distinct IDs that survive closing."""
+    answers = [
+        Answer('Question 1', 'Same answer', 2),
+        Answer('Question 1', 'Same answer', 2)
+    ]
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
+        output_file = f.name
+    
+    try:
+        save_todos_to_markdown(answers, "2026-01-02", output_file)
+        todos = parse_todos_from_markdown(output_file)
+        assert todos[0].id != todos[1].id
+        assert len(todos[0].id) == 8
+        
+        close_todos_in_place([todos[1]], output_file)
+        reparsed = parse_todos_from_markdown(output_file)
+        assert [todo.id for todo in reparsed] == [todo.id for todo in todos]
+        
+        index = index_todos(reparsed)
+        assert index[todos[1].id] is reparsed[1]
+        print("✅ Todo ID test passed")
+    finally:
+        os.unlink(output_file)
+
+def test_todo_ids_count_repeated_date_sections():
+    """Test that a date coming back after another date carries on counting."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        same = Answer('Question 1', 'Same answer', 2)
+        save_todos_to_markdown([same], "2026-01-01", output_file)
+        save_todos_to_markdown([Answer('Question 2', 'Other answer', 1)], "2026-01-02", output_file)
+        load_todos(output_file)
+        search_todos(output_file, ["answer"])
+        query_todos(output_file)
+        # Appended after the indexes were built, so they resume from it
+        save_todos_to_markdown([same, same], "2026-01-01", output_file)
+        
+        todos = parse_todos_from_markdown(output_file)
+        ids = [todo.id for todo in todos]
+        assert len(set(ids)) == 4
+        assert all(index_todos(todos)[todo.id] is todo for todo in todos)
+        assert [todo.id for todo in load_todos(output_file)] == ids
+        assert [todo.id for todo in search_todos(output_file, ["answer"])] == ids
+        assert [todo.id for todo in query_todos(output_file)] == ids
+        assert [todo.id for todo in query_todos(output_file, since="2026-01-01", until="2026-01-01")] == \
+            [ids[0], ids[2], ids[3]]
+        
+        # Grouping the date's sections together keeps every ID
+        save_todos_to_markdown_with_status(todos, output_file)
+        regrouped = parse_todos_from_markdown(output_file)
+        assert [todo.date for todo in regrouped] == ["2026-01-01"] * 3 + ["2026-01-02"]
+        assert sorted(todo.id for todo in regrouped) == sorted(ids)
+        
+        close_todos_in_place([regrouped[2]], output_file)
+        assert [todo.completed for todo in parse_todos_from_markdown(output_file)] == [False, False, True, False]
+        print("✅ Repeated date section ID test passed")
+
+def test_index_todos_ambiguous_id():
+    """Test that colliding IDs are not resolved to either todo."""
+    todos = [
+        Todo('Question 1', 'Answer 1', 1, id="abcd1234"),
+        Todo('Question 2', 'Answer 2', 1, id="abcd1234")
+    ]
+    assert index_todos(todos) == {"abcd1234": None}
+
+def test_top_todos_orders():
+    """Test the bounded-heap top-k for each ordering against a full sort."""
+    todos = [
+        Todo('Old low', 'a', 3, date="2026-01-01"),
+        Todo('New high', 'b', 1, date="2026-03-01"),
+        Todo('Done', 'c', 1, True, date="2026-01-01"),
+        Todo('Old high', 'd', 1, date="2026-02-01"),
+        Todo('Empty', 'nothing', 1, date="2026-01-01"),
+        Todo('New mid', 'e', 2, date="2026-03-02"),
+    ]
+    open_todos = list(iter_open_todos(todos))
+    
+    by_priority = sorted(open_todos, key=lambda todo: (todo.priority, todo.date))
+    assert top_todos(iter_open_todos(todos), 2) == by_priority[:2]
+    assert [todo.question for todo in top_todos(iter_open_todos(todos), 2, "age")] == ['Old low', 'Old high']
+    
+    # 60 days open at 0.1 per day lift priority 3 past the newer priority 1s
+    today = date_ordinal("2026-03-02")
+    ranked = top_todos(iter_open_todos(todos), 1, "score", 0.1, today)
+    assert [todo.question for todo in ranked] == ['Old low']
+    
+    # A TodoStore streams row views through the same heap
+    store = TodoStore.from_todos(todos)
+    assert [todo.question for todo in top_todos(iter_open_todos(store), 2)] == ['Old high', 'New high']
+    assert top_todos(iter_open_todos(todos), 10) == by_priority
+    print("✅ Top-k test passed")
+
 def test_create_sample_config():
     """Test creating sample config (this is mainly for development)."""
     # This test is more for development purposes
@@ -77,5 +305,14 @@ def test_create_sample_config():
 if __name__ == "__main__":
     test_save_todos_to_markdown()
     test_save_todos_to_markdown_existing_file()
+    test_iter_todos_streams_entries()
+    test_iter_todos_missing_file()
+    test_close_todos_in_place_keeps_size()
+    test_close_todos_in_place_inserts_line()
+    test_close_todos_in_place_detects_changed_file()
+    test_todo_ids_are_stable_and_unique()
+    test_todo_ids_count_repeated_date_sections()
+    test_index_todos_ambiguous_id()
+    test_top_todos_orders()
     test_create_sample_config()
     print("All todo manager tests passed!")
@@ -0,0 +1,100 @@
+# Test per-phase tracing and profiling
+import contextlib
+import json
+import os
+import tempfile
+import threading
+from click.testing import CliRunner
+from peter import trace
+from peter.cli import cli
+from peter.todo_manager import iter_open_todos, parse_todos_from_markdown, save_todos_to_markdown
+from peter.models import Answer, Todo
+
+def test_tracing_off_records_nothing():
+    """Test that traced functions behave normally while tracing is off."""
+    assert not trace.enabled()
+    assert trace.span("anything") is trace.span("other")
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        save_todos_to_markdown([Answer('Task', 'yes', 1)], "2026-01-01", output_file)
+        assert [todo.question for todo in parse_todos_from_markdown(output_file)] == ["Task"]
+    assert parse_todos_from_markdown.__name__ == "parse_todos_from_markdown"
+    print("✅ Tracing off test passed")
+
+def test_spans_nest_and_count():
+    """Test nesting, byte counts and per-item generator counts."""
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "peter.md")
+        report_file = os.path.join(directory, "trace.json")
+        tracer = trace.start(f"json:{report_file}")
+        try:
+            save_todos_to_markdown([Answer('A', 'yes', 1), Answer('B', 'nothing', 2)], "2026-01-01", output_file)
+            with trace.span("outer") as outer:
+                outer.add(todos=7)
+                todos = parse_todos_from_markdown(output_file)
+                assert len(list(iter_open_todos(todos))) == 1
+            report = tracer.report(0.0)
+        finally:
+            trace.finish()
+        assert not trace.enabled()
+
+        phases = {(phase["depth"], phase["name"]): phase for phase in report["phases"]}
+        assert phases[(0, "write")]["bytes_written"] == os.path.getsize(output_file)
+        assert phases[(0, "outer")]["todos"] == 7
+        assert phases[(1, "parse")]["bytes_read"] == os.path.getsize(output_file)
+        assert phases[(1, "parse")]["todos"] == 2
+        assert phases[(1, "filter")]["todos"] == 1
+        with open(report_file, encoding='utf-8') as f:
+            assert [phase["name"] for phase in json.load(f)["phases"]][0] == "import"
+        print("✅ Span nesting test passed")
+
+def test_other_threads_record_nothing():
+    """Test that traced generators run untimed outside the tracing thread."""
+    tracer = trace.start("summary")
+    try:
+        todos = [Todo('A', 'yes', 1), Todo('B', 'nothing', 2)]
+        results = []
+        with trace.span("outer"):
+            worker = threading.Thread(target=lambda: results.append(len(list(iter_open_todos(todos)))))
+            worker.start()
+            worker.join()
+            assert [span.name for span in tracer.stack] == ["outer"]
+        names = [span.name for span in tracer.spans]
+    finally:
+        trace.finish()
+    assert results == [1]
+    assert "filter" not in names
+    print("✅ Thread guard test passed")
+
+def test_profile_cli_outputs():
+    """Test `peter --profile-format` JSON and Chrome trace reports."""
+    runner = CliRunner()
+    with tempfile.TemporaryDirectory() as directory, contextlib.chdir(directory):
+        result = runner.invoke(cli, ["--profile-format", "json", "--profile-output", "add.json", "add", "Task", "yes"])
+        assert result.exit_code == 0, result.output
+        with open("add.json", encoding='utf-8') as f:
+            phases = json.load(f)["phases"]
+        assert [(phase["depth"], phase["name"]) for phase in phases][:3] == [(0, "import"), (0, "command:add"), (1, "write")]
+        assert phases[2]["bytes_written"] > 0
+
+        result = runner.invoke(cli, ["--profile-format", "chrome", "--profile-output", "list.json", "list"])
+        assert result.exit_code == 0, result.output
+        assert "Task" in result.output
+        with open("list.json", encoding='utf-8') as f:
+            events = json.load(f)["traceEvents"]
+        names = [event["name"] for event in events]
+        assert "command:list" in names and "load_todos" in names and "render" in names
+        assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+        assert not trace.enabled()
+
+        result = runner.invoke(cli, ["list"], env={trace.TRACE_ENV: "bogus"})
+        assert result.exit_code != 0
+        assert "Unknown profile mode" in result.output
+        print("✅ Profile CLI test passed")
+
+if __name__ == "__main__":
+    test_tracing_off_records_nothing()
+    test_spans_nest_and_count()
+    test_other_threads_record_nothing()
+    test_profile_cli_outputs()
+    print("All tracing tests passed!")